@@ -0,0 +1,63 @@
+# benchmarks/compare.py
+"""Compares two benchmarks.suite result files, e.g. from two commits.
+
+    python -m benchmarks.compare OLD.json NEW.json --threshold 10
+
+Prints the change of every latency percentile and of peak allocations, and
+exits with status 1 if any p95 got slower by more than `--threshold` percent.
+"""
+
+import argparse
+import json
+import sys
+
+METRICS = ("p50_ms", "p95_ms", "p99_ms", "peak_alloc_kib")
+
+
+def load(path):
+    with open(path) as f:
+        data = json.load(f)
+    results = {
+        (r["size"], r["target"], r["resource"], r["operation"]): r
+        for r in data["results"]
+    }
+    return data["meta"], results
+
+
+def change(old, new):
+    return (new - old) / old * 100 if old else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("old")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=10.0)
+    args = parser.parse_args()
+
+    old_meta, old = load(args.old)
+    new_meta, new = load(args.new)
+    print(f"{old_meta['commit']} -> {new_meta['commit']}")
+    header = "".join(f"{metric:>18}" for metric in METRICS)
+    print(f"{'size':>7} {'target':>6} {'resource':>8} {'op':>6}{header}")
+
+    regressions = []
+    for key in sorted(old.keys() & new.keys()):
+        cells = "".join(
+            f"{new[key][metric]:>10.2f} {change(old[key][metric], new[key][metric]):>+6.1f}%"
+            for metric in METRICS
+        )
+        size, target, resource, operation = key
+        print(f"{size:>7} {target:>6} {resource:>8} {operation:>6}{cells}")
+        if change(old[key]["p95_ms"], new[key]["p95_ms"]) > args.threshold:
+            regressions.append(key)
+
+    for key in sorted(old.keys() ^ new.keys()):
+        print(f"only in {'old' if key in old else 'new'}: {key}")
+    if regressions:
+        print(f"{len(regressions)} p95 regressions above {args.threshold}%")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# benchmarks/compression.py
+"""CPU cost against bytes saved of gzip and brotli on real API responses.
+
+Runs against the database configured by APP_SETTINGS, seeds `--rows` books
+(removed again afterwards), fetches a few uncompressed responses and times
+compressing each at several gzip levels and brotli qualities.
+
+    python -m benchmarks.compression --rows 1000
+"""
+
+import argparse
+import time
+import zlib
+
+import brotli
+
+from benchmarks.seed import cleanup, seed
+from src import create_app, db
+
+PATHS = ["/api/books?limit=20", "/api/books?limit=100", "/api/books?limit=1000"]
+CODECS = [
+    ("gzip-1", lambda data: zlib.compress(data, 1, wbits=31)),
+    ("gzip-6", lambda data: zlib.compress(data, 6, wbits=31)),
+    ("gzip-9", lambda data: zlib.compress(data, 9, wbits=31)),
+    ("br-1", lambda data: brotli.compress(data, quality=1)),
+    ("br-4", lambda data: brotli.compress(data, quality=4)),
+    ("br-6", lambda data: brotli.compress(data, quality=6)),
+    ("br-11", lambda data: brotli.compress(data, quality=11)),
+]
+
+
+def best_time(f, data, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        f(data)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    app = create_app()
+    app.config["RESPONSE_CACHE_ENABLED"] = False
+    with app.app_context():
+        db.create_all()
+        cleanup()
+        seed(args.rows)
+    try:
+        client = app.test_client()
+        payloads = [(path, client.get(path).data) for path in PATHS]
+        payloads.append(("/api/books/export", client.get("/api/books/export").data))
+    finally:
+        with app.app_context():
+            cleanup()
+
+    for path, data in payloads:
+        print(f"{path} ({len(data):,} bytes)")
+        for name, compress in CODECS:
+            size = len(compress(data))
+            seconds = best_time(compress, data, args.repeat)
+            print(
+                f"  {name:>7}: {len(data) / size:5.1f}x  "
+                f"saves {len(data) - size:>9,} bytes  "
+                f"{seconds * 1000:8.3f} ms  {len(data) / seconds / 2**20:7.1f} MiB/s"
+            )
+
+
+if __name__ == "__main__":
+    main()
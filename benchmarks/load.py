@@ -0,0 +1,161 @@
+# benchmarks/load.py
+"""Throughput of gunicorn worker classes at 1, 4 and 16 concurrent clients.
+
+Runs against the database configured by APP_SETTINGS. Seeds `--rows` books
+(removed again afterwards), then starts gunicorn with gunicorn.conf.py once
+per `--modes` entry, and has each `--clients` count of keep-alive clients
+request `--path` for `--duration` seconds. The response cache is off, so
+every request reaches Postgres.
+
+    python -m benchmarks.load --modes sync gthread gevent --clients 1 4 16
+"""
+
+import argparse
+import http.client
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+from benchmarks.seed import cleanup, seed
+from src import create_app, db
+
+ROOT = Path(__file__).parent.parent
+
+
+def start_server(mode, port, workers):
+    env = dict(os.environ, GUNICORN_WORKER_CLASS=mode, RESPONSE_CACHE_ENABLED="false")
+    if workers:
+        env["GUNICORN_WORKERS"] = str(workers)
+    server = subprocess.Popen(  # nosec B603
+        [
+            sys.executable,
+            "-m",
+            "gunicorn",
+            "-c",
+            "gunicorn.conf.py",
+            "--bind",
+            f"127.0.0.1:{port}",
+            "manage:app",
+        ],
+        cwd=ROOT,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            connection.request("GET", "/ping")
+            if connection.getresponse().status == 200:
+                return server
+        except OSError:
+            time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError(f"gunicorn ({mode}) did not start")
+
+
+def get(connection, path):
+    connection.request("GET", path)
+    resp = connection.getresponse()
+    resp.read()
+    return resp.status
+
+
+def client(port, path, stop_at, latencies, errors):
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    while time.monotonic() < stop_at:
+        start = time.perf_counter()
+        try:
+            try:
+                status = get(connection, path)
+            except (ConnectionError, http.client.RemoteDisconnected):
+                # a kept-alive connection closed by the server (e.g. a worker
+                # restarting after max_requests); retry once like a browser
+                connection.close()
+                status = get(connection, path)
+        except (OSError, http.client.HTTPException):
+            errors.append(None)
+            connection.close()
+            continue
+        if status != 200:
+            errors.append(status)
+        latencies.append(time.perf_counter() - start)
+
+
+def run_clients(port, path, clients, duration):
+    latencies, errors = [], []
+    stop_at = time.monotonic() + duration
+    threads = [
+        threading.Thread(target=client, args=(port, path, stop_at, latencies, errors))
+        for _ in range(clients)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    quantiles = statistics.quantiles(latencies, n=100, method="inclusive")
+    return {
+        "clients": clients,
+        "requests": len(latencies),
+        "errors": len(errors),
+        "requests_per_sec": len(latencies) / duration,
+        "p50_ms": quantiles[49] * 1000,
+        "p95_ms": quantiles[94] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--modes", nargs="+", default=["sync", "gthread", "gevent"])
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--path", default="/api/books?limit=20")
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--workers", type=int, help="default: from gunicorn.conf.py")
+    parser.add_argument("--port", type=int, default=50599)
+    parser.add_argument("--output", type=Path)
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        cleanup()
+        seed(args.rows)
+
+    results = []
+    try:
+        for mode in args.modes:
+            server = start_server(mode, args.port, args.workers)
+            try:
+                for clients in args.clients:
+                    result = {
+                        "mode": mode,
+                        **run_clients(args.port, args.path, clients, args.duration),
+                    }
+                    results.append(result)
+                    print(
+                        f"{mode:>8} {clients:>3} clients: "
+                        f"{result['requests_per_sec']:8.1f} req/s  "
+                        f"p50 {result['p50_ms']:7.2f} ms  p95 {result['p95_ms']:7.2f} ms  "
+                        f"errors {result['errors']}",
+                        flush=True,
+                    )
+            finally:
+                server.terminate()
+                server.wait()
+    finally:
+        with app.app_context():
+            cleanup()
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
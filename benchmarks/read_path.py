@@ -0,0 +1,75 @@
+# benchmarks/read_path.py
+"""Rows/sec of GET /api/books serialization: ORM + marshal vs Core rows + encoder.
+
+Runs against the database configured by APP_SETTINGS, seeds `--rows` books
+(removed again afterwards) and times only the query and serialization work
+of the list endpoint, so the two read paths can be compared directly.
+
+    python -m benchmarks.read_path --rows 10000 --repeat 5
+"""
+
+import argparse
+import time
+
+from flask_restx import marshal
+from flask_restx.representations import output_json
+from sqlalchemy.orm import undefer
+
+from benchmarks.seed import cleanup, seed
+from src import create_app, db
+from src.api.books import book, book_encoder
+from src.api.crud import get_books_page
+from src.models.models import Book
+
+
+def orm_marshal(rows):
+    books = (
+        Book.query.options(undefer(Book.notes))
+        .order_by(Book.date_added, Book.id)
+        .limit(rows)
+        .all()
+    )
+    return output_json(marshal(books, book), 200).get_data()
+
+
+def core_encoder(rows):
+    page, _ = get_books_page(rows, None, book_encoder.all_fields)
+    encode = book_encoder.get()
+    return output_json([encode(row) for row in page], 200).get_data()
+
+
+def best_time(f, rows, repeat):
+    timings = []
+    for _ in range(repeat):
+        db.session.expunge_all()
+        start = time.perf_counter()
+        f(rows)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        cleanup()
+        seed(args.rows)
+        try:
+            assert orm_marshal(args.rows) == core_encoder(args.rows)
+            for name, f in [
+                ("orm+marshal", orm_marshal),
+                ("core+encoder", core_encoder),
+            ]:
+                seconds = best_time(f, args.rows, args.repeat)
+                print(f"{name:>14}: {args.rows / seconds:>10,.0f} rows/sec")
+        finally:
+            cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+# benchmarks/seed.py
+
+from uuid import uuid4
+
+from sqlalchemy import delete, insert
+
+from src import db
+from src.models.models import Book, User
+
+PREFIX = "benchmark-"
+BATCH_SIZE = 1000
+
+
+def _batches(rows):
+    for start in range(0, len(rows), BATCH_SIZE):
+        yield rows[start:][:BATCH_SIZE]
+
+
+def seed(size):
+    """Inserts `size` books and `size` users; returns their ids."""
+    books = [
+        {
+            "id": uuid4(),
+            "title": f"{PREFIX}book-{i}",
+            "author": f"Author {i % 97}",
+            "genre": f"Genre {i % 13}",
+            "notes": "Some notes about this book. " * 4,
+            "rating": i % 5 + 1,
+        }
+        for i in range(size)
+    ]
+    users = [
+        {"username": f"{PREFIX}user-{i}", "email": f"{PREFIX}user-{i}@example.com"}
+        for i in range(size)
+    ]
+    for batch in _batches(books):
+        db.session.execute(insert(Book), batch)
+    user_ids = []
+    for batch in _batches(users):
+        user_ids += db.session.scalars(
+            insert(User).returning(User.id, sort_by_parameter_order=True), batch
+        ).all()
+    db.session.commit()
+    return [book["id"] for book in books], user_ids
+
+
+def cleanup():
+    """Removes everything seeded or created by a benchmark run."""
+    db.session.execute(delete(Book).where(Book.title.startswith(PREFIX)))
+    db.session.execute(delete(User).where(User.username.startswith(PREFIX)))
+    db.session.commit()
@@ -0,0 +1,349 @@
+# benchmarks/suite.py
+"""Latency and allocations of the book and user endpoints at several table sizes.
+
+Runs against the database configured by APP_SETTINGS. For every `--sizes`
+entry it seeds that many books and users (removed again afterwards), then
+times list, detail, create, update and delete through the Flask test client
+and through the crud functions directly. p50/p95/p99 latencies and peak
+allocations per operation are saved as JSON named after the current commit,
+so two commits can be compared with benchmarks.compare:
+
+    python -m benchmarks.suite --sizes 1000 10000 100000
+    python -m benchmarks.compare benchmarks/results/OLD.json \\
+        benchmarks/results/NEW.json
+
+The response cache is off unless `--cache` is given, so reads hit the
+database. Allocations come from a separate tracemalloc pass, so tracing does
+not inflate the latencies.
+"""
+
+import argparse
+import itertools
+import json
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+from sqlalchemy import select
+
+from benchmarks.seed import PREFIX, cleanup, seed
+from src import create_app, db
+from src.api import crud
+from src.api.books import book_encoder
+from src.api.users import user_encoder
+from src.models.models import Book, User
+
+OPERATIONS = ("list", "detail", "create", "update", "delete")
+RESULTS_DIR = Path(__file__).parent / "results"
+
+_serial = itertools.count()
+
+
+class Target:
+    """The five operations on one resource, each a method taking no arguments.
+
+    `ids` are the seeded ids, in seeding order. Rows made by `create` are
+    what `delete` removes: call `prepare_delete` (in an app context) first.
+    """
+
+    model = None
+    name_column = None
+
+    def __init__(self, app, ids, rng):
+        self.app = app
+        self.ids = ids
+        self.rng = rng
+        self.pending = []
+
+    def pick(self):
+        """A random seeded row, as (seed index, id)."""
+        index = self.rng.randrange(len(self.ids))
+        return index, self.ids[index]
+
+    def prepare_delete(self):
+        name = getattr(self.model, self.name_column)
+        self.pending = db.session.scalars(
+            select(self.model.id).where(name.startswith(f"{PREFIX}new-"))
+        ).all()
+
+    def measure(self, operation):
+        """Seconds taken by one call of `operation`."""
+        start = time.perf_counter()
+        getattr(self, operation)()
+        return time.perf_counter() - start
+
+
+class CrudTarget(Target):
+    target = "crud"
+
+    def measure(self, operation):
+        # like a request, every call gets a fresh session
+        with self.app.app_context():
+            return super().measure(operation)
+
+
+class ClientTarget(Target):
+    target = "client"
+
+    def __init__(self, app, ids, rng):
+        super().__init__(app, ids, rng)
+        self.client = app.test_client()
+
+    def request(self, method, url, **kwargs):
+        resp = self.client.open(url, method=method, **kwargs)
+        if resp.status_code >= 300:
+            raise RuntimeError(f"{method} {url}: {resp.status_code}")
+
+
+class BooksClient(ClientTarget):
+    resource = "books"
+    model = Book
+    name_column = "title"
+
+    def list(self):
+        self.request("GET", "/api/books?limit=100")
+
+    def detail(self):
+        self.request("GET", f"/api/books/{self.pick()[1]}")
+
+    def create(self):
+        title = f"{PREFIX}new-{next(_serial)}"
+        self.request("POST", "/api/books", json={"title": title, "author": "New"})
+
+    def update(self):
+        index, book_id = self.pick()
+        self.request(
+            "PUT",
+            f"/api/books/{book_id}",
+            json={"title": f"{PREFIX}book-{index}", "author": f"{next(_serial)}"},
+        )
+
+    def delete(self):
+        self.request("DELETE", f"/api/books/{self.pending.pop()}")
+
+
+class UsersClient(ClientTarget):
+    resource = "users"
+    model = User
+    name_column = "username"
+
+    def list(self):
+        self.request("GET", "/api/users?limit=100")
+
+    def detail(self):
+        self.request("GET", f"/api/users/{self.pick()[1]}")
+
+    def create(self):
+        username = f"{PREFIX}new-{next(_serial)}"
+        self.request(
+            "POST",
+            "/api/users",
+            json={"username": username, "email": f"{username}@example.com"},
+        )
+
+    def update(self):
+        index, user_id = self.pick()
+        self.request(
+            "PUT",
+            f"/api/users/{user_id}",
+            json={
+                "username": f"{PREFIX}user-{index}",
+                "email": f"{PREFIX}user-{index}@example.com",
+            },
+        )
+
+    def delete(self):
+        self.request("DELETE", f"/api/users/{self.pending.pop()}")
+
+
+class BooksCrud(CrudTarget):
+    resource = "books"
+    model = Book
+    name_column = "title"
+
+    def list(self):
+        crud.get_books_page(100, None, book_encoder.all_fields)
+
+    def detail(self):
+        crud.get_book_row(self.pick()[1], book_encoder.all_fields)
+
+    def create(self):
+        crud.add_book(f"{PREFIX}new-{next(_serial)}", "New")
+
+    def update(self):
+        index, book_id = self.pick()
+        book = crud.get_book_by_id(book_id)
+        crud.update_book(book, f"{PREFIX}book-{index}", f"{next(_serial)}")
+
+    def delete(self):
+        crud.delete_book(crud.get_book_by_id(self.pending.pop()))
+
+
+class UsersCrud(CrudTarget):
+    resource = "users"
+    model = User
+    name_column = "username"
+
+    def list(self):
+        crud.get_users_page(100, None, user_encoder.all_fields)
+
+    def detail(self):
+        crud.get_user_row(self.pick()[1], user_encoder.all_fields)
+
+    def create(self):
+        username = f"{PREFIX}new-{next(_serial)}"
+        crud.add_user(username, f"{username}@example.com")
+
+    def update(self):
+        index, user_id = self.pick()
+        user = crud.get_user_by_id(user_id)
+        crud.update_user(
+            user, f"{PREFIX}user-{index}", f"{PREFIX}user-{index}@example.com"
+        )
+
+    def delete(self):
+        crud.delete_user(crud.get_user_by_id(self.pending.pop()))
+
+
+TARGETS = [
+    (BooksClient, 0),
+    (UsersClient, 1),
+    (BooksCrud, 0),
+    (UsersCrud, 1),
+]
+
+
+def peak_allocation(target, operation):
+    """Bytes allocated at the peak of one call, above what was live before it."""
+    tracemalloc.reset_peak()
+    before = tracemalloc.get_traced_memory()[0]
+    target.measure(operation)
+    return tracemalloc.get_traced_memory()[1] - before
+
+
+def percentile(samples, p):
+    return statistics.quantiles(samples, n=100, method="inclusive")[p - 1]
+
+
+def run_operation(target, operation, args):
+    if operation == "delete":
+        with target.app.app_context():
+            target.prepare_delete()
+    for _ in range(args.warmup):
+        target.measure(operation)
+    timings = [target.measure(operation) for _ in range(args.iterations)]
+
+    tracemalloc.start()
+    try:
+        peaks = [
+            peak_allocation(target, operation) for _ in range(args.alloc_iterations)
+        ]
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "target": target.target,
+        "resource": target.resource,
+        "operation": operation,
+        "iterations": len(timings),
+        "mean_ms": statistics.fmean(timings) * 1000,
+        "p50_ms": percentile(timings, 50) * 1000,
+        "p95_ms": percentile(timings, 95) * 1000,
+        "p99_ms": percentile(timings, 99) * 1000,
+        "peak_alloc_kib": statistics.median(peaks) / 1024,
+    }
+
+
+def run_size(app, size, args):
+    with app.app_context():
+        cleanup()
+        seeded = seed(size)
+    results = []
+    try:
+        for target_class, ids in TARGETS:
+            rng = random.Random(f"{args.seed}-{size}-{target_class.__name__}")
+            target = target_class(app, seeded[ids], rng)
+            for operation in OPERATIONS:
+                result = run_operation(target, operation, args)
+                results.append({"size": size, **result})
+                print(format_result(results[-1]), flush=True)
+    finally:
+        with app.app_context():
+            cleanup()
+    return results
+
+
+def format_result(result):
+    return (
+        f"{result['size']:>7} {result['target']:>6} {result['resource']:>5} "
+        f"{result['operation']:>6}  p50 {result['p50_ms']:7.2f} ms  "
+        f"p95 {result['p95_ms']:7.2f} ms  p99 {result['p99_ms']:7.2f} ms  "
+        f"peak {result['peak_alloc_kib']:8.1f} KiB"
+    )
+
+
+def git(*args):
+    try:
+        return subprocess.run(  # nosec B603 B607
+            ["git", *args], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def metadata(app, args):
+    with app.app_context():
+        server_version = db.session.scalar(select(db.func.version()))
+    return {
+        "commit": git("rev-parse", "--short", "HEAD"),
+        "dirty": bool(git("status", "--porcelain", "--untracked-files=no")),
+        "created": datetime.now(timezone.utc).isoformat(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "database": server_version,
+        "sizes": args.sizes,
+        "iterations": args.iterations,
+        "alloc_iterations": args.alloc_iterations,
+        "warmup": args.warmup,
+        "seed": args.seed,
+        "cache": args.cache,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--alloc-iterations", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--seed", default="flasker-books")
+    parser.add_argument(
+        "--cache", action="store_true", help="keep the response cache on"
+    )
+    parser.add_argument("--output", type=Path, help="default: results/<commit>.json")
+    args = parser.parse_args()
+
+    app = create_app()
+    app.config["RESPONSE_CACHE_ENABLED"] = args.cache
+    with app.app_context():
+        db.create_all()
+
+    meta = metadata(app, args)
+    results = []
+    for size in args.sizes:
+        results += run_size(app, size, args)
+
+    output = args.output or RESULTS_DIR / f"{meta['commit'] or 'unknown'}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps({"meta": meta, "results": results}, indent=2))
+    print(f"Saved {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# benchmarks/templates.py
+"""First-request latency of template pages in a fresh process, the cost a
+newly started or recycled worker pays, with and without a warm bytecode cache.
+
+Each run is a new interpreter that creates the app and times its first
+request to each page; --runs of them are made with TEMPLATE_CACHE_DIR unset,
+then with an empty cache directory that is precompiled first.
+
+    python -m benchmarks.templates --runs 10
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+PATHS = ["/", "/about"]
+
+CHILD = """
+import json, sys, time
+from src import create_app
+app = create_app()
+client = app.test_client()
+timings = {}
+for path in sys.argv[1:]:
+    start = time.perf_counter()
+    client.get(path)
+    timings[path] = time.perf_counter() - start
+print(json.dumps(timings))
+"""
+
+
+def first_requests(env, runs):
+    timings = {path: [] for path in PATHS}
+    for _ in range(runs):
+        output = subprocess.run(  # nosec B603
+            [sys.executable, "-c", CHILD, *PATHS],
+            env=env,
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout
+        for path, seconds in json.loads(output.splitlines()[-1]).items():
+            timings[path].append(seconds)
+    return timings
+
+
+def report(label, timings):
+    print(label)
+    for path, samples in timings.items():
+        print(
+            f"  {path:<10} median {statistics.median(samples) * 1000:7.2f} ms"
+            f"  min {min(samples) * 1000:7.2f} ms"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    env = dict(os.environ, TEMPLATE_CACHE_DIR="")
+    report("no bytecode cache", first_requests(env, args.runs))
+
+    with tempfile.TemporaryDirectory() as directory:
+        env["TEMPLATE_CACHE_DIR"] = directory
+        subprocess.run(  # nosec B603
+            [sys.executable, "-m", "src.templating"], env=env, check=True
+        )
+        report("precompiled bytecode cache", first_requests(env, args.runs))
+
+
+if __name__ == "__main__":
+    main()
@@ -12,4 +12,7 @@ done
 
 echo "PostgreSQL started"
 
+# rebuilds the book statistics if the database predates them
+python manage.py ensure_stats
+
 gunicorn manage:app
\ No newline at end of file
@@ -1,5 +1,10 @@
 # gunicorn.conf.py
 
+import multiprocessing
+import os
+import shutil
+import tempfile
+
 max_requests = 1000
 max_requests_jitter = 50
 
@@ -7,6 +12,53 @@ log_file = "-"
 
 bind = "0.0.0.0:50505"
 
-threads = 1
-
 timeout = 120
+
+# GUNICORN_WORKER_CLASS picks how each worker handles concurrent requests:
+#   sync     one request at a time
+#   gthread  GUNICORN_THREADS requests at a time, one thread each (default)
+#   gevent   up to GUNICORN_WORKER_CONNECTIONS requests as greenlets, with
+#            psycopg2 made cooperative in post_fork
+# Every request holds a pooled connection while it queries, so keep threads
+# (or worker connections) close to DB_POOL_SIZE + DB_POOL_MAX_OVERFLOW.
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gthread")
+cores = multiprocessing.cpu_count()
+
+if worker_class == "gevent":
+    workers = int(os.getenv("GUNICORN_WORKERS", cores))
+    worker_connections = int(os.getenv("GUNICORN_WORKER_CONNECTIONS", "50"))
+    threads = 1
+elif worker_class == "gthread":
+    workers = int(os.getenv("GUNICORN_WORKERS", cores + 1))
+    threads = int(os.getenv("GUNICORN_THREADS", "4"))
+else:
+    workers = int(os.getenv("GUNICORN_WORKERS", 2 * cores + 1))
+    threads = 1
+
+# Workers write their Prometheus metrics here so /metrics can merge them; it
+# has to be set before the workers import prometheus_client.
+os.environ.setdefault(
+    "PROMETHEUS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), "booker-metrics")
+)
+
+from prometheus_client import multiprocess  # noqa: E402
+
+
+def on_starting(server):
+    # files left by a previous master would be counted again
+    metrics_dir = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir)
+
+
+def post_fork(server, worker):
+    if worker_class == "gevent":
+        # psycopg2 is a C extension that gevent's monkey patching can't
+        # reach, so without this a query blocks every greenlet in the worker
+        from psycogreen.gevent import patch_psycopg
+
+        patch_psycopg()
+
+
+def child_exit(server, worker):
+    multiprocess.mark_process_dead(worker.pid)
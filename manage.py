@@ -3,10 +3,16 @@
 from flask.cli import FlaskGroup
 
 from src import create_app, db
+from src.api.spec import write_spec
+from src.api.stats import ensure_book_stats, rebuild_book_stats
+from src.assets import build_assets
 from src.models.models import User  # , Book
+from src.templating import precompile_templates
 
 app = create_app()
-cli = FlaskGroup(create_app=create_app)
+# reuse the app above rather than create a second one for every command;
+# src already loaded .env
+cli = FlaskGroup(create_app=lambda: app, load_dotenv=False)
 
 
 @cli.command("recreate_db")
@@ -25,5 +31,36 @@ def seed_db():
     db.session.commit()
 
 
+@cli.command("rebuild_stats")
+def rebuild_stats():
+    print("Rebuilding book statistics")
+    rebuild_book_stats()
+
+
+@cli.command("ensure_stats")
+def ensure_stats():
+    if ensure_book_stats():
+        print("Rebuilt the missing book statistics")
+
+
+@cli.command("build_static")
+def build_static():
+    manifest = build_assets(app.static_folder)
+    print(f"Built {len(manifest)} static assets")
+
+
+@cli.command("precompile_templates")
+def precompile():
+    names = precompile_templates(app)
+    print(f"Precompiled {len(names)} templates")
+
+
+@cli.command("build_spec")
+def build_spec():
+    path = app.config["SWAGGER_SPEC_FILE"] or "swagger.json"
+    write_spec(app, path)
+    print(f"Wrote the Swagger spec to {path}")
+
+
 if __name__ == "__main__":
     cli()
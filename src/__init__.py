@@ -5,10 +5,12 @@ from dotenv import load_dotenv
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 
+from src.replica import RoutingSession
+
 load_dotenv()
 
 # instantiate db
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 
 
 # new
@@ -28,17 +30,54 @@ def create_app(script_info=None):
     app.logger.debug(f"Starting Booker app -- name is {__name__}")
 
     # set up views BEFORE api to ensure that '/' routes correctly -- https://github.com/python-restx/flask-restx/issues/452#issuecomment-1526394501 # noqa
-    from src.views import home
+    from src.views import books, home
 
     app.register_blueprint(home.blueprint)
+    app.register_blueprint(books.blueprint)
+
+    from src.assets import init_assets
+    from src.templating import init_template_cache
+
+    init_assets(app)
+    init_template_cache(app)
 
     # set up extensions
-    db.init_app(app)
+    from src.metrics import init_metrics
+
+    init_metrics(app)
+    # image builds run the build commands (build_static, precompile_templates,
+    # build_spec) without a database; nothing else works without one
+    has_database = bool(
+        app.config.get("SQLALCHEMY_DATABASE_URI") or app.config.get("SQLALCHEMY_BINDS")
+    )
+    if has_database:
+        db.init_app(app)
+    else:
+        app.logger.warning("No database configured, only build commands will work")
+
+    from src.query_inspector import init_query_inspector
+
+    if has_database:
+        init_query_inspector(app)
+
+    from src.replica import init_replica
+
+    init_replica(app)
+
+    from src.compression import init_compression
+
+    init_compression(app)
+
+    from src.api.cache import init_cache
+
+    init_cache(app)
 
     # register api
     from src.api import api
+    from src.api.spec import init_spec
 
     api.init_app(app)
+    init_spec(app)
 
     # shell context for flask cli
     @app.shell_context_processor
@@ -3,6 +3,7 @@
 from flask_restx import Api
 
 from src.api.books import books_ns
+from src.api.cache import cache_namespace
 from src.api.ping import ping_namespace
 from src.api.users import users_namespace
 
@@ -11,3 +12,4 @@ api = Api(version="1.0", title="My API", doc="/docs")
 api.add_namespace(ping_namespace, path="/ping")
 api.add_namespace(users_namespace, path="/api/users")
 api.add_namespace(books_ns, path="/api/books")
+api.add_namespace(cache_namespace, path="/api/cache")
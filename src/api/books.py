@@ -1,20 +1,64 @@
 # src/api/users.py
 
+from datetime import datetime, timezone
 from http import HTTPStatus
+from uuid import UUID, uuid4
 
-from flask import request
-from flask_restx import Namespace, Resource, fields
+from flask import Response, current_app, request, stream_with_context
+from flask_restx import Namespace, Resource, fields, inputs, marshal, reqparse
 
 from src import db  # noqa: F401
+from src.api.bulk import BOOK_FIELDS, book_row, parse_items, patch_values
+from src.api.cache import cached
+from src.api.encoders import ModelEncoder
+from src.api.export import EXPORT_FORMATS
+from src.api.fieldsets import add_fields_argument, requested_fields
 from src.models.models import Book  # noqa: F401
+from src.models.models import BookType, ReadingStatus
 
+from src.replica import (  # isort:skip
+    client_reads_primary,
+    read_from_replica,
+    reads_from_replica,
+)
+from src.api.conditional import (  # isort:skip
+    has_validators,
+    is_not_modified,
+    make_etag,
+    not_modified_response,
+    page_validators,
+    validator_headers,
+)
+from src.api.pagination import (  # isort:skip
+    decode_cursor,
+    encode_cursor,
+    next_page_headers,
+    page_limit,
+    page_parser,
+)
+from src.api.stats import (  # isort:skip
+    GRANULARITIES,
+    book_stats_missing,
+    get_book_stats,
+    get_timeline,
+    year_range,
+)
 from src.api.crud import (  # isort:skip
-    get_all_books,
+    get_books_page,
     get_book_by_id,
-    get_book_by_title,
+    get_book_row,
+    get_book_rows,
+    get_book_updated_at,
+    search_books,
+    stream_books,
     add_book,
+    add_books,
     update_book,
+    patch_book,
+    patch_books,
+    count_books,
     delete_book,
+    delete_books,
 )
 
 books_ns = Namespace("books")
@@ -39,13 +83,250 @@ book = books_ns.model(
     },
 )
 
+# serializes Core rows exactly as marshalling Book objects with `book` would
+book_encoder = ModelEncoder(book)
+
+book_ids = books_ns.model(
+    "BookIds", {"ids": fields.List(fields.String, required=True, min_items=1)}
+)
+
+search_result = books_ns.model(
+    "BookSearchResult",
+    {
+        "book": fields.Nested(book),
+        "rank": fields.Float,
+        "snippet": fields.String,
+    },
+)
+
+book_stat = books_ns.model(
+    "BookStat",
+    {
+        "key": fields.String,
+        "books": fields.Integer,
+        "rated": fields.Integer,
+        "average_rating": fields.Float,
+    },
+)
+
+book_stats = books_ns.model(
+    "BookStats",
+    {
+        "books": fields.Integer,
+        "rated": fields.Integer,
+        "average_rating": fields.Float,
+        "by_status": fields.List(fields.Nested(book_stat)),
+        "by_genre": fields.List(fields.Nested(book_stat)),
+        "by_type_read": fields.List(fields.Nested(book_stat)),
+        "finished_by_month": fields.List(fields.Nested(book_stat)),
+    },
+)
+
+timeline_period = books_ns.model(
+    "TimelinePeriod",
+    {
+        "period": fields.DateTime,
+        "read": fields.Integer,
+        "added": fields.Integer,
+        "read_to_date": fields.Integer,
+        "streak": fields.Integer,
+        "goal_to_date": fields.Float,
+        "ahead_of_goal": fields.Float,
+    },
+)
+
+timeline = books_ns.model(
+    "Timeline",
+    {
+        "granularity": fields.String,
+        "year": fields.Integer,
+        "goal": fields.Integer,
+        "read": fields.Integer,
+        "added": fields.Integer,
+        "longest_streak": fields.Integer,
+        "current_streak": fields.Integer,
+        "periods": fields.List(fields.Nested(timeline_period)),
+    },
+)
+
+book_page_parser = add_fields_argument(page_parser())
+book_page_parser.add_argument(
+    "ids",
+    type=str,
+    location="args",
+    help="Comma-separated book ids; returns those books in that order, not a page",
+)
+book_fields_parser = add_fields_argument(reqparse.RequestParser())
+
+search_parser = page_parser()
+search_parser.add_argument(
+    "q", type=str, required=True, location="args", help="Search terms"
+)
+
+timeline_parser = reqparse.RequestParser()
+timeline_parser.add_argument(
+    "granularity", choices=GRANULARITIES, default="month", location="args"
+)
+timeline_parser.add_argument(
+    "year", type=int, location="args", help="Defaults to the current year"
+)
+timeline_parser.add_argument(
+    "goal", type=int, location="args", help="Books to read in the year"
+)
+
+book_filter_parser = reqparse.RequestParser()
+book_filter_parser.add_argument(
+    "status", choices=[status.value for status in ReadingStatus], location="args"
+)
+book_filter_parser.add_argument("genre", type=str, location="args")
+book_filter_parser.add_argument("author", type=str, location="args")
+book_filter_parser.add_argument(
+    "ids", type=str, location="args", help="Comma-separated book ids"
+)
+book_filter_parser.add_argument(
+    "dry_run",
+    type=inputs.boolean,
+    default=False,
+    location="args",
+    help="Only count the books that would change",
+)
+
+export_parser = reqparse.RequestParser()
+export_parser.add_argument(
+    "format", choices=tuple(EXPORT_FORMATS), default="ndjson", location="args"
+)
+
+
+def parse_ids(values):
+    """UUIDs of the book ids `values`; raises ValueError naming any invalid ones."""
+    ids = []
+    invalid = []
+    for value in values:
+        try:
+            ids.append(UUID(str(value).strip()))
+        except ValueError:
+            invalid.append(str(value))
+    if invalid:
+        raise ValueError(f"Invalid ids: {', '.join(invalid)}")
+    return ids
+
+
+def book_filter(args):
+    """The column values parsed `book_filter_parser` args select books by.
+
+    Raises ValueError for invalid ids or if no filter is given, so a bulk
+    write can't reach every book by accident.
+    """
+    where = {
+        column: args[column]
+        for column in ("genre", "author")
+        if args[column] is not None
+    }
+    if args["status"] is not None:
+        where["status"] = ReadingStatus(args["status"])
+    if args["ids"] is not None:
+        where["ids"] = parse_ids(args["ids"].split(","))
+    if not where:
+        raise ValueError("Give at least one of status, genre, author or ids.")
+    return where
+
+
+def _bulk_write_result(count, verb, dry_run):
+    if count is None:
+        max_rows = current_app.config["BULK_MAX_AFFECTED_ROWS"]
+        # 422 rather than 413: the request is small, what it would change isn't;
+        # and PATCH already answers 409 for a title that is taken
+        books_ns.abort(
+            HTTPStatus.UNPROCESSABLE_ENTITY,
+            f"Sorry. That would {verb} more than {max_rows} books; "
+            "narrow the filter.",
+        )
+    tense = "would be" if dry_run else "were"
+    response_object = {
+        "message": f"{count} books {tense} {verb}d.",
+        "count": count,
+        "dry_run": dry_run,
+    }
+    return response_object, HTTPStatus.OK
+
+
+def lookup_books(values, fields_value):
+    """Looks up the books with ids `values` in one query.
+
+    Returns one result per id, in request order: the book, or a not-found
+    marker. Raises ValueError, before any query, for invalid ids or fields.
+    """
+    max_ids = current_app.config["API_PAGE_SIZE_MAX"]
+    if len(values) > max_ids:
+        raise ValueError(f"At most {max_ids} ids can be looked up at once.")
+    ids = parse_ids(values)
+    names = requested_fields(fields_value, book)
+
+    rows = get_book_rows(set(ids), names or book_encoder.all_fields)
+    encode = book_encoder.get(names)
+    return [
+        (
+            {"id": str(book_id), "found": True, "book": encode(rows[book_id])}
+            if book_id in rows
+            else {"id": str(book_id), "found": False, "book": None}
+        )
+        for book_id in ids
+    ]
+
 
 class BookList(Resource):
 
-    @books_ns.marshal_with(book, as_list=True)
+    @books_ns.expect(book_page_parser)
+    @books_ns.response(HTTPStatus.OK, "Success", [book])
+    @books_ns.response(HTTPStatus.NOT_MODIFIED, "No book has changed")
+    @books_ns.response(HTTPStatus.BAD_REQUEST, "Invalid limit, cursor or fields")
+    @cached("books")
+    @reads_from_replica
     def get(self):
-        """Returns all books"""
-        return get_all_books(), HTTPStatus.OK
+        """Returns a page of books, oldest first.
+
+        Pass the X-Next-Cursor response header back as `cursor` for the next page,
+        and `fields` to return (and load) only some columns. With `ids`, returns
+        {"id", "found", "book"} for each of those books instead, in that order.
+        """
+        args = book_page_parser.parse_args()
+        if args["ids"] is not None:
+            try:
+                results = lookup_books(args["ids"].split(","), args["fields"])
+            except ValueError as e:
+                books_ns.abort(HTTPStatus.BAD_REQUEST, str(e))
+            return results, HTTPStatus.OK
+        try:
+            limit = page_limit(args["limit"])
+            after = None
+            if args["cursor"]:
+                date_added, book_id = decode_cursor(args["cursor"])
+                after = (datetime.fromisoformat(date_added), UUID(book_id))
+            names = requested_fields(args["fields"], book)
+        except ValueError as e:
+            books_ns.abort(HTTPStatus.BAD_REQUEST, str(e))
+
+        rows, has_more = get_books_page(limit, after, names or book_encoder.all_fields)
+
+        cursor = None
+        if has_more:
+            date_added, book_id = rows[-1][-2:]
+            cursor = encode_cursor(date_added, book_id)
+        # rows end with (updated_at, date_added, id); the next cursor is part of
+        # the page too, as it appears once a book is added after the last one
+        etag, last_modified = page_validators(
+            [(row[-1], row[-3]) for row in rows], limit, args["cursor"], names, cursor
+        )
+        # a delete doesn't move the latest updated_at, so only trust the ETag
+        if is_not_modified(etag):
+            return not_modified_response(etag, last_modified)
+
+        encode = book_encoder.get(names)
+        return (
+            [encode(row) for row in rows],
+            HTTPStatus.OK,
+            validator_headers(etag, last_modified) | next_page_headers(cursor),
+        )
 
     @books_ns.expect(book, validate=True)
     @books_ns.response(HTTPStatus.CREATED, "<title> was added!")
@@ -57,28 +338,355 @@ class BookList(Resource):
         author = post_data.get("author")
         response_object = {}
 
-        book = get_book_by_title(title)
-        if book:
+        if not add_book(title, author):
             response_object["message"] = "Sorry. That title already exists."
             return response_object, HTTPStatus.CONFLICT
 
-        add_book(title, author)
-
         response_object["message"] = f"{title} was added!"
         return response_object, HTTPStatus.CREATED
 
+    @books_ns.expect(book_filter_parser, book)
+    @books_ns.response(HTTPStatus.OK, "How many books were (or would be) updated")
+    @books_ns.response(HTTPStatus.BAD_REQUEST, "No filter, no fields or invalid value")
+    @books_ns.response(HTTPStatus.CONFLICT, "Sorry. That title already exists.")
+    @books_ns.response(
+        HTTPStatus.UNPROCESSABLE_ENTITY, "More than BULK_MAX_AFFECTED_ROWS books"
+    )
+    def patch(self):
+        """Updates the fields sent on every book matching the filter.
+
+        Runs as a single UPDATE; books the patch would leave unchanged are not
+        written or counted. If more than BULK_MAX_AFFECTED_ROWS books would
+        change, none is. With `dry_run`, only counts them.
+        """
+        args = book_filter_parser.parse_args()
+        max_rows = current_app.config["BULK_MAX_AFFECTED_ROWS"]
+        try:
+            where = book_filter(args)
+            values = patch_values(request.get_json(silent=True), BOOK_FIELDS)
+            if "title" in values and not values["title"]:
+                raise ValueError("title cannot be empty")
+            if args["dry_run"]:
+                count = count_books(where, values)
+                if count > max_rows:
+                    count = None
+            else:
+                count = patch_books(where, values, max_rows)
+        except ValueError as e:
+            books_ns.abort(HTTPStatus.BAD_REQUEST, str(e))
+
+        if count is False:
+            return {"message": "Sorry. That title already exists."}, HTTPStatus.CONFLICT
+        return _bulk_write_result(count, "update", args["dry_run"])
+
+    @books_ns.expect(book_filter_parser)
+    @books_ns.response(HTTPStatus.OK, "How many books were (or would be) removed")
+    @books_ns.response(HTTPStatus.BAD_REQUEST, "No filter or invalid ids")
+    @books_ns.response(
+        HTTPStatus.UNPROCESSABLE_ENTITY, "More than BULK_MAX_AFFECTED_ROWS books"
+    )
+    def delete(self):
+        """Removes every book matching the filter.
+
+        Runs as a single DELETE. If more than BULK_MAX_AFFECTED_ROWS books
+        match, none is removed. With `dry_run`, only counts them.
+        """
+        args = book_filter_parser.parse_args()
+        try:
+            where = book_filter(args)
+        except ValueError as e:
+            books_ns.abort(HTTPStatus.BAD_REQUEST, str(e))
+
+        max_rows = current_app.config["BULK_MAX_AFFECTED_ROWS"]
+        if args["dry_run"]:
+            count = count_books(where)
+            if count > max_rows:
+                count = None
+        else:
+            count = delete_books(where, max_rows)
+        return _bulk_write_result(count, "remove", args["dry_run"])
+
+
+class BookBulk(Resource):
+
+    @books_ns.response(HTTPStatus.OK, "Per-book results")
+    @books_ns.response(HTTPStatus.BAD_REQUEST, "Request body could not be read")
+    @books_ns.response(
+        HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Too many books in one request"
+    )
+    def post(self):
+        """Creates many books at once.
+
+        Takes a JSON array, or NDJSON with Content-Type application/x-ndjson.
+        Each book is reported as created, conflict (title already exists) or
+        invalid.
+        """
+        try:
+            items = parse_items(request.get_data(), request.mimetype)
+        except ValueError as e:
+            books_ns.abort(HTTPStatus.BAD_REQUEST, str(e))
+
+        max_batch_size = current_app.config["BULK_MAX_BATCH_SIZE"]
+        if len(items) > max_batch_size:
+            books_ns.abort(
+                HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                f"Sorry. At most {max_batch_size} books can be added at once.",
+            )
+
+        results = []
+        rows = []
+        for index, item in enumerate(items):
+            try:
+                row = book_row(item)
+            except ValueError as e:
+                results.append({"index": index, "status": "invalid", "message": str(e)})
+                continue
+            row["id"] = uuid4()
+            rows.append(row)
+            results.append({"index": index, "title": row["title"], "row": row})
+
+        created_ids = {row["id"] for row in add_books(rows)}
+
+        for result in results:
+            row = result.pop("row", None)
+            if row is None:
+                continue
+            if row["id"] in created_ids:
+                result.update(status="created", id=str(row["id"]))
+            else:
+                result.update(
+                    status="conflict", message="Sorry. That title already exists."
+                )
+
+        response_object = {
+            "message": f"{len(created_ids)} of {len(items)} books were added!",
+            "results": results,
+        }
+        return response_object, HTTPStatus.OK
+
+
+class BookLookup(Resource):
+
+    @books_ns.expect(book_ids, book_fields_parser, validate=True)
+    @books_ns.response(HTTPStatus.OK, "One result per id, in request order")
+    @books_ns.response(HTTPStatus.BAD_REQUEST, "Invalid ids or fields")
+    def post(self):
+        """Returns many books by id, like GET /api/books?ids=, for long id lists.
+
+        Each id gets {"id", "found", "book"}, in the order the ids were sent.
+        """
+        args = book_fields_parser.parse_args()
+        try:
+            results = lookup_books(request.get_json()["ids"], args["fields"])
+        except ValueError as e:
+            books_ns.abort(HTTPStatus.BAD_REQUEST, str(e))
+        return results, HTTPStatus.OK
+
+
+class BookSearch(Resource):
+
+    @books_ns.expect(search_parser)
+    @books_ns.response(HTTPStatus.BAD_REQUEST, "Invalid query, limit or cursor")
+    # outside marshal_with, so what is cached is the marshalled response
+    @cached("books")
+    @books_ns.marshal_with(search_result, as_list=True)
+    @reads_from_replica
+    def get(self):
+        """Searches title, author, genre and notes, best matches first.
+
+        Accepts web-style queries ("quoted phrases", -excluded, or). Pass the
+        X-Next-Cursor response header back as `cursor` for the next page.
+        """
+        args = search_parser.parse_args()
+        try:
+            limit = page_limit(args["limit"])
+            after = None
+            if args["cursor"]:
+                rank, book_id = decode_cursor(args["cursor"])
+                after = (float(rank), UUID(book_id))
+        except ValueError as e:
+            books_ns.abort(HTTPStatus.BAD_REQUEST, str(e))
+
+        rows, has_more = search_books(args["q"], limit, after)
+
+        cursor = None
+        if has_more:
+            last_book, last_rank, _ = rows[-1]
+            cursor = encode_cursor(last_rank, last_book.id)
+        results = [
+            {"book": book, "rank": rank, "snippet": snippet}
+            for book, rank, snippet in rows
+        ]
+        return results, HTTPStatus.OK, next_page_headers(cursor)
+
+
+def _stat(stat, key=None):
+    average = stat.rating_sum / stat.rating_count if stat.rating_count else None
+    return {
+        "key": key,
+        "books": stat.books,
+        "rated": stat.rating_count,
+        "average_rating": average,
+    }
+
+
+class BookStats(Resource):
+
+    @books_ns.response(
+        HTTPStatus.SERVICE_UNAVAILABLE, "The statistics have not been built yet"
+    )
+    @cached("books")
+    @books_ns.marshal_with(book_stats)
+    @reads_from_replica
+    def get(self):
+        """Returns book counts and average ratings by status, genre, type and month read.
+
+        Served from rollups that every write keeps up to date, so the cost does
+        not grow with the number of books. Books without a genre have a null key.
+        """
+        stats = get_book_stats()
+        if not stats["total"] and book_stats_missing():
+            books_ns.abort(
+                HTTPStatus.SERVICE_UNAVAILABLE,
+                "Book statistics have not been built; run flask rebuild_stats",
+            )
+        total = stats["total"][0] if stats["total"] else None
+        return {
+            **(_stat(total) if total else {"books": 0, "rated": 0}),
+            "by_status": [
+                _stat(stat, ReadingStatus[stat.key].value) for stat in stats["status"]
+            ],
+            "by_genre": [_stat(stat, stat.key or None) for stat in stats["genre"]],
+            "by_type_read": [
+                _stat(stat, BookType[stat.key].value) for stat in stats["type_read"]
+            ],
+            "finished_by_month": [
+                _stat(stat, stat.key) for stat in stats["month_read"]
+            ],
+        }
+
+
+class BookTimeline(Resource):
+
+    @books_ns.expect(timeline_parser)
+    @books_ns.response(HTTPStatus.OK, "Success", timeline)
+    @books_ns.response(HTTPStatus.BAD_REQUEST, "Invalid granularity, year or goal")
+    @reads_from_replica
+    def get(self):
+        """Returns books read and added per day, week or month of a year.
+
+        Each period also has the books read so far, the streak of consecutive
+        periods with a book read, and with a `goal` for the year, how far
+        ahead of (or behind) an even pace towards it that is. The current year
+        ends at the current period; past years are cached, as in @cached only
+        when read from the primary.
+        """
+        args = timeline_parser.parse_args()
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        year = args["year"] or now.year
+        goal = args["goal"]
+        if not 1 <= year < 9999 or (goal is not None and goal < 1):
+            books_ns.abort(HTTPStatus.BAD_REQUEST, "Invalid year or goal")
+
+        cache = None
+        if year < now.year and not client_reads_primary():
+            cache = current_app.extensions["timeline_cache"]
+            key = ("timeline", None, request.full_path)
+            entry = cache.get(key)
+            if entry is not None:
+                body, headers = entry
+                return Response(body, headers=headers)
+
+        rows = get_timeline(args["granularity"], *year_range(year, now), goal)
+        periods = [
+            {
+                **row._asdict(),
+                "ahead_of_goal": (
+                    None if goal is None else row.read_to_date - row.goal_to_date
+                ),
+            }
+            for row in rows
+        ]
+        response = self.api.make_response(
+            marshal(
+                {
+                    "granularity": args["granularity"],
+                    "year": year,
+                    "goal": goal,
+                    "read": periods[-1]["read_to_date"] if periods else 0,
+                    "added": sum(period["added"] for period in periods),
+                    "longest_streak": max((p["streak"] for p in periods), default=0),
+                    "current_streak": periods[-1]["streak"] if periods else 0,
+                    "periods": periods,
+                },
+                timeline,
+            ),
+            HTTPStatus.OK,
+        )
+        if cache is not None and not read_from_replica():
+            cache.set(key, response.get_data(), list(response.headers))
+        return response
+
+
+class BookExport(Resource):
+
+    @books_ns.expect(export_parser)
+    @books_ns.response(HTTPStatus.OK, "Streams every book as NDJSON or CSV")
+    def get(self):
+        """Exports the whole catalog.
+
+        Rows are streamed straight from the database and are not marshalled, so
+        memory use does not grow with the number of books.
+        """
+        args = export_parser.parse_args()
+        export_format = args["format"]
+        mimetype, lines = EXPORT_FORMATS[export_format]
+
+        columns = list(book.keys())
+        rows = stream_books(columns, current_app.config["EXPORT_BATCH_SIZE"])
+        return Response(
+            stream_with_context(lines(rows, columns)),
+            mimetype=mimetype,
+            headers={
+                "Content-Disposition": f"attachment; filename=books.{export_format}"
+            },
+        )
+
 
 class Books(Resource):
 
-    @books_ns.marshal_with(book)
-    @books_ns.response(HTTPStatus.OK, "Success")
+    @books_ns.expect(book_fields_parser)
+    @books_ns.response(HTTPStatus.OK, "Success", book)
+    @books_ns.response(HTTPStatus.NOT_MODIFIED, "Book has not changed")
+    @books_ns.response(HTTPStatus.BAD_REQUEST, "Invalid fields")
     @books_ns.response(HTTPStatus.NOT_FOUND, "Book <book_id> does not exist")
+    @cached("books", "book_id", UUID)
+    @reads_from_replica
     def get(self, book_id):
         """Returns a single book"""
-        book = get_book_by_id(book_id)
-        if not book:
+        args = book_fields_parser.parse_args()
+        try:
+            names = requested_fields(args["fields"], book)
+        except ValueError as e:
+            books_ns.abort(HTTPStatus.BAD_REQUEST, str(e))
+
+        if has_validators():
+            updated_at = get_book_updated_at(book_id)
+            etag = make_etag(book_id, updated_at, names)
+            if updated_at and is_not_modified(etag, updated_at):
+                return not_modified_response(etag, updated_at)
+
+        row = get_book_row(book_id, names or book_encoder.all_fields)
+        if not row:
             books_ns.abort(HTTPStatus.NOT_FOUND, f"Book {book_id} does not exist")
-        return book, HTTPStatus.OK
+
+        updated_at = row[-1]
+        etag = make_etag(book_id, updated_at, names)
+        return (
+            book_encoder.get(names)(row),
+            HTTPStatus.OK,
+            validator_headers(etag, updated_at),
+        )
 
     @books_ns.response(HTTPStatus.OK, "<book_id> was removed!")
     @books_ns.response(HTTPStatus.NOT_FOUND, "Book <book_id> does not exist")
@@ -110,16 +718,59 @@ class Books(Resource):
         if not book:
             books_ns.abort(HTTPStatus.NOT_FOUND, f"Book {book_id} does not exist")
 
-        if get_book_by_title(title):
+        updated = update_book(book, title, author)
+        if updated is None:
+            books_ns.abort(HTTPStatus.NOT_FOUND, f"Book {book_id} does not exist")
+        if not updated:
             response_object["message"] = "Sorry. That book already exists."
             return response_object, HTTPStatus.CONFLICT
 
-        update_book(book, title, author)
-
         response_object["message"] = f"{book.id} was updated!"  # type: ignore -- I think this is necessary because a NoneType should not be returned - if it were, we would catch it with the NOT_FOUND error. # noqa: E501
         return response_object, HTTPStatus.OK
 
+    @books_ns.expect(book)
+    @books_ns.response(HTTPStatus.OK, "The updated book", book)
+    @books_ns.response(HTTPStatus.BAD_REQUEST, "No fields or an invalid value")
+    @books_ns.response(HTTPStatus.NOT_FOUND, "Book <book_id> does not exist")
+    @books_ns.response(HTTPStatus.CONFLICT, "Sorry. That title already exists.")
+    def patch(self, book_id):
+        """Updates only the fields sent; null clears a field.
+
+        Any field but id can be changed, in a single statement. Returns the
+        updated book.
+        """
+        try:
+            book_uuid = UUID(book_id)
+        except ValueError:
+            books_ns.abort(HTTPStatus.NOT_FOUND, f"Book {book_id} does not exist")
+        try:
+            values = patch_values(request.get_json(silent=True), BOOK_FIELDS)
+            if "title" in values and not values["title"]:
+                raise ValueError("title cannot be empty")
+            row = patch_book(book_uuid, values, book_encoder.all_fields)
+        except ValueError as e:
+            books_ns.abort(HTTPStatus.BAD_REQUEST, str(e))
+
+        if row is None:
+            books_ns.abort(HTTPStatus.NOT_FOUND, f"Book {book_id} does not exist")
+        if row is False:
+            return {"message": "Sorry. That title already exists."}, HTTPStatus.CONFLICT
+
+        updated_at = row[-1]
+        etag = make_etag(book_id, updated_at, None)
+        return (
+            book_encoder.get(None)(row),
+            HTTPStatus.OK,
+            validator_headers(etag, updated_at),
+        )
+
 
 books_ns.add_resource(BookList, "")
+books_ns.add_resource(BookBulk, "/bulk")
+books_ns.add_resource(BookLookup, "/lookup")
+books_ns.add_resource(BookExport, "/export")
+books_ns.add_resource(BookSearch, "/search")
+books_ns.add_resource(BookStats, "/stats")
+books_ns.add_resource(BookTimeline, "/timeline")
 # TODO: I think that string: can be replaced with uuid:
 books_ns.add_resource(Books, "/<string:book_id>")
@@ -0,0 +1,122 @@
+# src/api/bulk.py
+
+import json
+from datetime import datetime
+
+from src.models.models import BookType, PriorityLevel, ReadingStatus
+
+
+def _text(value):
+    if not isinstance(value, str):
+        raise ValueError("must be a string")
+    return value
+
+
+def _rating(value):
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise ValueError("must be an integer")
+    if not 1 <= value <= 5:
+        raise ValueError("must be between 1 and 5")
+    return value
+
+
+def _datetime(value):
+    return datetime.fromisoformat(_text(value))
+
+
+# writable Book columns and how to convert their JSON values
+BOOK_FIELDS = {
+    "title": _text,
+    "author": _text,
+    "genre": _text,
+    "date_added": _datetime,
+    "priority": PriorityLevel,
+    "referred_by": _text,
+    "status": ReadingStatus,
+    "category": _text,
+    "notes": _text,
+    "type_read": BookType,
+    "rating": _rating,
+    "date_read": _datetime,
+}
+
+# writable User columns, for partial updates
+USER_FIELDS = {
+    "username": _text,
+    "email": _text,
+}
+
+
+def parse_items(body, mimetype):
+    """Splits a bulk request body into its items.
+
+    Accepts a JSON array or NDJSON (one object per line). An NDJSON line that
+    is not valid JSON is kept as a ValueError so it can be reported per item.
+    Raises ValueError if the body as a whole cannot be read.
+    """
+    if mimetype == "application/x-ndjson":
+        items = []
+        for line in body.decode().splitlines():
+            if not line.strip():
+                continue
+            try:
+                items.append(json.loads(line))
+            except ValueError as e:
+                items.append(ValueError(f"invalid JSON: {e}"))
+        return items
+
+    items = json.loads(body)
+    if not isinstance(items, list):
+        raise ValueError("Expected a JSON array of books.")
+    return items
+
+
+def book_row(item):
+    """Converts one bulk item to Book column values.
+
+    Unknown keys are ignored, like the single-book endpoint does, and nulls
+    are dropped so column defaults apply. Raises ValueError if the item is
+    not a valid book.
+    """
+    if isinstance(item, ValueError):
+        raise item
+    if not isinstance(item, dict):
+        raise ValueError("each book must be a JSON object")
+    if not item.get("title"):
+        raise ValueError("title is required")
+
+    row = {}
+    for field, convert in BOOK_FIELDS.items():
+        if item.get(field) is None:
+            continue
+        try:
+            row[field] = convert(item[field])
+        except ValueError as e:
+            raise ValueError(f"{field}: {e}") from e
+    return row
+
+
+def patch_values(item, fields):
+    """Converts a partial update to column values for the `fields` it contains.
+
+    Only the fields present are returned, and null sets a field to null;
+    unknown keys are ignored. Raises ValueError if no field is given or a
+    value is invalid.
+    """
+    if not isinstance(item, dict):
+        raise ValueError("Expected a JSON object.")
+
+    values = {}
+    for field, convert in fields.items():
+        if field not in item:
+            continue
+        if item[field] is None:
+            values[field] = None
+            continue
+        try:
+            values[field] = convert(item[field])
+        except ValueError as e:
+            raise ValueError(f"{field}: {e}") from e
+    if not values:
+        raise ValueError(f"Nothing to update; expected any of {', '.join(fields)}.")
+    return values
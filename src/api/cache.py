@@ -0,0 +1,197 @@
+# src/api/cache.py
+
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import Response, current_app, request
+from flask_restx import Namespace, Resource
+from flask_restx.utils import unpack
+
+from src.replica import client_reads_primary, read_from_replica
+
+cache_namespace = Namespace("cache")
+
+
+class ResponseCache:
+    """An LRU cache of serialized responses, bounded by age and total body size.
+
+    Keys are (group, item_id, full_path). Lists use an item_id of None, so a
+    write to one item can drop that item's entries plus every cached list of
+    its group. The cache is per process: other gunicorn workers only see a
+    write once their own entries expire.
+    """
+
+    def __init__(self, ttl, max_bytes, clock=time.monotonic):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.clock = clock
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, body, headers = entry
+            if expires_at <= self.clock():
+                self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return body, headers
+
+    def set(self, key, body, headers):
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (self.clock() + self.ttl, body, headers)
+            self.size += len(body)
+            while self.size > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def invalidate(self, group, item_id=None):
+        """Drops a group's lists and, if item_id is given, that item's entries.
+
+        Without an item_id every entry of the group is dropped.
+        """
+        with self._lock:
+            stale = [
+                key
+                for key in self._entries
+                if key[0] == group
+                and (item_id is None or key[1] is None or key[1] == item_id)
+            ]
+            for key in stale:
+                self._remove(key)
+            self.invalidations += len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+    def _remove(self, key):
+        _, body, _ = self._entries.pop(key)
+        self.size -= len(body)
+
+
+def init_cache(app):
+    app.extensions["response_cache"] = ResponseCache(
+        ttl=app.config["RESPONSE_CACHE_TTL"],
+        max_bytes=app.config["RESPONSE_CACHE_MAX_BYTES"],
+    )
+    # rendered HTML fragments, keyed by the version of what they show, so
+    # they never need invalidating; see src/views/books.py
+    app.extensions["fragment_cache"] = ResponseCache(
+        ttl=app.config["FRAGMENT_CACHE_TTL"],
+        max_bytes=app.config["FRAGMENT_CACHE_MAX_BYTES"],
+    )
+    # timelines of past years, cleared by writes to them; see src/api/stats.py
+    app.extensions["timeline_cache"] = ResponseCache(
+        ttl=app.config["TIMELINE_CACHE_TTL"],
+        max_bytes=app.config["TIMELINE_CACHE_MAX_BYTES"],
+    )
+
+
+def _cache():
+    if not current_app.config.get("RESPONSE_CACHE_ENABLED"):
+        return None
+    return current_app.extensions.get("response_cache")
+
+
+def invalidate(group, item_id=None):
+    """Called by the crud layer after a write to `group` (and `item_id`)."""
+    cache = current_app.extensions.get("response_cache")
+    if cache is not None:
+        cache.invalidate(group, None if item_id is None else str(item_id))
+
+
+def cached(group, id_arg=None, id_type=str):
+    """Caches successful responses of a flask-restx GET method.
+
+    `id_arg` names the URL argument identifying a single item; it is
+    normalized with `id_type` so it matches the ids the crud layer invalidates.
+
+    With a read replica, only responses read from the primary are cached: a
+    lagging replica could otherwise put a body from before a write back into
+    the cache right after the write invalidated it. A client that has just
+    written skips the cache, as it skips the replica, to see its own writes.
+    """
+
+    def decorator(f):
+        @wraps(f)
+        def wrapper(resource, *args, **kwargs):
+            cache = _cache()
+            if cache is None or client_reads_primary():
+                return f(resource, *args, **kwargs)
+
+            item_id = None
+            if id_arg is not None:
+                try:
+                    item_id = str(id_type(kwargs[id_arg]))
+                except ValueError:
+                    return f(resource, *args, **kwargs)
+            key = (group, item_id, request.full_path)
+
+            entry = cache.get(key)
+            if entry is None:
+                response = f(resource, *args, **kwargs)
+                if not isinstance(response, Response):
+                    data, code, headers = unpack(response)
+                    response = resource.api.make_response(data, code, headers=headers)
+                if response.status_code == 200 and not read_from_replica():
+                    cache.set(key, response.get_data(), list(response.headers))
+                return response
+
+            body, headers = entry
+            response = Response(body, headers=headers)
+            if request.if_none_match and response.headers.get("ETag"):
+                # the cached ETag is as current as the cached body
+                response = response.make_conditional(request)
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+class CacheStats(Resource):
+    def get(self):
+        """Returns response cache counters for this worker process"""
+        cache = current_app.extensions.get("response_cache")
+        stats = cache.stats() if cache is not None else {}
+        stats["enabled"] = bool(current_app.config.get("RESPONSE_CACHE_ENABLED"))
+        for name in ("fragment", "timeline"):
+            extra = current_app.extensions.get(f"{name}_cache")
+            if extra is not None:
+                stats[f"{name}s"] = extra.stats()
+        return stats
+
+
+cache_namespace.add_resource(CacheStats, "")
@@ -0,0 +1,58 @@
+# src/api/conditional.py
+
+import hashlib
+from datetime import timezone
+
+from flask import Response, request
+from werkzeug.http import http_date, quote_etag
+
+
+def make_etag(*parts):
+    """A strong ETag for the representation identified by `parts`."""
+    return hashlib.sha256(repr(parts).encode()).hexdigest()[:32]
+
+
+def page_validators(versions, *parts):
+    """ETag and Last-Modified of a page of a list, from the page alone.
+
+    `versions` are the (id, updated_at) of the rows on the page and `parts`
+    whatever else the page depends on (size, cursors, fields). Any change to
+    the page's rows changes the ETag, so a conditional GET costs no more than
+    the page query; Last-Modified can't see deletes, so don't trust it alone.
+    """
+    last_modified = max((updated_at for _, updated_at in versions), default=None)
+    return make_etag(*parts, versions), last_modified
+
+
+def has_validators():
+    return bool(request.if_none_match or request.if_modified_since)
+
+
+def _utc(value):
+    # timestamps are stored without a time zone and are UTC
+    return value.replace(tzinfo=timezone.utc, microsecond=0)
+
+
+def is_not_modified(etag, last_modified=None):
+    """Checks If-None-Match, or failing that If-Modified-Since, against a resource.
+
+    Pass `last_modified=None` where a timestamp cannot see every change (e.g.
+    deletes from a list), so only the ETag is trusted.
+    """
+    if request.if_none_match:
+        # If-None-Match compares weakly; compressed responses carry weak ETags
+        return request.if_none_match.contains_weak(etag)
+    if request.if_modified_since and last_modified is not None:
+        return _utc(last_modified) <= request.if_modified_since
+    return False
+
+
+def validator_headers(etag, last_modified=None):
+    headers = {"ETag": quote_etag(etag), "Cache-Control": "no-cache"}
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(_utc(last_modified))
+    return headers
+
+
+def not_modified_response(etag, last_modified=None):
+    return Response(status=304, headers=validator_headers(etag, last_modified))
@@ -1,69 +1,488 @@
 # src/api/crud.py
 
+from collections import defaultdict
+
+from psycopg2.errors import UniqueViolation
+from sqlalchemy.dialects.postgresql import ARRAY, UUID, insert
+from sqlalchemy.exc import DataError, IntegrityError
+from sqlalchemy.orm import undefer
 
 from src import db
+from src.api.cache import invalidate
+from src.api.stats import STAT_COLUMNS, book_state, record_book_changes
 from src.models.models import Book, User
 
+from sqlalchemy import (  # isort:skip
+    Float,
+    and_,
+    any_,
+    bindparam,
+    delete,
+    func,
+    or_,
+    select,
+    tuple_,
+    update,
+)
+
+
+def _commit_unless_duplicate():
+    """Commits the session, or rolls it back and returns False on a unique violation."""
+    try:
+        db.session.commit()
+    except IntegrityError as e:
+        db.session.rollback()
+        if isinstance(e.orig, UniqueViolation):
+            return False
+        raise
+    return True
+
+
+def _execute_unless_duplicate(statement):
+    """Executes a write statement and returns the rows it returned.
+
+    On a unique violation the session is rolled back and False is returned;
+    on any other constraint violation or invalid value it is rolled back and
+    ValueError is raised with the database's message.
+    """
+    try:
+        return db.session.execute(statement).all()
+    except (IntegrityError, DataError) as e:
+        db.session.rollback()
+        if isinstance(e.orig, UniqueViolation):
+            return False
+        raise ValueError(e.orig.diag.message_primary) from e
+
+
+def _columns(model, names, *keys):
+    """Table columns for `names`, then labelled `keys` columns the caller needs.
+
+    The labels keep a key column from being merged with a requested one, so
+    rows always hold len(names) + len(keys) values.
+    """
+    table = model.__table__
+    return [table.c[name] for name in names] + [
+        table.c[key].label(f"_{key}") for key in keys
+    ]
 
-def get_all_users():
-    return User.query.all()
+
+def get_users_page(limit, after_id=None, columns=()):
+    """Returns up to `limit` user rows ordered by id, and whether more follow.
+
+    Rows are plain tuples of `columns` followed by the user's updated_at and
+    id; no ORM objects are built.
+    """
+    statement = select(*_columns(User, columns, "updated_at", "id"))
+    statement = statement.order_by(User.id)
+    if after_id is not None:
+        statement = statement.where(User.id > after_id)
+    rows = db.session.execute(statement.limit(limit + 1)).all()
+    return rows[:limit], len(rows) > limit
+
+
+def get_user_row(user_id, columns=()):
+    """A tuple of the user's `columns` followed by its updated_at, or None."""
+    statement = select(*_columns(User, columns, "updated_at"))
+    return db.session.execute(statement.where(User.id == user_id)).first()
 
 
 def get_user_by_id(user_id):
     return User.query.filter_by(id=user_id).first()
 
 
-def get_user_by_email(email):
-    return User.query.filter_by(email=email).first()
+def get_user_updated_at(user_id):
+    return db.session.scalar(select(User.updated_at).where(User.id == user_id))
 
 
 def add_user(username, email):
-    user = User(username=username, email=email)
-    db.session.add(user)
+    """Returns the new user, or None if the email (in any case) is already taken."""
+    statement = (
+        insert(User)
+        .values(username=username, email=email)
+        .on_conflict_do_nothing(index_elements=[func.lower(User.email)])
+        .returning(User)
+    )
+    user = db.session.scalars(statement).first()
     db.session.commit()
+    invalidate("users")
     return user
 
 
 def update_user(user, username, email):
+    """Returns None, leaving the user unchanged, if the email is already taken."""
     user.username = username
     user.email = email
-    db.session.commit()
+    if not _commit_unless_duplicate():
+        return None
+    invalidate("users", user.id)
     return user
 
 
+def patch_user(user_id, values, columns=()):
+    """Sets only the given column `values` of a user, in one UPDATE ... RETURNING.
+
+    Returns a tuple of the user's `columns` followed by its updated_at, like
+    get_user_row, or None if there is no such user. Returns False, leaving the
+    user unchanged, if the email is already taken; raises ValueError if a
+    value breaks another constraint.
+    """
+    table = User.__table__
+    statement = (
+        update(table)
+        .where(table.c.id == user_id)
+        .values(values)
+        .returning(*_columns(User, columns, "updated_at"))
+    )
+    rows = _execute_unless_duplicate(statement)
+    if rows is False:
+        return False
+    db.session.commit()
+    if not rows:
+        return None
+    invalidate("users", user_id)
+    return rows[0]
+
+
 def delete_user(user):
     db.session.delete(user)
     db.session.commit()
+    invalidate("users", user.id)
     return user
 
 
-def get_all_books():
-    return Book.query.all()
+def get_books_page(limit, after=None, columns=()):
+    """Returns up to `limit` book rows in (date_added, id) order, and whether more follow.
+
+    Rows are plain tuples of `columns` followed by the book's updated_at,
+    date_added and id; no ORM objects are built. `after` is the (date_added,
+    id) key of the last book on the previous page.
+    """
+    statement = select(*_columns(Book, columns, "updated_at", "date_added", "id"))
+    statement = statement.order_by(Book.date_added, Book.id)
+    if after is not None:
+        statement = statement.where(tuple_(Book.date_added, Book.id) > tuple_(*after))
+    rows = db.session.execute(statement.limit(limit + 1)).all()
+    return rows[:limit], len(rows) > limit
+
+
+def stream_books(columns, batch_size):
+    """Yields book rows as mappings without building ORM objects.
+
+    Rows are pulled `batch_size` at a time from a server-side cursor, so memory
+    stays flat regardless of the size of the table.
+    """
+    table = Book.__table__
+    statement = select(*[table.c[column] for column in columns]).order_by(
+        table.c.date_added, table.c.id
+    )
+    result = db.session.execute(statement, execution_options={"yield_per": batch_size})
+    yield from result.mappings()
+
+
+def _html_escaped(text):
+    # the replacements markupsafe.escape makes, so the <mark> tags are the only
+    # markup in a snippet
+    for char, entity in (
+        ("&", "&amp;"),
+        ("<", "&lt;"),
+        (">", "&gt;"),
+        ('"', "&#34;"),
+        ("'", "&#39;"),
+    ):
+        text = func.replace(text, char, entity)
+    return text
+
+
+def search_books(text, limit, after=None):
+    """Full-text search over title, author, genre and notes.
+
+    Returns up to `limit` (book, rank, snippet) rows, best match first, and
+    whether more follow. `after` is the (rank, id) of the last row on the
+    previous page. Snippets are HTML: notes, escaped, with matches in <mark>
+    tags.
+    """
+    query = func.websearch_to_tsquery("english", text)
+    # double precision so the rank survives a round trip through the cursor
+    rank = func.ts_rank(Book.search_vector, query).cast(Float)
+    snippet = func.ts_headline(
+        "english",
+        _html_escaped(func.coalesce(Book.notes, "")),
+        query,
+        "StartSel=<mark>, StopSel=</mark>, MaxFragments=2",
+    )
+
+    statement = (
+        select(Book, rank, snippet)
+        .options(undefer(Book.notes))
+        .where(Book.search_vector.op("@@")(query))
+        .order_by(rank.desc(), Book.id)
+        .limit(limit + 1)
+    )
+    if after is not None:
+        after_rank, after_id = after
+        statement = statement.where(
+            or_(rank < after_rank, and_(rank == after_rank, Book.id > after_id))
+        )
+    rows = db.session.execute(statement).all()
+    return rows[:limit], len(rows) > limit
+
+
+def get_book_row(book_id, columns=()):
+    """A tuple of the book's `columns` followed by its updated_at, or None."""
+    statement = select(*_columns(Book, columns, "updated_at"))
+    return db.session.execute(statement.where(Book.id == book_id)).first()
+
+
+def get_book_rows(book_ids, columns=()):
+    """Tuples of the books' `columns` followed by their id, keyed by id.
+
+    The ids go in as one array parameter to `id = ANY(...)`, so the statement
+    is the same however many ids there are. Missing ids have no entry.
+    """
+    ids = bindparam("ids", list(book_ids), ARRAY(UUID(as_uuid=True)))
+    statement = select(*_columns(Book, columns, "id")).where(Book.id == any_(ids))
+    return {row[-1]: row for row in db.session.execute(statement)}
 
 
 def get_book_by_id(book_id):
     return Book.query.filter_by(id=book_id).first()
 
 
-def get_book_by_title(title):
-    return Book.query.filter_by(title=title).first()
+def get_book_updated_at(book_id):
+    return db.session.scalar(select(Book.updated_at).where(Book.id == book_id))
 
 
 def add_book(title, author):
-    book = Book(title=title, author=author)
-    db.session.add(book)
+    """Returns the new book, or None if the title is already taken."""
+    statement = (
+        insert(Book)
+        .values(title=title, author=author)
+        .on_conflict_do_nothing(index_elements=[Book.title])
+        .returning(Book)
+    )
+    book = db.session.scalars(statement).first()
+    if book is not None:
+        record_book_changes([(None, book_state(book))])
     db.session.commit()
+    invalidate("books")
     return book
 
 
+def add_books(rows):
+    """Adds many books in a single transaction, skipping titles that already exist.
+
+    Rows go in as multi-row INSERT ... ON CONFLICT DO NOTHING statements, so
+    existing titles are detected by the unique index in the same round trip.
+    Every row needs an `id`. Returns the rows that were inserted.
+    """
+    # only the first of several rows with the same title is attempted
+    titles = set()
+    candidates = []
+    for row in rows:
+        if row["title"] in titles:
+            continue
+        titles.add(row["title"])
+        candidates.append(row)
+
+    # rows must share the same columns to go in one statement; absent columns
+    # get their model defaults
+    by_columns = defaultdict(list)
+    for row in candidates:
+        by_columns[frozenset(row)].append(row)
+
+    table = Book.__table__
+    statement = (
+        insert(table)
+        .on_conflict_do_nothing(index_elements=[table.c.title])
+        .returning(table.c.id, *[table.c[column] for column in STAT_COLUMNS])
+    )
+    inserted = []
+    for batch in by_columns.values():
+        inserted.extend(db.session.execute(statement, batch))
+    inserted_ids = {row.id for row in inserted}
+
+    record_book_changes([(None, book_state(row)) for row in inserted])
+    db.session.commit()
+    invalidate("books")
+    return [row for row in candidates if row["id"] in inserted_ids]
+
+
 def update_book(book, title, author):
-    book.title = title
-    book.author = author
+    """Returns None if the book has been deleted meanwhile, and False, leaving
+    the book unchanged, if the title is already taken.
+
+    The write goes through patch_book, which locks the row and reads the
+    values it replaces, so concurrent writes can't skew the statistics.
+    """
+    row = patch_book(book.id, {"title": title, "author": author})
+    if not row:
+        return row
+    return book
+
+
+def _returning_old_and_new(table, old):
+    # the counted values before and after an UPDATE, see _old_and_new
+    return [
+        *[table.c[column].label(f"new_{column}") for column in STAT_COLUMNS],
+        *[old.c[column].label(f"old_{column}") for column in STAT_COLUMNS],
+    ]
+
+
+def _old_and_new(row):
+    return tuple(
+        {column: row._mapping[f"{side}_{column}"] for column in STAT_COLUMNS}
+        for side in ("old", "new")
+    )
+
+
+def patch_book(book_id, values, columns=()):
+    """Sets only the given column `values` of a book, in one UPDATE ... RETURNING.
+
+    Returns a tuple of the book's `columns` followed by its updated_at, like
+    get_book_row, or None if there is no such book. Returns False, leaving the
+    book unchanged, if the title is already taken; raises ValueError if a
+    value breaks another constraint.
+
+    The counted values the book had are read, locked, by the same statement,
+    so the statistics record exactly the change it made.
+    """
+    table = Book.__table__
+    old = (
+        select(table.c.id, *[table.c[column] for column in STAT_COLUMNS])
+        .where(table.c.id == book_id)
+        .with_for_update()
+        .cte("locked")
+    )
+    returned = _columns(Book, columns, "updated_at")
+    statement = (
+        update(table)
+        .where(table.c.id == old.c.id)
+        .values(values)
+        .returning(*returned, *_returning_old_and_new(table, old))
+    )
+    rows = _execute_unless_duplicate(statement)
+    if rows is False:
+        return False
+    if not rows:
+        db.session.commit()
+        return None
+
+    record_book_changes([_old_and_new(rows[0])])
+    db.session.commit()
+    invalidate("books", book_id)
+    return rows[0][: len(returned)]
+
+
+def _book_filter(where):
+    """Conditions for books whose columns equal the values in `where`; an "ids"
+    list matches any of those ids, as one array parameter."""
+    table = Book.__table__
+    conditions = []
+    for column, value in where.items():
+        if column == "ids":
+            ids = bindparam("ids", list(value), ARRAY(UUID(as_uuid=True)))
+            conditions.append(table.c.id == any_(ids))
+        else:
+            conditions.append(table.c[column] == value)
+    return conditions
+
+
+def _changed_by(values):
+    # rows the patch would leave as they are aren't written, so their
+    # updated_at doesn't move and they aren't counted
+    table = Book.__table__
+    return or_(
+        *[table.c[column].is_distinct_from(value) for column, value in values.items()]
+    )
+
+
+def count_books(where, values=None):
+    """The number of books matching `where`, or that patching them with
+    `values` would change."""
+    statement = select(func.count()).select_from(Book).where(*_book_filter(where))
+    if values is not None:
+        statement = statement.where(_changed_by(values))
+    return db.session.scalar(statement)
+
+
+def _locked_books(where, limit):
+    # at most limit + 1 rows are locked and written, enough to tell that
+    # there are too many without touching all of them
+    table = Book.__table__
+    return (
+        select(table.c.id, *[table.c[column] for column in STAT_COLUMNS])
+        .where(*where)
+        .order_by(table.c.id)
+        .limit(limit + 1)
+        .with_for_update()
+        .cte("locked")
+    )
+
+
+def _apply_to_books(statement, limit, changes):
+    """Runs a set-based write returning counted values, and commits.
+
+    Returns the number of books written, or None, rolling back, if that is
+    more than `limit`; False and ValueError as _execute_unless_duplicate.
+    `changes` turns a returned row into a (before, after) stats change.
+    """
+    rows = _execute_unless_duplicate(statement)
+    if rows is False:
+        return False
+    if len(rows) > limit:
+        db.session.rollback()
+        return None
+    record_book_changes([changes(row) for row in rows])
     db.session.commit()
+    if rows:
+        invalidate("books")
+    return len(rows)
+
+
+def patch_books(where, values, limit):
+    """Sets the column `values` of every book matching `where`, in one UPDATE.
+
+    Only books the patch changes are written. Returns how many were, or None,
+    leaving every book unchanged, if that would be more than `limit`. Returns
+    False if the patch would give two books the same title; raises ValueError
+    if a value breaks another constraint.
+    """
+    table = Book.__table__
+    locked = _locked_books([*_book_filter(where), _changed_by(values)], limit)
+    statement = (
+        update(table)
+        .where(table.c.id == locked.c.id)
+        .values(values)
+        .returning(*_returning_old_and_new(table, locked))
+    )
+    return _apply_to_books(statement, limit, _old_and_new)
+
+
+def delete_books(where, limit):
+    """Deletes every book matching `where`, in one DELETE.
+
+    Returns how many were deleted, or None, deleting nothing, if that would
+    be more than `limit`.
+    """
+    table = Book.__table__
+    locked = _locked_books(_book_filter(where), limit)
+    statement = (
+        delete(table)
+        .where(table.c.id == locked.c.id)
+        .returning(*[locked.c[column] for column in STAT_COLUMNS])
+    )
+    return _apply_to_books(statement, limit, lambda row: (book_state(row), None))
+
+
+def set_book_status(book, status):
+    """Returns None if the book has been deleted meanwhile."""
+    if patch_book(book.id, {"status": status}) is None:
+        return None
     return book
 
 
 def delete_book(book):
-    db.session.delete(book)
-    db.session.commit()
+    # detached first, so the caller can still read it once the row is gone
+    db.session.expunge(book)
+    delete_books({"ids": [book.id]}, 1)
     return book
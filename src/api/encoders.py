@@ -0,0 +1,68 @@
+# src/api/encoders.py
+
+from flask_restx import fields
+
+
+def _iso8601(value):
+    return value.isoformat()
+
+
+def _converter(field):
+    """The cheapest function giving the same value as `field.format`."""
+    if isinstance(field, type):
+        # models may hold field classes, which marshal instantiates too
+        field = field()
+    if isinstance(field, fields.DateTime) and field.dt_format == "iso8601":
+        return _iso8601
+    if isinstance(field, fields.String):
+        return str
+    if isinstance(field, fields.Integer):
+        return int
+    if isinstance(field, fields.Float):
+        return float
+    return field.format
+
+
+def row_encoder(model, names=None):
+    """Builds a function turning a row tuple into what `marshal` would return.
+
+    The row holds the values of `names` (default: every field of `model`) in
+    that order; any trailing values are ignored. Only flat models with no
+    defaults are supported, which is all the book and user models need.
+    """
+    names = list(model) if names is None else names
+    converters = [_converter(model[name]) for name in names]
+
+    def encode(row):
+        return dict(
+            zip(
+                names,
+                [
+                    None if value is None else convert(value)
+                    for convert, value in zip(converters, row)
+                ],
+            )
+        )
+
+    return encode
+
+
+class ModelEncoder:
+    """Row encoders for one model, compiled once per requested set of fields."""
+
+    max_variants = 64
+
+    def __init__(self, model):
+        self.model = model
+        self.all_fields = list(model)
+        self._encoders = {}
+
+    def get(self, names=None):
+        key = tuple(self.all_fields if names is None else names)
+        encode = self._encoders.get(key)
+        if encode is None:
+            encode = row_encoder(self.model, list(key))
+            # ?fields= is client controlled, so don't keep every permutation
+            if len(self._encoders) < self.max_variants:
+                self._encoders[key] = encode
+        return encode
@@ -0,0 +1,48 @@
+# src/api/export.py
+
+import csv
+import io
+import json
+from datetime import datetime
+from enum import Enum
+from uuid import UUID
+
+
+def export_value(value):
+    """Converts a column value to its JSON/CSV representation."""
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, UUID):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def ndjson_lines(rows, columns):
+    for row in rows:
+        record = {column: export_value(row[column]) for column in columns}
+        yield json.dumps(record) + "\n"
+
+
+def csv_lines(rows, columns):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def flush():
+        line = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return line
+
+    writer.writerow(columns)
+    yield flush()
+    for row in rows:
+        writer.writerow([export_value(row[column]) for column in columns])
+        yield flush()
+
+
+EXPORT_FORMATS = {
+    "ndjson": ("application/x-ndjson", ndjson_lines),
+    "csv": ("text/csv", csv_lines),
+}
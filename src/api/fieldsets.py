@@ -0,0 +1,26 @@
+# src/api/fieldsets.py
+
+
+def add_fields_argument(parser):
+    parser.add_argument(
+        "fields",
+        type=str,
+        location="args",
+        help="Comma-separated fields to return, e.g. title,author,status",
+    )
+    return parser
+
+
+def requested_fields(value, model):
+    """Returns the field names asked for in `?fields=`, or None for all of them.
+
+    Raises ValueError if a name is not a field of `model`.
+    """
+    names = [name.strip() for name in (value or "").split(",") if name.strip()]
+    if not names:
+        return None
+    names = list(dict.fromkeys(names))
+    unknown = [name for name in names if name not in model]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return names
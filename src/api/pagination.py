@@ -0,0 +1,56 @@
+# src/api/pagination.py
+
+import base64
+import json
+
+from flask import current_app
+from flask_restx import reqparse
+
+
+def page_parser():
+    parser = reqparse.RequestParser()
+    parser.add_argument("limit", type=int, location="args", help="Page size")
+    parser.add_argument(
+        "cursor", type=str, location="args", help="Opaque cursor from X-Next-Cursor"
+    )
+    return parser
+
+
+def page_limit(limit):
+    """Clamps a requested page size to the configured bounds.
+
+    Unpaged requests get API_PAGE_SIZE_DEFAULT rows rather than the whole table.
+    """
+    if limit is None:
+        return current_app.config["API_PAGE_SIZE_DEFAULT"]
+    if limit < 1:
+        raise ValueError("limit must be a positive integer")
+    return min(limit, current_app.config["API_PAGE_SIZE_MAX"])
+
+
+def encode_cursor(*values):
+    raw = json.dumps([str(value) for value in values]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Returns the list of key values stored in a cursor.
+
+    Raises ValueError if the cursor was not produced by encode_cursor.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError) as e:
+        raise ValueError("invalid cursor") from e
+    # encode_cursor only stores strings; callers parse each one
+    if not isinstance(values, list) or not all(isinstance(v, str) for v in values):
+        raise ValueError("invalid cursor")
+    return values
+
+
+def next_page_headers(cursor):
+    """Headers advertising the next page, if there is one."""
+    if cursor is None:
+        return {}
+    return {"X-Next-Cursor": cursor}
@@ -0,0 +1,60 @@
+# src/api/spec.py
+"""The Swagger spec at /swagger.json, built once and served with an ETag.
+
+flask-restx builds the spec on the first request for it by walking every
+namespace and model. `write_spec` (flask build_spec) does that at build time
+into SWAGGER_SPEC_FILE, and an app that finds the file serves it as is.
+Without the file the spec is built on the first request, as before, and kept
+as encoded bytes.
+"""
+
+import hashlib
+import json
+import os
+
+from flask import Response, current_app
+
+from src.api import api
+
+from src.api.conditional import (  # isort:skip
+    is_not_modified,
+    not_modified_response,
+    validator_headers,
+)
+
+
+def _etag(body):
+    return hashlib.sha256(body).hexdigest()[:32]
+
+
+def _encode(spec):
+    body = json.dumps(spec, sort_keys=True).encode()
+    return body, _etag(body)
+
+
+def write_spec(app, path):
+    """Builds the spec of `app` and writes it to `path`."""
+    with app.test_request_context():
+        body, _ = _encode(api.__schema__)
+    with open(path, "wb") as f:
+        f.write(body)
+
+
+def serve_spec():
+    spec = current_app.extensions.get("swagger_spec")
+    if spec is None:
+        spec = current_app.extensions["swagger_spec"] = _encode(api.__schema__)
+    body, etag = spec
+    if is_not_modified(etag):
+        return not_modified_response(etag)
+    return Response(body, mimetype="application/json", headers=validator_headers(etag))
+
+
+def init_spec(app):
+    """Replaces flask-restx's spec view; call after `api.init_app`."""
+    path = app.config.get("SWAGGER_SPEC_FILE")
+    if path and os.path.isfile(path):
+        with open(path, "rb") as f:
+            body = f.read()
+        app.extensions["swagger_spec"] = (body, _etag(body))
+    app.view_functions["specs"] = serve_spec
@@ -0,0 +1,280 @@
+# src/api/stats.py
+"""Reading statistics kept in the book_stats rollup table.
+
+Every book counts once in each of a few (dimension, key) rows: the total,
+its status, genre and type_read, and the month of its date_read. Each row
+holds the number of books and the sum and count of their ratings, so an
+average is one division. The crud layer passes every change to a book's
+counted columns to `record_book_changes` in the write's own transaction,
+so reading the statistics costs the same however many books there are.
+`rebuild_book_stats` (flask rebuild_stats) recomputes them from the books.
+
+A database whose books predate book_stats has no rollups, and writes would
+then apply their changes to zeroes. entrypoint.sh runs `ensure_book_stats`
+(flask ensure_stats) before starting the app, which rebuilds them if books
+exist but no total row does; until then /api/books/stats answers 503.
+
+`get_timeline` counts books read and added per day, week or month of a year
+straight from the books table. Past years are kept in the timeline cache;
+a write that touches a date in a past year clears it once it commits. The
+cache is per process, so other workers can serve a past year's timeline up
+to TIMELINE_CACHE_TTL seconds old, like the response cache.
+"""
+
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+
+from flask import current_app
+from sqlalchemy.dialects.postgresql import insert
+
+from src import db
+from src.models.models import Book, BookStat, ReadingStatus
+from src.replica import RoutingSession
+
+from sqlalchemy import (  # isort:skip
+    Float,
+    Integer,
+    Text,
+    case,
+    cast,
+    delete,
+    event,
+    exists,
+    extract,
+    func,
+    inspect,
+    literal,
+    literal_column,
+    null,
+    select,
+    text,
+    union_all,
+)
+
+# the Book columns the rollups and the timeline depend on
+STAT_COLUMNS = ("status", "genre", "type_read", "rating", "date_read", "date_added")
+GRANULARITIES = ("day", "week", "month")
+
+
+def book_state(book):
+    """The counted values of a Book or a row with the STAT_COLUMNS."""
+    return {column: getattr(book, column) for column in STAT_COLUMNS}
+
+
+def _stat_keys(state):
+    keys = [
+        ("total", ""),
+        ("status", state["status"].name),
+        ("type_read", state["type_read"].name),
+        ("genre", state["genre"] or ""),
+    ]
+    if state["date_read"] is not None:
+        keys.append(("month_read", state["date_read"].strftime("%Y-%m")))
+    return keys
+
+
+def _in_past_year(state):
+    this_year = datetime.now(timezone.utc).year
+    return any(
+        state[column] is not None and state[column].year < this_year
+        for column in ("date_read", "date_added")
+    )
+
+
+def record_book_changes(changes):
+    """Applies (before, after) book states to the rollups; None for either side
+    of a change records an added or deleted book. Does not commit."""
+    deltas = defaultdict(lambda: [0, 0, 0])
+    past_year_changed = False
+    for before, after in changes:
+        for state, sign in ((before, -1), (after, 1)):
+            if state is None:
+                continue
+            past_year_changed = past_year_changed or _in_past_year(state)
+            rating = state["rating"]
+            for key in _stat_keys(state):
+                delta = deltas[key]
+                delta[0] += sign
+                if rating is not None:
+                    delta[1] += sign * rating
+                    delta[2] += sign
+    rows = [
+        {
+            "dimension": dimension,
+            "key": key,
+            "books": books,
+            "rating_sum": rating_sum,
+            "rating_count": rating_count,
+        }
+        # sorted, so concurrent writers lock the rows in the same order
+        for (dimension, key), (books, rating_sum, rating_count) in sorted(
+            deltas.items()
+        )
+        if books or rating_sum or rating_count
+    ]
+    if past_year_changed:
+        # cleared after the commit, or a request in between could cache the
+        # timeline as it was before this write
+        db.session.info["timeline_changed"] = True
+    if not rows:
+        return
+    statement = insert(BookStat).values(rows)
+    statement = statement.on_conflict_do_update(
+        index_elements=[BookStat.dimension, BookStat.key],
+        set_={
+            column: getattr(BookStat, column) + statement.excluded[column]
+            for column in ("books", "rating_sum", "rating_count")
+        },
+    )
+    db.session.execute(statement)
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _clear_timeline_cache(session):
+    if session.info.pop("timeline_changed", False):
+        timeline_cache = current_app.extensions.get("timeline_cache")
+        if timeline_cache is not None:
+            timeline_cache.invalidate("timeline")
+
+
+@event.listens_for(RoutingSession, "after_rollback")
+def _forget_timeline_changes(session):
+    session.info.pop("timeline_changed", None)
+
+
+def _rollup(dimension, key, *where):
+    return (
+        select(
+            literal(dimension, Text),
+            key,
+            func.count(),
+            func.coalesce(func.sum(Book.rating), 0),
+            func.count(Book.rating),
+        )
+        .where(*where)
+        .group_by(key)
+    )
+
+
+def rebuild_book_stats():
+    """Recomputes every rollup row from the books table, and commits."""
+    BookStat.__table__.create(db.session.connection(), checkfirst=True)
+    # blocks writes to books until the commit, so none is counted twice or
+    # missed while the rollups are replaced
+    db.session.execute(text("LOCK TABLE books IN SHARE MODE"))
+    db.session.execute(delete(BookStat))
+    rollups = union_all(
+        _rollup("total", literal("", Text)).group_by(None),
+        _rollup("status", Book.status.cast(Text)),
+        _rollup("type_read", Book.type_read.cast(Text)),
+        _rollup("genre", func.coalesce(Book.genre, "")),
+        _rollup(
+            "month_read",
+            func.to_char(Book.date_read, "YYYY-MM"),
+            Book.date_read.is_not(None),
+        ),
+    )
+    columns = ["dimension", "key", "books", "rating_sum", "rating_count"]
+    db.session.execute(insert(BookStat).from_select(columns, rollups))
+    db.session.commit()
+
+
+def book_stats_missing():
+    """True if books exist but no total rollup row does."""
+    total = select(BookStat.key).where(BookStat.dimension == "total")
+    return db.session.scalar(select(exists(select(Book.id)) & ~exists(total)))
+
+
+def ensure_book_stats():
+    """Rebuilds the rollups if they are missing; returns whether it did."""
+    tables = inspect(db.session.connection())
+    if not tables.has_table(Book.__tablename__):
+        return False
+    if tables.has_table(BookStat.__tablename__) and not book_stats_missing():
+        return False
+    rebuild_book_stats()
+    return True
+
+
+def get_book_stats():
+    """Rollup rows with books in them, by dimension."""
+    statement = select(BookStat).where(BookStat.books > 0).order_by(BookStat.key)
+    stats = defaultdict(list)
+    for stat in db.session.scalars(statement):
+        stats[stat.dimension].append(stat)
+    return stats
+
+
+def _counts_by_period(granularity, column, start, end, *where):
+    period = func.date_trunc(granularity, column)
+    return (
+        select(period.label("period"), func.count().label("books"))
+        .where(column >= start, column < end, *where)
+        .group_by(period)
+        .cte()
+    )
+
+
+def get_timeline(granularity, start, end, until, goal=None):
+    """Rows of books read and added per `granularity` period from `start` up to
+    the period holding `until`, in one query.
+
+    Each row also has the books read so far, the streak of consecutive
+    periods with a book read ending at it, and, given a `goal` of books for
+    the whole [start, end) range, how many should have been read by the
+    end of the period to keep pace with it. Only books read or added in
+    [start, end) are counted.
+    """
+    # one of GRANULARITIES, so safe to put in the SQL
+    step = literal_column(f"interval '1 {granularity}'")
+    periods = select(
+        func.generate_series(func.date_trunc(granularity, start), until, step).label(
+            "period"
+        )
+    ).cte("periods")
+    reads = _counts_by_period(
+        granularity, Book.date_read, start, end, Book.status == ReadingStatus.READ
+    )
+    additions = _counts_by_period(granularity, Book.date_added, start, end)
+
+    read = func.coalesce(reads.c.books, 0)
+    by_period = {"order_by": periods.c.period}
+    series = (
+        select(
+            periods.c.period,
+            read.label("read"),
+            func.coalesce(additions.c.books, 0).label("added"),
+            func.sum(read).over(**by_period).label("read_to_date"),
+            # periods without a book read so far; constant along a streak
+            func.sum(case((read == 0, 1), else_=0)).over(**by_period).label("gaps"),
+        )
+        .select_from(
+            periods.outerjoin(reads, reads.c.period == periods.c.period).outerjoin(
+                additions, additions.c.period == periods.c.period
+            )
+        )
+        .cte("series")
+    )
+
+    streak = func.count().filter(series.c.read > 0)
+    streak = streak.over(partition_by=series.c.gaps, order_by=series.c.period)
+    goal_to_date = cast(null(), Float)
+    if goal is not None:
+        elapsed = extract("epoch", func.least(series.c.period + step, end) - start)
+        goal_to_date = (goal * elapsed / (end - start).total_seconds()).cast(Float)
+    statement = select(
+        series.c.period,
+        series.c.read,
+        series.c.added,
+        series.c.read_to_date.cast(Integer).label("read_to_date"),
+        case((series.c.read > 0, streak), else_=0).label("streak"),
+        goal_to_date.label("goal_to_date"),
+    ).order_by(series.c.period)
+    return db.session.execute(statement).all()
+
+
+def year_range(year, now=None):
+    """[start, end) of `year`, and the last moment of it that has passed."""
+    now = now or datetime.now(timezone.utc).replace(tzinfo=None)
+    start, end = datetime(year, 1, 1), datetime(year + 1, 1, 1)
+    return start, end, min(now, end - timedelta(microseconds=1))
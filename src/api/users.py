@@ -2,17 +2,39 @@
 
 
 from flask import request
-from flask_restx import Namespace, Resource, fields
+from flask_restx import Namespace, Resource, fields, reqparse
 
 from src import db  # noqa: F401
+from src.api.bulk import USER_FIELDS, patch_values
+from src.api.cache import cached
+from src.api.encoders import ModelEncoder
+from src.api.fieldsets import add_fields_argument, requested_fields
 from src.models.models import User  # noqa: F401
-
+from src.replica import reads_from_replica
+
+from src.api.conditional import (  # isort:skip
+    has_validators,
+    is_not_modified,
+    make_etag,
+    not_modified_response,
+    page_validators,
+    validator_headers,
+)
+from src.api.pagination import (  # isort:skip
+    decode_cursor,
+    encode_cursor,
+    next_page_headers,
+    page_limit,
+    page_parser,
+)
 from src.api.crud import (  # isort:skip
-    get_all_users,
-    get_user_by_email,
+    get_users_page,
     add_user,
     get_user_by_id,
+    get_user_row,
+    get_user_updated_at,
     update_user,
+    patch_user,
     delete_user,
 )
 
@@ -29,13 +51,59 @@ user = users_namespace.model(
     },
 )
 
+# serializes Core rows exactly as marshalling User objects with `user` would
+user_encoder = ModelEncoder(user)
+
+user_page_parser = add_fields_argument(page_parser())
+user_fields_parser = add_fields_argument(reqparse.RequestParser())
+
 
 class UsersList(Resource):
 
-    @users_namespace.marshal_with(user, as_list=True)
+    @users_namespace.expect(user_page_parser)
+    @users_namespace.response(200, "Success", [user])
+    @users_namespace.response(304, "No user has changed")
+    @users_namespace.response(400, "Invalid limit, cursor or fields")
+    @cached("users")
+    @reads_from_replica
     def get(self):
-        """Returns all users"""
-        return get_all_users(), 200
+        """Returns a page of users, ordered by id.
+
+        Pass the X-Next-Cursor response header back as `cursor` for the next page,
+        and `fields` to return (and load) only some columns.
+        """
+        args = user_page_parser.parse_args()
+        try:
+            limit = page_limit(args["limit"])
+            after_id = None
+            if args["cursor"]:
+                (after_id,) = decode_cursor(args["cursor"])
+                after_id = int(after_id)
+            names = requested_fields(args["fields"], user)
+        except ValueError as e:
+            users_namespace.abort(400, str(e))
+
+        rows, has_more = get_users_page(
+            limit, after_id, names or user_encoder.all_fields
+        )
+
+        cursor = None
+        if has_more:
+            cursor = encode_cursor(rows[-1][-1])
+        # rows end with (updated_at, id)
+        etag, last_modified = page_validators(
+            [(row[-1], row[-2]) for row in rows], limit, args["cursor"], names, cursor
+        )
+        # deletes don't move the latest updated_at, so only trust the ETag here
+        if is_not_modified(etag):
+            return not_modified_response(etag, last_modified)
+
+        encode = user_encoder.get(names)
+        return (
+            [encode(row) for row in rows],
+            200,
+            validator_headers(etag, last_modified) | next_page_headers(cursor),
+        )
 
     @users_namespace.expect(user, validate=True)
     @users_namespace.response(201, "<user_email> was added!")
@@ -47,28 +115,44 @@ class UsersList(Resource):
         email = post_data.get("email")
         response_object = {}
 
-        user = get_user_by_email(email)
-        if user:
+        if not add_user(username, email):
             response_object["message"] = "Sorry. That email already exists."
             return response_object, 400
 
-        add_user(username, email)
-
         response_object["message"] = f"{email} was added!"
         return response_object, 201
 
 
 class Users(Resource):
 
-    @users_namespace.marshal_with(user)
-    @users_namespace.response(200, "Success")
+    @users_namespace.expect(user_fields_parser)
+    @users_namespace.response(200, "Success", user)
+    @users_namespace.response(304, "User has not changed")
+    @users_namespace.response(400, "Invalid fields")
     @users_namespace.response(404, "User <user_id> does not exist")
+    @cached("users", "user_id", int)
+    @reads_from_replica
     def get(self, user_id):
         """Returns a single user."""
-        user = get_user_by_id(user_id)
-        if not user:
+        args = user_fields_parser.parse_args()
+        try:
+            names = requested_fields(args["fields"], user)
+        except ValueError as e:
+            users_namespace.abort(400, str(e))
+
+        if has_validators():
+            updated_at = get_user_updated_at(user_id)
+            etag = make_etag(user_id, updated_at, names)
+            if updated_at and is_not_modified(etag, updated_at):
+                return not_modified_response(etag, updated_at)
+
+        row = get_user_row(user_id, names or user_encoder.all_fields)
+        if not row:
             users_namespace.abort(404, f"User {user_id} does not exist")
-        return user, 200
+
+        updated_at = row[-1]
+        etag = make_etag(user_id, updated_at, names)
+        return user_encoder.get(names)(row), 200, validator_headers(etag, updated_at)
 
     @users_namespace.response(200, "<user_id> was removed!")
     @users_namespace.response(404, "User <user_id> does not exist")
@@ -100,15 +184,34 @@ class Users(Resource):
         if not user:
             users_namespace.abort(404, f"User {user_id} does not exist")
 
-        if get_user_by_email(email):
+        if not update_user(user, username, email):
             response_object["message"] = "Sorry. That email already exists."
             return response_object, 400
 
-        update_user(user, username, email)
-
         response_object["message"] = f"{user.id} was updated!"
         return response_object, 200
 
+    @users_namespace.expect(user)
+    @users_namespace.response(200, "The updated user", user)
+    @users_namespace.response(400, "No fields, an invalid value or a taken email")
+    @users_namespace.response(404, "User <user_id> does not exist")
+    def patch(self, user_id):
+        """Updates only the fields sent, in a single statement."""
+        try:
+            values = patch_values(request.get_json(silent=True), USER_FIELDS)
+            row = patch_user(user_id, values, user_encoder.all_fields)
+        except ValueError as e:
+            users_namespace.abort(400, str(e))
+
+        if row is None:
+            users_namespace.abort(404, f"User {user_id} does not exist")
+        if row is False:
+            return {"message": "Sorry. That email already exists."}, 400
+
+        updated_at = row[-1]
+        etag = make_etag(user_id, updated_at, None)
+        return user_encoder.get(None)(row), 200, validator_headers(etag, updated_at)
+
 
 users_namespace.add_resource(UsersList, "")
 users_namespace.add_resource(Users, "/<int:user_id>")
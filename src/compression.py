@@ -0,0 +1,97 @@
+# src/compression.py
+"""gzip/brotli compression of responses, negotiated from Accept-Encoding.
+
+Bodies under COMPRESSION_MIN_SIZE and types in COMPRESSION_SKIP_TYPES
+(already compressed formats) are sent as they are. Streamed responses are
+compressed chunk by chunk as they are sent. A compressed response gets a weak
+ETag, since its bytes differ from those the strong ETag was computed for.
+brotli is used only if the Brotli package is installed.
+"""
+
+import zlib
+
+from flask import current_app, request
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+
+def _gzip_compressor(level):
+    # wbits 31: a gzip header and trailer around the deflate stream
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    return compressor.compress, compressor.flush
+
+
+def _brotli_compressor(quality):
+    compressor = brotli.Compressor(quality=quality)
+    return compressor.process, compressor.finish
+
+
+def _encodings():
+    return ["br", "gzip"] if brotli is not None else ["gzip"]
+
+
+def _compressor(encoding):
+    config = current_app.config
+    if encoding == "br":
+        return _brotli_compressor(config["COMPRESSION_BROTLI_QUALITY"])
+    return _gzip_compressor(config["COMPRESSION_GZIP_LEVEL"])
+
+
+def _compress_stream(chunks, compress, finish):
+    try:
+        for chunk in chunks:
+            data = compress(chunk.encode() if isinstance(chunk, str) else chunk)
+            if data:
+                yield data
+        yield finish()
+    finally:
+        # lets stream_with_context and friends clean up
+        if hasattr(chunks, "close"):
+            chunks.close()
+
+
+def _compressible(response):
+    if (
+        response.status_code < 200
+        or response.status_code in (204, 206, 304)
+        or request.method == "HEAD"
+        or response.direct_passthrough
+        or "Content-Encoding" in response.headers
+    ):
+        return False
+    mimetype = response.mimetype or ""
+    return not mimetype.startswith(current_app.config["COMPRESSION_SKIP_TYPES"])
+
+
+def compress_response(response):
+    if not _compressible(response):
+        return response
+    response.vary.add("Accept-Encoding")
+    encoding = request.accept_encodings.best_match(_encodings())
+    if encoding is None:
+        return response
+
+    if not response.is_streamed:
+        data = response.get_data()
+        if len(data) < current_app.config["COMPRESSION_MIN_SIZE"]:
+            return response
+        compress, finish = _compressor(encoding)
+        response.set_data(compress(data) + finish())
+    else:
+        compress, finish = _compressor(encoding)
+        response.response = _compress_stream(response.response, compress, finish)
+        response.headers.pop("Content-Length", None)
+
+    response.headers["Content-Encoding"] = encoding
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def init_compression(app):
+    if app.config.get("COMPRESSION_ENABLED"):
+        app.after_request(compress_response)
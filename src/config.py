@@ -2,27 +2,116 @@
 
 import os
 
-from dotenv import load_dotenv
+from sqlalchemy.pool import NullPool
 
-load_dotenv()
+# .env is loaded by src/__init__.py, which always runs first
+
+
+def pool_options(size=5, overflow=10, timeout=30, recycle=1800, pre_ping=True):
+    """Engine options; DB_POOL_* environment variables override these defaults.
+
+    Every gunicorn worker has its own pool, so the database must allow
+    workers * (size + overflow) connections.
+
+    DB_POOL_PROFILE=pgbouncer is for running behind PgBouncer in transaction
+    mode: PgBouncer does the pooling, so every checkout opens a fresh
+    connection to it and nothing session-level outlives a transaction.
+    """
+    if os.getenv("DB_POOL_PROFILE", "queue") == "pgbouncer":
+        return {"poolclass": NullPool}
+    return {
+        "pool_size": int(os.getenv("DB_POOL_SIZE", size)),
+        "max_overflow": int(os.getenv("DB_POOL_MAX_OVERFLOW", overflow)),
+        "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", timeout)),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", recycle)),
+        "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", str(pre_ping).lower()) == "true",
+    }
 
 
 class BaseConfig:
     TESTING = False
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SQLALCHEMY_ENGINE_OPTIONS = pool_options()
     SECRET_KEY = os.getenv("SECRET_KEY", "my_precious")
+    API_PAGE_SIZE_DEFAULT = int(os.getenv("API_PAGE_SIZE_DEFAULT", "100"))
+    API_PAGE_SIZE_MAX = int(os.getenv("API_PAGE_SIZE_MAX", "1000"))
+    EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+    BULK_MAX_BATCH_SIZE = int(os.getenv("BULK_MAX_BATCH_SIZE", "1000"))
+    # most books PATCH or DELETE /api/books may change in one call
+    BULK_MAX_AFFECTED_ROWS = int(os.getenv("BULK_MAX_AFFECTED_ROWS", "1000"))
+    RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "true") == "true"
+    RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "30"))
+    RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", "33554432"))
+    FRAGMENT_CACHE_TTL = float(os.getenv("FRAGMENT_CACHE_TTL", "3600"))
+    FRAGMENT_CACHE_MAX_BYTES = int(os.getenv("FRAGMENT_CACHE_MAX_BYTES", "16777216"))
+    # per process, so other workers may serve a past year this stale after a write
+    TIMELINE_CACHE_TTL = float(os.getenv("TIMELINE_CACHE_TTL", "30"))
+    TIMELINE_CACHE_MAX_BYTES = int(os.getenv("TIMELINE_CACHE_MAX_BYTES", "4194304"))
+    TEMPLATE_CACHE_DIR = os.getenv(
+        "TEMPLATE_CACHE_DIR", os.path.join(os.path.dirname(__file__), ".jinja_cache")
+    )
+    # prebuilt /swagger.json, see src/api/spec.py
+    SWAGGER_SPEC_FILE = os.getenv("SWAGGER_SPEC_FILE")
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true") == "true"
+    QUERY_INSPECTOR_ENABLED = os.getenv("QUERY_INSPECTOR_ENABLED", "false") == "true"
+    QUERY_INSPECTOR_SLOW_MS = float(os.getenv("QUERY_INSPECTOR_SLOW_MS", "100"))
+    QUERY_INSPECTOR_REPEAT_THRESHOLD = int(
+        os.getenv("QUERY_INSPECTOR_REPEAT_THRESHOLD", "10")
+    )
+    QUERY_INSPECTOR_EXPLAIN_RATE = float(
+        os.getenv("QUERY_INSPECTOR_EXPLAIN_RATE", "0.1")
+    )
+    QUERY_INSPECTOR_MAX_FINDINGS = int(os.getenv("QUERY_INSPECTOR_MAX_FINDINGS", "200"))
+    QUERY_INSPECTOR_ENDPOINT = False
+    REPLICA_STICKY_SECONDS = int(os.getenv("REPLICA_STICKY_SECONDS", "5"))
+    REPLICA_RETRY_SECONDS = float(os.getenv("REPLICA_RETRY_SECONDS", "30"))
+    COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "true") == "true"
+    COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+    COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+    COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+    COMPRESSION_SKIP_TYPES = (
+        "image/",
+        "video/",
+        "audio/",
+        "font/woff",
+        "application/gzip",
+        "application/x-gzip",
+        "application/zip",
+        "application/x-brotli",
+        "application/pdf",
+        "application/octet-stream",
+    )
 
 
 class DevelopmentConfig(BaseConfig):
+    QUERY_INSPECTOR_ENDPOINT = True
     SQLALCHEMY_DATABASE_URI = os.environ.get("DATABASE_URL")
+    SQLALCHEMY_ENGINE_OPTIONS = pool_options(size=2, overflow=5)
 
 
 class TestingConfig(BaseConfig):
     TESTING = True
+    RESPONSE_CACHE_ENABLED = False
+    TEMPLATE_CACHE_DIR = None
     SQLALCHEMY_DATABASE_URI = os.environ.get("DATABASE_TEST_URL")
+    SQLALCHEMY_ENGINE_OPTIONS = pool_options(size=2, overflow=5, pre_ping=False)
 
 
 class ProductionConfig(BaseConfig):
     SQLALCHEMY_DATABASE_URI = os.environ.get("DATABASE_URL")
+    # Azure drops idle connections, so ping on checkout and recycle well
+    # before the server side gives up on them
+    SQLALCHEMY_ENGINE_OPTIONS = pool_options(size=5, overflow=10, recycle=1800)
+    # optional read replica for GET handlers, see src/replica.py; binds don't
+    # inherit SQLALCHEMY_ENGINE_OPTIONS, so it is given the primary's here
+    SQLALCHEMY_BINDS = (
+        {
+            "replica": dict(
+                SQLALCHEMY_ENGINE_OPTIONS, url=os.environ["DATABASE_REPLICA_URL"]
+            )
+        }
+        if os.getenv("DATABASE_REPLICA_URL")
+        else {}
+    )
 
     SECRET_KEY = os.getenv("SECRET_KEY", "my_precious")
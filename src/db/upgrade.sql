@@ -0,0 +1,73 @@
+-- src/db/upgrade.sql
+--
+-- Brings a database created from the original models up to the current ones.
+-- db.create_all() only creates missing tables and never alters existing ones,
+-- so an existing database needs this once, BEFORE the new version of the app
+-- is deployed (its reads select books.updated_at and users.updated_at):
+--
+--     psql "$DATABASE_URL" -f src/db/upgrade.sql
+--     flask rebuild_stats
+--
+-- Every statement can be run again safely. Don't use psql's -1/--single-
+-- transaction: CREATE INDEX CONCURRENTLY can't run inside a transaction. If an
+-- index build fails (e.g. a duplicate written meanwhile), Postgres leaves an
+-- INVALID index behind; DROP INDEX it and run the script again.
+--
+-- Adding books.search_vector rewrites the books table under an exclusive lock.
+
+-- users: updated_at for conditional GETs, one account per email in any case
+
+ALTER TABLE users ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT now();
+
+-- later accounts sharing an email keep their data under a marked, unique email
+UPDATE users
+SET email = left('duplicate-' || users.id || '-' || users.email, 128)
+FROM (
+    SELECT id, row_number() OVER (PARTITION BY lower(email) ORDER BY id) AS n
+    FROM users
+) AS ranked
+WHERE users.id = ranked.id AND ranked.n > 1;
+
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS ix_users_email_lower ON users (lower(email));
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_users_updated_at ON users (updated_at);
+
+-- books: keyset pagination, updated_at, full-text search, unique titles
+
+UPDATE books SET date_added = now() WHERE date_added IS NULL;
+ALTER TABLE books ALTER COLUMN date_added SET NOT NULL;
+
+ALTER TABLE books ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT now();
+
+ALTER TABLE books ADD COLUMN IF NOT EXISTS search_vector TSVECTOR GENERATED ALWAYS AS (
+    setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+    setweight(to_tsvector('english', coalesce(author, '')), 'B') ||
+    setweight(to_tsvector('english', coalesce(genre, '')), 'C') ||
+    setweight(to_tsvector('english', coalesce(notes, '')), 'D')
+) STORED;
+
+-- the first book added under a title keeps it; later ones are marked
+UPDATE books
+SET title = books.title || ' (duplicate ' || books.id || ')'
+FROM (
+    SELECT id, row_number() OVER (PARTITION BY title ORDER BY date_added, id) AS n
+    FROM books
+    WHERE title IS NOT NULL
+) AS ranked
+WHERE books.id = ranked.id AND ranked.n > 1;
+
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS ix_books_title ON books (title);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_books_date_added_id ON books (date_added, id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_books_updated_at ON books (updated_at);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_books_search_vector ON books USING gin (search_vector);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_books_status_date_read ON books (status, date_read);
+
+-- book_stats: statistics rollups, filled by flask rebuild_stats
+
+CREATE TABLE IF NOT EXISTS book_stats (
+    dimension VARCHAR(16) NOT NULL,
+    key TEXT NOT NULL,
+    books INTEGER NOT NULL,
+    rating_sum INTEGER NOT NULL,
+    rating_count INTEGER NOT NULL,
+    PRIMARY KEY (dimension, key)
+);
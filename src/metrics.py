@@ -0,0 +1,212 @@
+# src/metrics.py
+"""Prometheus instrumentation: request latency, SQL per request and pool waits.
+
+Under gunicorn every worker is its own process, so metrics are only correct
+across workers in prometheus_client's multiprocess mode: gunicorn.conf.py sets
+PROMETHEUS_MULTIPROC_DIR before the workers import this module, and /metrics
+then merges the files all workers write there. Without that variable (flask
+run, tests) the process's own registry is served.
+"""
+
+import os
+import time
+
+from flask import Blueprint, Response, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import Pool, QueuePool
+
+from prometheus_client import (  # isort:skip
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+blueprint = Blueprint("metrics", __name__)
+
+REQUEST_LATENCY = Histogram(
+    "booker_http_request_duration_seconds",
+    "Time spent handling a request, including streamed bodies.",
+    ["endpoint", "method", "status"],
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "booker_http_requests_in_progress",
+    "Requests currently being handled.",
+    ["method"],
+    multiprocess_mode="livesum",
+)
+SQL_STATEMENTS = Histogram(
+    "booker_db_statements_per_request",
+    "SQL statements executed by one request.",
+    ["endpoint", "method"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89),
+)
+SQL_TIME = Histogram(
+    "booker_db_statement_seconds_per_request",
+    "Time one request spent executing SQL statements.",
+    ["endpoint", "method"],
+)
+SQL_STATEMENTS_TOTAL = Counter(
+    "booker_db_statements",
+    "SQL statements executed, in or out of a request.",
+)
+POOL_CHECKOUT_WAIT = Histogram(
+    "booker_db_pool_checkout_wait_seconds",
+    "Time spent waiting for a connection from the pool.",
+    ["engine"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1, 5, 30),
+)
+POOL_SIZE = Gauge(
+    "booker_db_pool_size",
+    "Configured pool_size; summed over workers, the connections kept open.",
+    ["engine"],
+    multiprocess_mode="livesum",
+)
+POOL_CHECKED_OUT = Gauge(
+    "booker_db_pool_checked_out_connections",
+    "Connections currently checked out of the pool.",
+    ["engine"],
+    multiprocess_mode="livesum",
+)
+POOL_OVERFLOW = Gauge(
+    "booker_db_pool_overflow_connections",
+    "Connections open beyond pool_size.",
+    ["engine"],
+    multiprocess_mode="livesum",
+)
+POOL_CONNECTION_EVENTS = Counter(
+    "booker_db_pool_connection_events",
+    "Connections opened, closed and invalidated (e.g. failed pre-ping).",
+    ["event"],
+)
+
+
+class InstrumentedQueuePool(QueuePool):
+    """A QueuePool recording checkout waits, connections in use and overflow.
+
+    QueuePool has no event before a checkout starts, so the wait is timed
+    around `_do_get`, which blocks until a connection is free or created.
+    The metrics are labelled with `engine`, "primary" or the bind key, so the
+    primary's and the replica's pools don't overwrite each other's gauges.
+    """
+
+    engine = "primary"
+
+    @classmethod
+    def for_bind(cls, key):
+        return type(cls.__name__, (cls,), {"engine": key})
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        POOL_SIZE.labels(self.engine).set(self.size())
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            POOL_CHECKOUT_WAIT.labels(self.engine).observe(time.perf_counter() - start)
+            self._update_gauges()
+
+    def _do_return_conn(self, record):
+        super()._do_return_conn(record)
+        self._update_gauges()
+
+    def _update_gauges(self):
+        POOL_CHECKED_OUT.labels(self.engine).set(self.checkedout())
+        # overflow() counts up from -pool_size while the pool fills
+        POOL_OVERFLOW.labels(self.engine).set(max(self.overflow(), 0))
+
+
+def _count_connection_event(event_name):
+    def listener(*args):
+        POOL_CONNECTION_EVENTS.labels(event_name).inc()
+
+    return listener
+
+
+_POOL_LISTENERS = {
+    name: _count_connection_event(name) for name in ("connect", "close", "invalidate")
+}
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, many):
+    conn.info["query_start"] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, many):
+    elapsed = time.perf_counter() - conn.info.pop("query_start")
+    SQL_STATEMENTS_TOTAL.inc()
+    if has_request_context() and "sql_count" in g:
+        g.sql_count += 1
+        g.sql_time += elapsed
+
+
+def _endpoint():
+    return request.url_rule.endpoint if request.url_rule else "unmatched"
+
+
+def _start_request():
+    g.request_start = time.perf_counter()
+    g.sql_count = 0
+    g.sql_time = 0.0
+    REQUESTS_IN_PROGRESS.labels(request.method).inc()
+
+
+def _record_status(response):
+    g.status = response.status_code
+    return response
+
+
+def _finish_request(exc):
+    # runs once a streamed body is done, so its queries and time are counted
+    if "request_start" not in g:
+        return
+    endpoint, method = _endpoint(), request.method
+    status = g.pop("status", 500)
+    REQUEST_LATENCY.labels(endpoint, method, status).observe(
+        time.perf_counter() - g.pop("request_start")
+    )
+    SQL_STATEMENTS.labels(endpoint, method).observe(g.pop("sql_count"))
+    SQL_TIME.labels(endpoint, method).observe(g.pop("sql_time"))
+    REQUESTS_IN_PROGRESS.labels(method).dec()
+
+
+@blueprint.route("/metrics")
+def metrics():
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), mimetype=CONTENT_TYPE_LATEST)
+
+
+def init_metrics(app):
+    """Instruments `app`; call before `db.init_app` so the pool class applies."""
+    if not app.config.get("METRICS_ENABLED"):
+        return
+    options = dict(app.config.get("SQLALCHEMY_ENGINE_OPTIONS", {}))
+    options.setdefault("poolclass", InstrumentedQueuePool)
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = options
+    # binds don't inherit SQLALCHEMY_ENGINE_OPTIONS; each gets a labelled pool
+    binds = {}
+    for key, bind in app.config.get("SQLALCHEMY_BINDS", {}).items():
+        bind = dict(bind) if isinstance(bind, dict) else {"url": bind}
+        bind.setdefault("poolclass", InstrumentedQueuePool.for_bind(key))
+        binds[key] = bind
+    app.config["SQLALCHEMY_BINDS"] = binds
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        for name, listener in _POOL_LISTENERS.items():
+            event.listen(Pool, name, listener)
+    app.before_request(_start_request)
+    app.after_request(_record_status)
+    app.teardown_request(_finish_request)
+    app.register_blueprint(blueprint)
@@ -3,10 +3,11 @@
 from enum import Enum
 from uuid import uuid4
 
-from sqlalchemy import Boolean, CheckConstraint, Column, DateTime
+from sqlalchemy import Boolean, CheckConstraint, Column, Computed, DateTime
 from sqlalchemy import Enum as SQLEnum
-from sqlalchemy import Integer, String, Text
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Index, Integer, String, Text
+from sqlalchemy.dialects.postgresql import TSVECTOR, UUID
+from sqlalchemy.orm import deferred
 from sqlalchemy.sql import func
 
 from src import db
@@ -21,6 +22,15 @@ class User(db.Model):
     email = Column(String(128), nullable=False)
     active = Column(Boolean(), default=True, nullable=False)
     created_date = Column(DateTime, default=func.now(), nullable=False)
+    updated_at = Column(
+        DateTime, default=func.now(), onupdate=func.now(), nullable=False
+    )
+
+    __table_args__ = (
+        Index("ix_users_email_lower", func.lower(email), unique=True),
+        # max(updated_at) for conditional GET /api/users
+        Index("ix_users_updated_at", "updated_at"),
+    )
 
     def __init__(self, username, email):
         self.username = username
@@ -52,18 +62,56 @@ class Book(db.Model):
     title = Column(Text)
     author = Column(Text)
     genre = Column(Text)
-    date_added = Column(DateTime, default=func.now())
+    date_added = Column(DateTime, default=func.now(), nullable=False)
     priority = Column(SQLEnum(PriorityLevel), default=PriorityLevel.LOW, nullable=False)
     referred_by = Column(Text)
     status = Column(
         SQLEnum(ReadingStatus), default=ReadingStatus.TO_READ, nullable=False
     )
     category = Column(Text)
-    notes = Column(Text)
+    # unbounded; only loaded when asked for, see crud._columns
+    notes = deferred(Column(Text))
     type_read = Column(SQLEnum(BookType), default=BookType.AUDIOBOOK, nullable=False)
     rating = Column(Integer, CheckConstraint("rating >= 1 AND rating <= 5"))
     date_read = Column(DateTime)
+    updated_at = Column(
+        DateTime, default=func.now(), onupdate=func.now(), nullable=False
+    )
+    # maintained by Postgres for GET /api/books/search; never needed on reads
+    search_vector = deferred(
+        Column(
+            TSVECTOR,
+            Computed(
+                "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+                "setweight(to_tsvector('english', coalesce(author, '')), 'B') || "
+                "setweight(to_tsvector('english', coalesce(genre, '')), 'C') || "
+                "setweight(to_tsvector('english', coalesce(notes, '')), 'D')",
+                persisted=True,
+            ),
+        )
+    )
 
     __table_args__ = (
         CheckConstraint("rating >= 1 AND rating <= 5", name="rating_range"),
+        # keyset pagination order for GET /api/books
+        Index("ix_books_date_added_id", "date_added", "id"),
+        Index("ix_books_title", "title", unique=True),
+        # max(updated_at) for conditional GET /api/books
+        Index("ix_books_updated_at", "updated_at"),
+        Index("ix_books_search_vector", "search_vector", postgresql_using="gin"),
+        # books read in a date range for GET /api/books/timeline
+        Index("ix_books_status_date_read", "status", "date_read"),
     )
+
+
+class BookStat(db.Model):
+    """Rollup of books by one dimension (status, genre, ...), see src/api/stats.py."""
+
+    __tablename__ = "book_stats"
+
+    dimension = Column(String(16), primary_key=True)
+    # the enum name, genre or YYYY-MM month; "" for no genre and for the total
+    key = Column(Text, primary_key=True)
+    books = Column(Integer, default=0, nullable=False)
+    rating_sum = Column(Integer, default=0, nullable=False)
+    rating_count = Column(Integer, default=0, nullable=False)
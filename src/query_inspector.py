@@ -0,0 +1,179 @@
+# src/query_inspector.py
+"""Opt-in detection of slow statements and repeated statements (N+1 queries).
+
+Enabled with QUERY_INSPECTOR_ENABLED. Each finding is logged as one JSON
+line and kept in a bounded in-memory list, served by GET /debug/queries when
+QUERY_INSPECTOR_ENDPOINT is set (DevelopmentConfig only). A sample of slow
+SELECTs is re-run under EXPLAIN (ANALYZE, BUFFERS) and the plan is attached
+to the finding; that runs the query a second time, so keep the rate low.
+Parameter values are never logged, but EXPLAIN output can contain them.
+"""
+
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime, timezone
+
+from flask import Blueprint, current_app, g, has_request_context, request
+from flask.signals import request_started, request_tearing_down
+from sqlalchemy import event
+
+from src import db
+
+blueprint = Blueprint("query_inspector", __name__)
+
+_PARAMETER = re.compile(r"%\(\w+\)s|%s|\?|\$\d+|\b\d+\b|'(?:[^']|'')*'")
+_PARAMETER_LIST = re.compile(r"\?(?:\s*,\s*\?)+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def statement_shape(statement):
+    """The statement with parameters and literals replaced by `?`.
+
+    Lists such as an expanded IN (...) collapse to one `?`, so statements
+    that only differ in their values have the same shape.
+    """
+    shape = _PARAMETER.sub("?", statement)
+    shape = _PARAMETER_LIST.sub("?", shape)
+    return _WHITESPACE.sub(" ", shape).strip()
+
+
+class QueryInspector:
+    def __init__(
+        self,
+        slow_ms=100,
+        repeat_threshold=10,
+        explain_rate=0.0,
+        max_findings=200,
+        logger=None,
+        sample=random.random,
+    ):
+        self.slow_ms = slow_ms
+        self.repeat_threshold = repeat_threshold
+        self.explain_rate = explain_rate
+        self.logger = logger
+        self.sample = sample
+        self._findings = deque(maxlen=max_findings)
+        self._lock = threading.Lock()
+
+    def install(self, app, engine):
+        event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+        request_started.connect(self._request_started, app, weak=False)
+        request_tearing_down.connect(self._request_tearing_down, app, weak=False)
+        app.extensions["query_inspector"] = self
+
+    def uninstall(self, app, engine):
+        event.remove(engine, "before_cursor_execute", self._before_cursor_execute)
+        event.remove(engine, "after_cursor_execute", self._after_cursor_execute)
+        request_started.disconnect(self._request_started, app)
+        request_tearing_down.disconnect(self._request_tearing_down, app)
+        app.extensions.pop("query_inspector", None)
+
+    def findings(self):
+        """Recorded findings, most recent first."""
+        with self._lock:
+            return list(reversed(self._findings))
+
+    def clear(self):
+        with self._lock:
+            self._findings.clear()
+
+    def _record(self, finding):
+        finding["at"] = datetime.now(timezone.utc).isoformat()
+        if has_request_context():
+            finding["method"] = request.method
+            finding["path"] = request.path
+            finding["endpoint"] = request.endpoint
+        with self._lock:
+            self._findings.append(finding)
+        if self.logger is not None:
+            self.logger.warning(json.dumps(finding, default=str))
+
+    def _request_started(self, sender, **extra):
+        g.query_shapes = Counter()
+
+    def _request_tearing_down(self, sender, exc=None, **extra):
+        shapes = g.pop("query_shapes", None)
+        if not shapes:
+            return
+        for shape, count in shapes.items():
+            if count > self.repeat_threshold:
+                self._record(
+                    {"type": "repeated_statement", "statement": shape, "count": count}
+                )
+
+    def _before_cursor_execute(
+        self, conn, cursor, statement, parameters, context, many
+    ):
+        conn.info["inspector_start"] = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, many):
+        elapsed_ms = (time.perf_counter() - conn.info.pop("inspector_start")) * 1000
+        if has_request_context() and "query_shapes" in g:
+            g.query_shapes[statement_shape(statement)] += 1
+        if elapsed_ms < self.slow_ms:
+            return
+        finding = {
+            "type": "slow_statement",
+            "statement": statement_shape(statement),
+            "duration_ms": round(elapsed_ms, 3),
+        }
+        if self._should_explain(conn, statement, many):
+            finding["plan"] = self._explain(cursor, statement, parameters)
+        self._record(finding)
+
+    def _should_explain(self, conn, statement, many):
+        return (
+            not many
+            and conn.dialect.name == "postgresql"
+            and statement.lstrip().upper().startswith("SELECT")
+            and self.sample() < self.explain_rate
+        )
+
+    def _explain(self, cursor, statement, parameters):
+        # a fresh DBAPI cursor, so this neither fires engine events nor
+        # disturbs the rows the original cursor still has to return; the
+        # savepoint keeps a failed EXPLAIN from aborting the transaction
+        with cursor.connection.cursor() as explain:
+            explain.execute("SAVEPOINT query_inspector")
+            try:
+                explain.execute(
+                    "EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + statement, parameters
+                )
+                plan = explain.fetchone()[0]
+            except Exception as e:  # an EXPLAIN must never break the request
+                explain.execute("ROLLBACK TO SAVEPOINT query_inspector")
+                return {"error": str(e)}
+            explain.execute("RELEASE SAVEPOINT query_inspector")
+            return plan
+
+
+def init_query_inspector(app):
+    if not app.config.get("QUERY_INSPECTOR_ENABLED"):
+        return
+    inspector = QueryInspector(
+        slow_ms=app.config["QUERY_INSPECTOR_SLOW_MS"],
+        repeat_threshold=app.config["QUERY_INSPECTOR_REPEAT_THRESHOLD"],
+        explain_rate=app.config["QUERY_INSPECTOR_EXPLAIN_RATE"],
+        max_findings=app.config["QUERY_INSPECTOR_MAX_FINDINGS"],
+        logger=app.logger,
+    )
+    with app.app_context():
+        inspector.install(app, db.engine)
+    if app.config.get("QUERY_INSPECTOR_ENDPOINT"):
+        app.register_blueprint(blueprint)
+
+
+@blueprint.route("/debug/queries", methods=["GET"])
+def list_findings():
+    return current_app.extensions["query_inspector"].findings()
+
+
+@blueprint.route("/debug/queries", methods=["DELETE"])
+def clear_findings():
+    current_app.extensions["query_inspector"].clear()
+    return "", 204
@@ -0,0 +1,119 @@
+# src/replica.py
+"""Routes reads of GET handlers to a read replica, with fallback to the primary.
+
+The replica is the "replica" entry of SQLALCHEMY_BINDS. Handlers opt in with
+`@reads_from_replica`; only SELECTs outside a flush go to the replica, so a
+handler that writes still writes to the primary.
+
+A successful write sets a short-lived cookie; while it is present the client
+reads from the primary, so it sees its own writes despite replication lag.
+If the replica fails, the handler is re-run against the primary and the
+replica is skipped for REPLICA_RETRY_SECONDS.
+
+The response cache (src/api/cache.py) is only filled by reads that went to
+the primary, and is bypassed altogether while the cookie is present.
+"""
+
+import time
+from functools import wraps
+
+from flask import current_app, g, has_app_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy.exc import OperationalError
+
+STICKY_COOKIE = "read_primary_until"
+WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+
+class RoutingSession(Session):
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (
+            bind is None
+            and has_app_context()
+            and g.get("db_route") == "replica"
+            and not self._flushing
+            and getattr(clause, "is_select", False)
+        ):
+            return self._db.engines["replica"]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+class ReplicaRouter:
+    def __init__(self, sticky_seconds, retry_seconds, clock=time.monotonic):
+        self.sticky_seconds = sticky_seconds
+        self.retry_seconds = retry_seconds
+        self.clock = clock
+        self.down_until = 0.0
+
+    def use_replica(self):
+        if self.clock() < self.down_until:
+            return False
+        return not self.reads_primary()
+
+    def reads_primary(self):
+        """True while the client's cookie sends its reads to the primary."""
+        try:
+            primary_until = float(request.cookies.get(STICKY_COOKIE, 0))
+        except ValueError:
+            primary_until = 0
+        return time.time() < primary_until
+
+    def mark_down(self):
+        self.down_until = self.clock() + self.retry_seconds
+
+    def stick_to_primary(self, response):
+        if request.method in WRITE_METHODS and response.status_code < 400:
+            until = time.time() + self.sticky_seconds
+            response.set_cookie(
+                STICKY_COOKIE,
+                f"{until:.3f}",
+                max_age=self.sticky_seconds,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
+
+
+def init_replica(app):
+    if "replica" not in app.config.get("SQLALCHEMY_BINDS", {}):
+        return
+    router = ReplicaRouter(
+        sticky_seconds=app.config["REPLICA_STICKY_SECONDS"],
+        retry_seconds=app.config["REPLICA_RETRY_SECONDS"],
+    )
+    app.extensions["replica_router"] = router
+    app.after_request(router.stick_to_primary)
+
+
+def client_reads_primary():
+    router = current_app.extensions.get("replica_router")
+    return router is not None and router.reads_primary()
+
+
+def read_from_replica():
+    """True once a `reads_from_replica` handler has read from the replica."""
+    return g.get("replica_read", False)
+
+
+def reads_from_replica(f):
+    @wraps(f)
+    def wrapper(*args, **kwargs):
+        router = current_app.extensions.get("replica_router")
+        g.replica_read = router is not None and router.use_replica()
+        if not g.replica_read:
+            return f(*args, **kwargs)
+
+        g.db_route = "replica"
+        try:
+            return f(*args, **kwargs)
+        except OperationalError as e:
+            current_app.logger.warning(f"Replica failed, reading from primary: {e}")
+            current_app.extensions["sqlalchemy"].session.rollback()
+            router.mark_down()
+            g.db_route = None
+            g.replica_read = False
+            return f(*args, **kwargs)
+        finally:
+            g.pop("db_route", None)
+
+    return wrapper
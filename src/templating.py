@@ -0,0 +1,42 @@
+# src/templating.py
+"""A Jinja bytecode cache shared by all workers, and template precompilation.
+
+Compiling a template to Python code is the slow part of its first render, and
+every freshly started (or recycled) gunicorn worker used to do it again. With
+TEMPLATE_CACHE_DIR set, compiled templates are written there and any process
+rendering the same template source loads the code instead of compiling it.
+`precompile_templates` (flask precompile_templates) fills the cache for
+every template, so an image can ship with it already warm.
+"""
+
+import os
+
+from jinja2 import FileSystemBytecodeCache
+
+
+class TemplateBytecodeCache(FileSystemBytecodeCache):
+    """Skips writing when the directory isn't writable, e.g. on a read-only
+    filesystem; the template is then compiled in memory as it would be without
+    a cache."""
+
+    def dump_bytecode(self, bucket):
+        try:
+            super().dump_bytecode(bucket)
+        except OSError:
+            pass
+
+
+def init_template_cache(app):
+    directory = app.config.get("TEMPLATE_CACHE_DIR")
+    if not directory:
+        return
+    os.makedirs(directory, exist_ok=True)
+    app.jinja_env.bytecode_cache = TemplateBytecodeCache(directory)
+
+
+def precompile_templates(app):
+    """Compiles every template of `app` into its bytecode cache; returns the names."""
+    names = app.jinja_env.list_templates()
+    for name in names:
+        app.jinja_env.get_template(name)
+    return names
@@ -0,0 +1,73 @@
+from datetime import datetime
+from uuid import UUID
+
+from flask import Blueprint, abort, current_app, render_template, request
+
+from src.api.crud import get_book_by_id, get_books_page, set_book_status
+from src.api.pagination import decode_cursor, encode_cursor
+from src.models.models import ReadingStatus
+
+blueprint = Blueprint("books", __name__, template_folder="templates")
+
+ROW_COLUMNS = ["id", "title", "author", "status", "rating", "updated_at"]
+ROWS_PER_PAGE = 50
+
+
+def render_row(book):
+    """The <tr> HTML for a book, rendered once per version of the book.
+
+    `book` is anything with the ROW_COLUMNS attributes: a row or a Book.
+    """
+    cache = current_app.extensions["fragment_cache"]
+    key = ("book_row", str(book.id), book.updated_at.isoformat())
+    entry = cache.get(key)
+    if entry is not None:
+        return entry[0]
+    html = render_template("books/_row.html", book=book, statuses=ReadingStatus)
+    cache.set(key, html, ())
+    return html
+
+
+def rows_page(cursor):
+    """The rendered rows after `cursor`, and the cursor of the page after them."""
+    after = None
+    if cursor:
+        try:
+            date_added, book_id = decode_cursor(cursor)
+            after = (datetime.fromisoformat(date_added), UUID(book_id))
+        except ValueError:
+            abort(400)
+    rows, has_more = get_books_page(ROWS_PER_PAGE, after, ROW_COLUMNS)
+    # rows end with (date_added, id) after the requested columns
+    next_cursor = encode_cursor(*rows[-1][-2:]) if has_more else None
+    return [render_row(row) for row in rows], next_cursor
+
+
+@blueprint.route("/books")
+def index():
+    current_app.logger.debug("Books route called")
+    rows, next_cursor = rows_page(None)
+    return render_template(
+        "books/index.html", page_name="Books", rows=rows, next_cursor=next_cursor
+    )
+
+
+@blueprint.route("/books/rows")
+def rows():
+    rows, next_cursor = rows_page(request.args.get("cursor"))
+    return render_template("books/_rows.html", rows=rows, next_cursor=next_cursor)
+
+
+@blueprint.route("/books/<uuid:book_id>/status", methods=["PUT"])
+def update_status(book_id):
+    try:
+        status = ReadingStatus(request.form.get("status"))
+    except ValueError:
+        abort(400)
+    book = get_book_by_id(book_id)
+    if not book:
+        abort(404)
+    book = set_book_status(book, status)
+    if book is None:
+        abort(404)
+    return render_row(book)
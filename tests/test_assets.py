@@ -0,0 +1,61 @@
+# src/tests/test_assets.py
+
+import gzip
+import json
+
+import brotli
+from flask import url_for
+
+from src.assets import build_assets
+
+
+def make_static(tmp_path):
+    (tmp_path / "js").mkdir()
+    (tmp_path / "js" / "app.js").write_text(
+        "// a comment to strip\nfunction greet(name) {\n    return 'hi ' + name;\n}\n"
+        * 20
+    )
+    (tmp_path / "site.css").write_text("body {\n    color: red;\n}\n")
+    return tmp_path
+
+
+def test_build_assets(tmp_path):
+    manifest = build_assets(make_static(tmp_path))
+    assert set(manifest) == {"js/app.js", "site.css"}
+    assert manifest["js/app.js"].startswith("dist/js/app.")
+
+    built = (tmp_path / manifest["js/app.js"]).read_bytes()
+    assert b"a comment to strip" not in built
+    assert (
+        gzip.decompress((tmp_path / f"{manifest['js/app.js']}.gz").read_bytes())
+        == built
+    )
+    assert not (tmp_path / f"{manifest['site.css']}.gz").exists()
+    assert json.loads((tmp_path / "dist" / "manifest.json").read_text()) == manifest
+
+    # unchanged content keeps its name
+    assert build_assets(tmp_path) == manifest
+
+
+def test_serve_hashed_assets(test_app, tmp_path, monkeypatch):
+    manifest = build_assets(make_static(tmp_path))
+    monkeypatch.setattr(test_app, "static_folder", str(tmp_path))
+    monkeypatch.setitem(test_app.extensions, "asset_manifest", manifest)
+
+    with test_app.test_request_context():
+        url = url_for("static", filename="js/app.js")
+    assert url == f"/static/{manifest['js/app.js']}"
+
+    client = test_app.test_client()
+    plain = client.get(url)
+    assert plain.headers["Cache-Control"] == "public, max-age=31536000, immutable"
+    assert "Content-Encoding" not in plain.headers
+
+    resp = client.get(url, headers={"Accept-Encoding": "gzip, br"})
+    assert resp.headers["Content-Encoding"] == "br"
+    assert resp.mimetype == "text/javascript"
+    assert "Accept-Encoding" in resp.headers["Vary"]
+    assert brotli.decompress(resp.data) == plain.data
+
+    resp = client.get("/static/site.css")
+    assert "immutable" not in resp.headers.get("Cache-Control", "")
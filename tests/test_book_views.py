@@ -0,0 +1,78 @@
+# src/tests/test_book_views.py
+
+import re
+
+from sqlalchemy import delete
+
+from src.models.models import Book
+from src.views import books
+
+
+def test_book_list_pages(test_app, test_database, add_book, monkeypatch):
+    monkeypatch.setattr(books, "ROWS_PER_PAGE", 2)
+    for i in range(3):
+        add_book(f"View Book {i}", "View Author")
+    client = test_app.test_client()
+
+    resp = client.get("/books")
+    assert resp.status_code == 200
+    html = resp.data.decode()
+    assert html.count('<tr id="book-') == 2
+    assert 'hx-trigger="revealed"' in html
+
+    # the sentinel row loads the next page in place of itself
+    next_page = re.search(r'hx-get="(/books/rows\?cursor=[^"]+)"', html).group(1)
+    resp = client.get(next_page.replace("&amp;", "&"))
+    assert resp.status_code == 200
+    html = resp.data.decode()
+    assert html.count('<tr id="book-') == 1
+    assert "View Book 2" in html
+    assert 'hx-trigger="revealed"' not in html
+
+    assert client.get("/books/rows?cursor=nonsense").status_code == 400
+    assert client.get("/books/rows?cursor=WzEsMl0").status_code == 400
+
+
+def test_rows_rendered_once_per_version(test_app, test_database, add_book):
+    book = add_book("Fragment Book", "Fragment Author")
+    cache = test_app.extensions["fragment_cache"]
+    client = test_app.test_client()
+
+    client.get("/books")
+    hits = cache.stats()["hits"]
+    client.get("/books")
+    assert cache.stats()["hits"] > hits
+
+    # changing the book changes updated_at, so its row is rendered afresh
+    resp = client.put(f"/books/{book.id}/status", data={"status": "reading"})
+    assert resp.status_code == 200
+    html = resp.data.decode()
+    assert html.startswith(f'<tr id="book-{book.id}">')
+    assert '<option value="reading" selected>' in html
+    assert "Fragment Book" in client.get("/books/rows").data.decode()
+
+
+def test_update_status_errors(test_app, test_database, add_book):
+    book = add_book("Status Book", "Status Author")
+    client = test_app.test_client()
+    resp = client.put(f"/books/{book.id}/status", data={"status": "shelved"})
+    assert resp.status_code == 400
+    resp = client.put(
+        "/books/00000000-0000-0000-0000-000000000000/status",
+        data={"status": "read"},
+    )
+    assert resp.status_code == 404
+
+
+def test_update_status_of_deleted_book(test_app, test_database, add_book, monkeypatch):
+    book = add_book("Status Deleted", "Status Author")
+    book_id = book.id
+    # the row goes after the view has loaded the book
+    monkeypatch.setattr(books, "get_book_by_id", lambda _: book)
+    test_database.session.execute(delete(Book).where(Book.id == book_id))
+    test_database.session.commit()
+
+    resp = test_app.test_client().put(
+        f"/books/{book_id}/status", data={"status": "read"}
+    )
+    assert resp.status_code == 404
@@ -1,12 +1,16 @@
 # src/tests/test_books.py
 
+import csv
+import io
 import json
 from http import HTTPStatus
 
 import pytest
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import delete, event
 
+import src.api.books
 from src.models.models import Book
 
 
@@ -69,12 +73,53 @@ def test_add_book_duplicate_title(test_app: Flask, test_database: SQLAlchemy):
     assert "Sorry. That title already exists." in data["message"]
 
 
+def test_add_books_bulk(test_app, test_database, add_book):
+    add_book("Already Shelved", "Existing Author")
+    client = test_app.test_client()
+    resp = client.post(
+        "/api/books/bulk",
+        data=json.dumps(
+            [
+                {"title": "Bulk Book One", "author": "Bulk Author", "rating": 4},
+                {"title": "Already Shelved", "author": "Existing Author"},
+                {"title": "Bulk Book One", "author": "Bulk Author"},
+                {"author": "No Title"},
+                {"title": "Bulk Book Two", "status": "read"},
+            ]
+        ),
+        content_type="application/json",
+    )
+    data = json.loads(resp.data.decode())
+    assert resp.status_code == HTTPStatus.OK
+    assert "2 of 5 books were added!" in data["message"]
+    statuses = [result["status"] for result in data["results"]]
+    assert statuses == ["created", "conflict", "conflict", "invalid", "created"]
+
+    book = test_database.session.get(Book, data["results"][4]["id"])
+    assert book.title == "Bulk Book Two"
+    assert book.status.value == "read"
+
+
+def test_add_books_bulk_ndjson(test_app, test_database):
+    client = test_app.test_client()
+    resp = client.post(
+        "/api/books/bulk",
+        data='{"title": "NDJSON Book"}\n{not json}\n',
+        content_type="application/x-ndjson",
+    )
+    data = json.loads(resp.data.decode())
+    assert resp.status_code == HTTPStatus.OK
+    assert [result["status"] for result in data["results"]] == ["created", "invalid"]
+    assert "invalid JSON" in data["results"][1]["message"]
+
+
 def test_single_book(test_app, test_database, add_book):
     book = add_book(title="jeffrey", author="jeffrey@testdriven.io")
     client = test_app.test_client()
     resp = client.get(f"/api/books/{book.id}")
     data = json.loads(resp.data.decode())
     assert resp.status_code == HTTPStatus.OK
+    assert resp.mimetype == "application/json"
     assert "jeffrey" in data["title"]
     assert "jeffrey@testdriven.io" in data["author"]
 
@@ -95,6 +140,7 @@ def test_all_books(test_app, test_database, add_book):
     resp = client.get("/api/books")
     data = json.loads(resp.data.decode())
     assert resp.status_code == HTTPStatus.OK
+    assert resp.mimetype == "application/json"
     assert len(data) == 2
     assert "The Omnivore's Dilemma" in data[0]["title"]
     assert "Michael Pollan" in data[0]["author"]
@@ -102,6 +148,205 @@ def test_all_books(test_app, test_database, add_book):
     assert "Ryan Holliday" in data[1]["author"]
 
 
+def test_all_books_paginated(test_app, test_database, add_book):
+    test_database.session.query(Book).delete()
+    for i in range(5):
+        add_book(f"Paged Book {i}", "Page Author")
+    client = test_app.test_client()
+
+    titles = []
+    cursor = ""
+    while True:
+        resp = client.get(f"/api/books?limit=2&cursor={cursor}")
+        data = json.loads(resp.data.decode())
+        assert resp.status_code == HTTPStatus.OK
+        assert len(data) <= 2
+        titles += [book["title"] for book in data]
+        cursor = resp.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+
+    assert titles == [f"Paged Book {i}" for i in range(5)]
+
+
+def test_all_books_sparse_fields(test_app, test_database, add_book):
+    test_database.session.query(Book).delete()
+    book = add_book("The Omnivore's Dilemma", "Michael Pollan")
+    book.notes = "Four meals."
+    test_database.session.commit()
+    client = test_app.test_client()
+
+    resp = client.get("/api/books?fields=title,status")
+    data = json.loads(resp.data.decode())
+    assert resp.status_code == HTTPStatus.OK
+    assert data == [
+        {"title": "The Omnivore's Dilemma", "status": "ReadingStatus.TO_READ"}
+    ]
+
+    resp = client.get(f"/api/books/{book.id}?fields=notes")
+    data = json.loads(resp.data.decode())
+    assert resp.status_code == HTTPStatus.OK
+    assert data == {"notes": "Four meals."}
+
+    resp = client.get(f"/api/books/{book.id}")
+    data = json.loads(resp.data.decode())
+    assert resp.status_code == HTTPStatus.OK
+    assert data["notes"] == "Four meals."
+
+
+def test_all_books_conditional_get(test_app, test_database, add_book):
+    test_database.session.query(Book).delete()
+    add_book("The Omnivore's Dilemma", "Michael Pollan")
+    book = add_book("The Obstacle is the Way", "Ryan Holliday")
+    client = test_app.test_client()
+
+    resp = client.get("/api/books")
+    etag = resp.headers["ETag"]
+    assert resp.status_code == HTTPStatus.OK
+    assert "Last-Modified" in resp.headers
+
+    resp = client.get("/api/books", headers={"If-None-Match": etag})
+    assert resp.status_code == HTTPStatus.NOT_MODIFIED
+
+    resp = client.get("/api/books?limit=1", headers={"If-None-Match": etag})
+    assert resp.status_code == HTTPStatus.OK
+
+    client.delete(f"/api/books/{book.id}")
+    resp = client.get("/api/books", headers={"If-None-Match": etag})
+    assert resp.status_code == HTTPStatus.OK
+    assert resp.headers["ETag"] != etag
+
+    # the ETag is built from the page, without counting the table
+    etag = resp.headers["ETag"]
+    statements = []
+
+    def count(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(test_database.engine, "before_cursor_execute", count)
+    try:
+        resp = client.get("/api/books", headers={"If-None-Match": etag})
+    finally:
+        event.remove(test_database.engine, "before_cursor_execute", count)
+    assert resp.status_code == HTTPStatus.NOT_MODIFIED
+    assert len(statements) == 1
+    assert "count(" not in statements[0]
+
+    # a book added after the last one on the page changes its next cursor
+    resp = client.get("/api/books?limit=1")
+    client.post("/api/books", json={"title": "Conditional Newer", "author": "A"})
+    resp = client.get(
+        "/api/books?limit=1", headers={"If-None-Match": resp.headers["ETag"]}
+    )
+    assert resp.status_code == HTTPStatus.OK
+    assert "X-Next-Cursor" in resp.headers
+
+
+def test_single_book_conditional_get(test_app, test_database, add_book):
+    book = add_book("Conditional Book", "Conditional Author")
+    client = test_app.test_client()
+
+    resp = client.get(f"/api/books/{book.id}")
+    etag = resp.headers["ETag"]
+    last_modified = resp.headers["Last-Modified"]
+    assert resp.status_code == HTTPStatus.OK
+
+    resp = client.get(f"/api/books/{book.id}", headers={"If-None-Match": etag})
+    assert resp.status_code == HTTPStatus.NOT_MODIFIED
+    resp = client.get(
+        f"/api/books/{book.id}", headers={"If-Modified-Since": last_modified}
+    )
+    assert resp.status_code == HTTPStatus.NOT_MODIFIED
+
+    client.put(
+        f"/api/books/{book.id}",
+        data=json.dumps({"title": "Conditional Book", "author": "New Author"}),
+        content_type="application/json",
+    )
+    resp = client.get(f"/api/books/{book.id}", headers={"If-None-Match": etag})
+    data = json.loads(resp.data.decode())
+    assert resp.status_code == HTTPStatus.OK
+    assert data["author"] == "New Author"
+
+
+def test_export_books_ndjson(test_app, test_database, add_book):
+    test_database.session.query(Book).delete()
+    book = add_book("The Omnivore's Dilemma", "Michael Pollan")
+    add_book("The Obstacle is the Way", "Ryan Holliday")
+    client = test_app.test_client()
+    resp = client.get("/api/books/export")
+    assert resp.status_code == HTTPStatus.OK
+    assert resp.mimetype == "application/x-ndjson"
+    rows = [json.loads(line) for line in resp.data.decode().splitlines()]
+    assert len(rows) == 2
+    assert rows[0]["id"] == str(book.id)
+    assert rows[0]["title"] == "The Omnivore's Dilemma"
+    assert rows[0]["status"] == "to_read"
+    assert rows[1]["author"] == "Ryan Holliday"
+
+
+def test_export_books_csv(test_app, test_database, add_book):
+    test_database.session.query(Book).delete()
+    add_book("The Omnivore's Dilemma", "Michael Pollan")
+    client = test_app.test_client()
+    resp = client.get("/api/books/export?format=csv")
+    assert resp.status_code == HTTPStatus.OK
+    assert resp.mimetype == "text/csv"
+    rows = list(csv.DictReader(io.StringIO(resp.data.decode())))
+    assert len(rows) == 1
+    assert rows[0]["title"] == "The Omnivore's Dilemma"
+    assert rows[0]["rating"] == ""
+
+
+def test_search_books(test_app, test_database, add_book):
+    test_database.session.query(Book).delete()
+    add_book("Cooked", "Michael Pollan")
+    book = add_book("The Botany of Desire", "Michael Pollan")
+    book.notes = "Four plants, including the potato and the apple."
+    add_book("The Obstacle is the Way", "Ryan Holliday")
+    test_database.session.commit()
+    client = test_app.test_client()
+
+    resp = client.get("/api/books/search?q=potato")
+    data = json.loads(resp.data.decode())
+    assert resp.status_code == HTTPStatus.OK
+    assert len(data) == 1
+    assert data[0]["book"]["title"] == "The Botany of Desire"
+    assert "<mark>potato</mark>" in data[0]["snippet"]
+
+    resp = client.get("/api/books/search?q=pollan&limit=1")
+    data = json.loads(resp.data.decode())
+    assert resp.status_code == HTTPStatus.OK
+    assert len(data) == 1
+    cursor = resp.headers["X-Next-Cursor"]
+    resp = client.get(f"/api/books/search?q=pollan&limit=1&cursor={cursor}")
+    next_data = json.loads(resp.data.decode())
+    assert len(next_data) == 1
+    assert next_data[0]["book"]["id"] != data[0]["book"]["id"]
+    assert "X-Next-Cursor" not in resp.headers
+
+
+def test_search_snippet_escapes_notes(test_app, test_database, add_book):
+    book = add_book("Markup in Notes", "Test Author")
+    book.notes = (
+        "<script>alert(1)</script> a turnip & "
+        '<img src=x onerror="alert(2)"> another turnip'
+    )
+    test_database.session.commit()
+    client = test_app.test_client()
+
+    resp = client.get("/api/books/search?q=turnip")
+    snippet = resp.json[0]["snippet"]
+    assert "<script>" not in snippet
+    assert "<img" not in snippet
+    assert "script&gt;alert(1)&lt;/script&gt;" in snippet
+    assert "&lt;img src=x onerror=&#34;alert(2)&#34;&gt;" in snippet
+    assert "&amp;" in snippet
+    assert snippet.count("<mark>turnip</mark>") == 2
+    # the notes themselves are returned as stored
+    assert resp.json[0]["book"]["notes"] == book.notes
+
+
 def test_remove_book(test_app, test_database, add_book):
     test_database.session.query(Book).delete()
     book = add_book("book-to-be-removed", "remove-author")
@@ -190,7 +435,7 @@ def test_update_book_invalid(
 
 def test_update_book_duplicate_email(test_app, test_database, add_book):
     add_book("Duplicate Book", "Test Author")
-    book = add_book("Duplicate Book", "Test Author")
+    book = add_book("Another Book", "Test Author")
 
     client = test_app.test_client()
     resp = client.put(
@@ -201,3 +446,293 @@ def test_update_book_duplicate_email(test_app, test_database, add_book):
     data = json.loads(resp.data.decode())
     assert resp.status_code == HTTPStatus.CONFLICT
     assert "Sorry. That book already exists." in data["message"]
+
+
+def test_update_book_deleted_meanwhile(test_app, test_database, add_book, monkeypatch):
+    book = add_book("Deleted Meanwhile", "Test Author")
+    book_id = book.id
+    # the row goes after the handler has loaded the book
+    monkeypatch.setattr(src.api.books, "get_book_by_id", lambda _: book)
+    test_database.session.execute(delete(Book).where(Book.id == book_id))
+    test_database.session.commit()
+
+    client = test_app.test_client()
+    resp = client.put(
+        f"/api/books/{book_id}",
+        data=json.dumps({"title": "Deleted Meanwhile", "author": "Someone"}),
+        content_type="application/json",
+    )
+    assert resp.status_code == HTTPStatus.NOT_FOUND
+    assert f"Book {book_id} does not exist" in resp.json["message"]
+
+
+def test_patch_book(test_app, test_database, add_book):
+    book = add_book("book-to-be-patched", "patch-author")
+    client = test_app.test_client()
+    before = client.get(f"/api/books/{book.id}").json
+
+    statements = []
+
+    def count(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(test_database.engine, "before_cursor_execute", count)
+    try:
+        resp = client.patch(
+            f"/api/books/{book.id}",
+            json={
+                "status": "read",
+                "rating": 4,
+                "date_read": "2024-03-01T00:00:00",
+                "author": None,
+                "unknown": "ignored",
+            },
+        )
+    finally:
+        event.remove(test_database.engine, "before_cursor_execute", count)
+    assert resp.status_code == HTTPStatus.OK
+    assert resp.mimetype == "application/json"
+    assert resp.headers["ETag"]
+    # the update, then the statistics
+    assert len(statements) == 2
+    assert statements[0].startswith("WITH locked AS")
+    assert "RETURNING" in statements[0]
+    assert resp.json["title"] == "book-to-be-patched"
+    assert resp.json["author"] is None
+    assert resp.json["status"] == "ReadingStatus.READ"
+    assert resp.json["rating"] == 4
+    assert resp.json["date_read"] == "2024-03-01T00:00:00"
+
+    after = client.get(f"/api/books/{book.id}").json
+    assert after == resp.json
+    assert after["date_added"] == before["date_added"]
+    test_database.session.rollback()
+    patched = test_database.session.get(Book, book.id)
+    assert patched.updated_at >= patched.date_added
+
+
+def test_patch_book_same_title(test_app, test_database, add_book):
+    book = add_book("Patch Same Title", "Test Author")
+    client = test_app.test_client()
+    resp = client.patch(
+        f"/api/books/{book.id}", json={"title": "Patch Same Title", "genre": "essay"}
+    )
+    assert resp.status_code == HTTPStatus.OK
+    assert resp.json["genre"] == "essay"
+
+
+@pytest.mark.parametrize(
+    "payload, status_code, message",
+    [
+        [{}, HTTPStatus.BAD_REQUEST, "Nothing to update"],
+        [{"tite": "Typo"}, HTTPStatus.BAD_REQUEST, "Nothing to update"],
+        [{"title": ""}, HTTPStatus.BAD_REQUEST, "title cannot be empty"],
+        [{"rating": 6}, HTTPStatus.BAD_REQUEST, "rating: must be between 1 and 5"],
+        [{"status": "lost"}, HTTPStatus.BAD_REQUEST, "status:"],
+        [{"status": None}, HTTPStatus.BAD_REQUEST, "not-null constraint"],
+        [{"title": "Patch Taken"}, HTTPStatus.CONFLICT, "already exists"],
+    ],
+)
+def test_patch_book_invalid(
+    test_app, test_database, add_book, payload, status_code, message
+):
+    if not Book.query.filter_by(title="Patch Taken").first():
+        add_book("Patch Taken", "Test Author")
+    book = add_book(f"Patch Invalid {len(Book.query.all())}", "Test Author")
+    client = test_app.test_client()
+    resp = client.patch(f"/api/books/{book.id}", json=payload)
+    assert resp.status_code == status_code
+    assert message in resp.json["message"]
+    test_database.session.rollback()
+    assert test_database.session.get(Book, book.id).title == book.title
+
+
+@pytest.mark.parametrize(
+    "book_id", ["0787133b-cb55-4a31-9480-1e04b7b72898", "not-a-uuid"]
+)
+def test_patch_book_not_found(test_app, test_database, book_id):
+    client = test_app.test_client()
+    resp = client.patch(f"/api/books/{book_id}", json={"title": "Nowhere"})
+    assert resp.status_code == HTTPStatus.NOT_FOUND
+    assert f"Book {book_id} does not exist" in resp.json["message"]
+
+
+def add_series(client, genre, count, **fields):
+    books = [
+        {"title": f"{genre} {index}", "genre": genre, "author": "Series Author"}
+        | fields
+        for index in range(count)
+    ]
+    resp = client.post("/api/books/bulk", json=books)
+    return [result["id"] for result in resp.json["results"]]
+
+
+def test_patch_books_by_filter(test_app, test_database):
+    client = test_app.test_client()
+    ids = add_series(client, "Bulk Patch Series", 3)
+    client.patch(f"/api/books/{ids[0]}", json={"status": "read"})
+
+    resp = client.patch(
+        "/api/books?genre=Bulk Patch Series&dry_run=true", json={"status": "read"}
+    )
+    assert resp.status_code == HTTPStatus.OK
+    assert resp.json == {
+        "message": "2 books would be updated.",
+        "count": 2,
+        "dry_run": True,
+    }
+
+    statements = []
+
+    def count(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(test_database.engine, "before_cursor_execute", count)
+    try:
+        resp = client.patch(
+            "/api/books?genre=Bulk Patch Series&author=Series Author",
+            json={"status": "read", "rating": 4},
+        )
+    finally:
+        event.remove(test_database.engine, "before_cursor_execute", count)
+    assert resp.status_code == HTTPStatus.OK
+    assert resp.json["count"] == 3
+    assert resp.json["dry_run"] is False
+    # the update, then the statistics
+    assert len(statements) == 2
+    assert statements[0].startswith("WITH locked AS")
+
+    rows = client.get(f"/api/books?ids={','.join(ids)}").json
+    assert {row["book"]["rating"] for row in rows} == {4}
+    assert {row["book"]["status"] for row in rows} == {"ReadingStatus.READ"}
+
+    resp = client.patch(
+        f"/api/books?status=read&ids={ids[1]}", json={"genre": "Bulk Patch Done"}
+    )
+    assert resp.json["count"] == 1
+    assert client.get(f"/api/books/{ids[1]}").json["genre"] == "Bulk Patch Done"
+
+
+def test_delete_books_by_filter(test_app, test_database):
+    client = test_app.test_client()
+    ids = add_series(client, "Bulk Delete Series", 3)
+    add_series(client, "Bulk Delete Kept", 1)
+
+    resp = client.delete("/api/books?genre=Bulk Delete Series&dry_run=1")
+    assert resp.json == {
+        "message": "3 books would be removed.",
+        "count": 3,
+        "dry_run": True,
+    }
+    assert client.get(f"/api/books/{ids[0]}").status_code == HTTPStatus.OK
+
+    resp = client.delete("/api/books?genre=Bulk Delete Series")
+    assert resp.status_code == HTTPStatus.OK
+    assert resp.json["message"] == "3 books were removed."
+    for book_id in ids:
+        assert client.get(f"/api/books/{book_id}").status_code == HTTPStatus.NOT_FOUND
+    assert client.delete("/api/books?genre=Bulk Delete Kept").json["count"] == 1
+
+
+def test_bulk_write_capped(test_app, test_database, monkeypatch):
+    client = test_app.test_client()
+    ids = add_series(client, "Bulk Capped Series", 3)
+    monkeypatch.setitem(test_app.config, "BULK_MAX_AFFECTED_ROWS", 2)
+
+    for method, body in [("patch", {"rating": 2}), ("delete", None)]:
+        for query in ["&dry_run=true", ""]:
+            resp = client.open(
+                f"/api/books?genre=Bulk Capped Series{query}", method=method, json=body
+            )
+            assert resp.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+            assert "more than 2 books" in resp.json["message"]
+
+    rows = client.get(f"/api/books?ids={','.join(ids)}").json
+    assert [row["book"]["rating"] for row in rows] == [None, None, None]
+    resp = client.patch(f"/api/books?ids={ids[0]},{ids[1]}", json={"rating": 2})
+    assert resp.json["count"] == 2
+
+
+@pytest.mark.parametrize(
+    "query, payload, status_code, message",
+    [
+        ["", {"rating": 2}, HTTPStatus.BAD_REQUEST, "Give at least one of"],
+        ["?ids=nope", {"rating": 2}, HTTPStatus.BAD_REQUEST, "Invalid ids: nope"],
+        ["?status=lost", {"rating": 2}, HTTPStatus.BAD_REQUEST, "status"],
+        ["?genre=Bulk Invalid", {}, HTTPStatus.BAD_REQUEST, "Nothing to update"],
+        ["?genre=Bulk Invalid", {"rating": 9}, HTTPStatus.BAD_REQUEST, "rating:"],
+        ["?genre=Bulk Invalid", {"title": "Same"}, HTTPStatus.CONFLICT, "exists"],
+    ],
+)
+def test_patch_books_invalid(
+    test_app, test_database, query, payload, status_code, message
+):
+    client = test_app.test_client()
+    if not Book.query.filter_by(genre="Bulk Invalid").first():
+        add_series(client, "Bulk Invalid", 2)
+    resp = client.patch(f"/api/books{query}", json=payload)
+    assert resp.status_code == status_code
+    assert message in json.dumps(resp.json)
+    test_database.session.rollback()
+    assert {book.title for book in Book.query.filter_by(genre="Bulk Invalid")} == {
+        "Bulk Invalid 0",
+        "Bulk Invalid 1",
+    }
+
+
+def test_get_books_by_ids(test_app, test_database, add_book):
+    first = add_book("Multi-get First", "Author One")
+    second = add_book("Multi-get Second", "Author Two")
+    missing = "0787133b-cb55-4a31-9480-1e04b7b72898"
+    first_id, second_id = str(first.id), str(second.id)
+    client = test_app.test_client()
+
+    statements = []
+
+    def count(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(test_database.engine, "before_cursor_execute", count)
+    try:
+        resp = client.get(f"/api/books?ids={second_id},{missing},{first_id}")
+    finally:
+        event.remove(test_database.engine, "before_cursor_execute", count)
+    assert resp.status_code == HTTPStatus.OK
+    assert len(statements) == 1
+    assert [(r["id"], r["found"]) for r in resp.json] == [
+        (second_id, True),
+        (missing, False),
+        (first_id, True),
+    ]
+    assert resp.json[0]["book"]["title"] == "Multi-get Second"
+    assert resp.json[1]["book"] is None
+
+    resp = client.get(f"/api/books?ids={first.id},{first.id}&fields=title")
+    assert (
+        resp.json
+        == [{"id": str(first.id), "found": True, "book": {"title": "Multi-get First"}}]
+        * 2
+    )  # noqa: E501
+
+
+def test_lookup_books(test_app, test_database, add_book):
+    book = add_book("Multi-get Posted", "Author Three")
+    client = test_app.test_client()
+    resp = client.post("/api/books/lookup", json={"ids": [str(book.id)]})
+    assert resp.status_code == HTTPStatus.OK
+    assert resp.json[0]["book"]["author"] == "Author Three"
+
+    resp = client.post("/api/books/lookup", json={"ids": []})
+    assert resp.status_code == HTTPStatus.BAD_REQUEST
+
+
+def test_get_books_by_ids_invalid(test_app, test_database, monkeypatch):
+    client = test_app.test_client()
+    resp = client.get("/api/books?ids=0787133b-cb55-4a31-9480-1e04b7b72898,nope")
+    assert resp.status_code == HTTPStatus.BAD_REQUEST
+    assert "Invalid ids: nope" in resp.json["message"]
+
+    monkeypatch.setitem(test_app.config, "API_PAGE_SIZE_MAX", 2)
+    ids = ["0787133b-cb55-4a31-9480-1e04b7b72898"] * 3
+    resp = client.post("/api/books/lookup", json={"ids": ids})
+    assert resp.status_code == HTTPStatus.BAD_REQUEST
@@ -10,13 +10,9 @@ import src.api.books
 
 
 def test_add_book(test_app, monkeypatch):
-    def mock_get_book_by_title(author):
-        return None
-
     def mock_add_book(title, author):
         return True
 
-    monkeypatch.setattr(src.api.books, "get_book_by_title", mock_get_book_by_title)
     monkeypatch.setattr(src.api.books, "add_book", mock_add_book)
 
     client = test_app.test_client()
@@ -55,13 +51,9 @@ def test_add_book_invalid_json_keys(test_app, monkeypatch):
 
 
 def test_add_book_duplicate_title(test_app, monkeypatch):
-    def mock_get_book_by_title(title):
-        return True
-
     def mock_add_book(title, author):
-        return True
+        return None
 
-    monkeypatch.setattr(src.api.books, "get_book_by_title", mock_get_book_by_title)
     monkeypatch.setattr(src.api.books, "add_book", mock_add_book)
     client = test_app.test_client()
     resp1 = client.post(
@@ -83,29 +75,106 @@ def test_add_book_duplicate_title(test_app, monkeypatch):
     assert "Sorry. That title already exists." in data2["message"]
 
 
+def test_add_books_bulk(test_app, monkeypatch):
+    def mock_add_books(rows):
+        return rows[:1]
+
+    monkeypatch.setattr(src.api.books, "add_books", mock_add_books)
+    client = test_app.test_client()
+    resp = client.post(
+        "/api/books/bulk",
+        data=json.dumps(
+            [
+                {"title": "Cooked", "author": "Michael Pollan"},
+                {"title": "Cooked", "author": "Michael Pollan"},
+                {"title": "Rated", "rating": 9},
+            ]
+        ),
+        content_type="application/json",
+    )
+    data = json.loads(resp.data.decode())
+    assert resp.status_code == HTTPStatus.OK
+    assert "1 of 3 books were added!" in data["message"]
+    assert data["results"][0]["status"] == "created"
+    assert data["results"][1]["status"] == "conflict"
+    assert data["results"][2]["status"] == "invalid"
+    assert "rating: must be between 1 and 5" in data["results"][2]["message"]
+
+
+@pytest.mark.parametrize(
+    "payload, status_code, message",
+    [
+        [{"title": "Cooked"}, HTTPStatus.BAD_REQUEST, "Expected a JSON array"],
+        [
+            [{"title": "Cooked"}] * 3,
+            HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+            "At most 2 books can be added at once.",
+        ],
+    ],
+)
+def test_add_books_bulk_invalid(test_app, monkeypatch, payload, status_code, message):
+    monkeypatch.setitem(test_app.config, "BULK_MAX_BATCH_SIZE", 2)
+    client = test_app.test_client()
+    resp = client.post(
+        "/api/books/bulk",
+        data=json.dumps(payload),
+        content_type="application/json",
+    )
+    data = json.loads(resp.data.decode())
+    assert resp.status_code == status_code
+    assert message in data["message"]
+
+
 def test_single_book(test_app, monkeypatch):
-    def mock_get_book_by_id(book_id):
-        return {
+    def mock_get_book_row(book_id, columns):
+        book = {
             "id": "0787133b-cb55-4a31-9480-1e04b7b72898",
             "title": "jeffrey",
             "author": "jeffrey@testdriven.io",
-            "created_date": datetime.now(),
+            "updated_at": datetime(2024, 5, 1, 12, 30),
         }
+        return tuple(book.get(column) for column in [*columns, "updated_at"])
 
-    monkeypatch.setattr(src.api.books, "get_book_by_id", mock_get_book_by_id)
+    monkeypatch.setattr(src.api.books, "get_book_row", mock_get_book_row)
     client = test_app.test_client()
     resp = client.get("/api/books/0787133b-cb55-4a31-9480-1e04b7b72898")
     data = json.loads(resp.data.decode())
     assert resp.status_code == HTTPStatus.OK
     assert "jeffrey" in data["title"]
     assert "jeffrey@testdriven.io" in data["author"]
+    assert resp.headers["Last-Modified"] == "Wed, 01 May 2024 12:30:00 GMT"
+
+
+def test_single_book_not_modified(test_app, monkeypatch):
+    def mock_get_book_updated_at(book_id):
+        return datetime(2024, 5, 1, 12, 30)
+
+    def mock_get_book_row(book_id, columns):
+        raise AssertionError("the book should not be loaded")
+
+    monkeypatch.setattr(src.api.books, "get_book_updated_at", mock_get_book_updated_at)
+    monkeypatch.setattr(src.api.books, "get_book_row", mock_get_book_row)
+    client = test_app.test_client()
+    resp = client.get(
+        "/api/books/0787133b-cb55-4a31-9480-1e04b7b72898",
+        headers={"If-Modified-Since": "Wed, 01 May 2024 12:30:00 GMT"},
+    )
+    assert resp.status_code == HTTPStatus.NOT_MODIFIED
+    assert resp.data == b""
+    etag = resp.headers["ETag"]
+
+    resp = client.get(
+        "/api/books/0787133b-cb55-4a31-9480-1e04b7b72898",
+        headers={"If-None-Match": etag},
+    )
+    assert resp.status_code == HTTPStatus.NOT_MODIFIED
 
 
 def test_single_book_incorrect_id(test_app, monkeypatch):
-    def mock_get_book_by_id(book_id):
+    def mock_get_book_row(book_id, columns):
         return None
 
-    monkeypatch.setattr(src.api.books, "get_book_by_id", mock_get_book_by_id)
+    monkeypatch.setattr(src.api.books, "get_book_row", mock_get_book_row)
     client = test_app.test_client()
     resp = client.get("/api/books/0787133b-cb55-4a31-9480-1e04b7b72898")
     data = json.loads(resp.data.decode())
@@ -114,23 +183,28 @@ def test_single_book_incorrect_id(test_app, monkeypatch):
 
 
 def test_all_books(test_app, monkeypatch):
-    def mock_get_all_books():
-        return [
+    def mock_get_books_page(limit, after, columns):
+        books = [
             {
                 "id": "0787133b-cb55-4a31-9480-1e04b7b72898",
                 "title": "michael",
                 "author": "michael@mherman.org",
-                "created_date": datetime.now(),
             },
             {
                 "id": "0787133b-cb55-4a31-9480-1e04b7b72899",
                 "title": "fletcher",
                 "author": "fletcher@notreal.com",
-                "created_date": datetime.now(),
             },
         ]
+        # rows end with the book's updated_at, date_added and id
+        keys = ["updated_at", "date_added", "id"]
+        now = datetime.now()
+        books = [book | {"updated_at": now, "date_added": now} for book in books]
+        return [
+            tuple(book.get(column) for column in [*columns, *keys]) for book in books
+        ], False
 
-    monkeypatch.setattr(src.api.books, "get_all_books", mock_get_all_books)
+    monkeypatch.setattr(src.api.books, "get_books_page", mock_get_books_page)
     client = test_app.test_client()
     resp = client.get("/api/books")
     data = json.loads(resp.data.decode())
@@ -140,6 +214,86 @@ def test_all_books(test_app, monkeypatch):
     assert "michael@mherman.org" in data[0]["author"]
     assert "fletcher" in data[1]["title"]
     assert "fletcher@notreal.com" in data[1]["author"]
+    assert "X-Next-Cursor" not in resp.headers
+
+
+@pytest.mark.parametrize(
+    "query, message",
+    [
+        ["limit=0", "limit must be a positive integer"],
+        ["cursor=not-a-cursor", "invalid cursor"],
+        # well-formed cursors of non-strings: [1,2], [[1],"x"] and ["x",null]
+        ["cursor=WzEsMl0", "invalid cursor"],
+        ["cursor=W1sxXSwieCJd", "invalid cursor"],
+        ["cursor=WyJ4IixudWxsXQ", "invalid cursor"],
+        ["fields=title,isbn", "Unknown fields: isbn"],
+    ],
+)
+def test_all_books_invalid_page_args(test_app, query, message):
+    client = test_app.test_client()
+    resp = client.get(f"/api/books?{query}")
+    data = json.loads(resp.data.decode())
+    assert resp.status_code == HTTPStatus.BAD_REQUEST
+    assert message in data["message"]
+
+
+def test_search_books(test_app, monkeypatch):
+    def mock_search_books(text, limit, after):
+        book = {
+            "id": "0787133b-cb55-4a31-9480-1e04b7b72898",
+            "title": "Cooked",
+            "author": "Michael Pollan",
+        }
+        return [(book, 0.5, "a <mark>cooked</mark> meal")], False
+
+    monkeypatch.setattr(src.api.books, "search_books", mock_search_books)
+    client = test_app.test_client()
+    resp = client.get("/api/books/search?q=cooked")
+    data = json.loads(resp.data.decode())
+    assert resp.status_code == HTTPStatus.OK
+    assert "Cooked" in data[0]["book"]["title"]
+    assert data[0]["rank"] == 0.5
+    assert "<mark>cooked</mark>" in data[0]["snippet"]
+
+
+def test_search_books_missing_query(test_app):
+    client = test_app.test_client()
+    resp = client.get("/api/books/search")
+    data = json.loads(resp.data.decode())
+    assert resp.status_code == HTTPStatus.BAD_REQUEST
+    assert "Input payload validation failed" in data["message"]
+
+
+def test_search_books_invalid_cursor(test_app):
+    client = test_app.test_client()
+    resp = client.get("/api/books/search?q=cooked&cursor=W1sxXSwieCJd")
+    data = json.loads(resp.data.decode())
+    assert resp.status_code == HTTPStatus.BAD_REQUEST
+    assert "invalid cursor" in data["message"]
+
+
+def test_export_books(test_app, monkeypatch):
+    def mock_stream_books(columns, batch_size):
+        yield {column: None for column in columns} | {
+            "id": "0787133b-cb55-4a31-9480-1e04b7b72898",
+            "title": "michael",
+        }
+
+    monkeypatch.setattr(src.api.books, "stream_books", mock_stream_books)
+    client = test_app.test_client()
+    resp = client.get("/api/books/export")
+    data = json.loads(resp.data.decode())
+    assert resp.status_code == HTTPStatus.OK
+    assert "attachment; filename=books.ndjson" == resp.headers["Content-Disposition"]
+    assert "michael" in data["title"]
+
+
+def test_export_books_invalid_format(test_app):
+    client = test_app.test_client()
+    resp = client.get("/api/books/export?format=xml")
+    data = json.loads(resp.data.decode())
+    assert resp.status_code == HTTPStatus.BAD_REQUEST
+    assert "Input payload validation failed" in data["message"]
 
 
 def test_remove_book(test_app, monkeypatch):
@@ -203,11 +357,12 @@ def test_update_book(test_app, monkeypatch):
     def mock_update_book(book, title, author):
         return True
 
-    def mock_get_book_by_title(title):
-        return None
+    def mock_get_book_row(book_id, columns):
+        book = mock_get_book_by_id(book_id)
+        return tuple(book.get(column) for column in [*columns, "updated_at"])
 
     monkeypatch.setattr(src.api.books, "get_book_by_id", mock_get_book_by_id)
-    monkeypatch.setattr(src.api.books, "get_book_by_title", mock_get_book_by_title)
+    monkeypatch.setattr(src.api.books, "get_book_row", mock_get_book_row)
     monkeypatch.setattr(src.api.books, "update_book", mock_update_book)
     client = test_app.test_client()
     resp_one = client.put(
@@ -284,13 +439,9 @@ def test_update_book_duplicate_author(test_app, monkeypatch):
         return d
 
     def mock_update_book(book, title, author):
-        return True
-
-    def mock_get_book_by_title(author):
-        return True
+        return False
 
     monkeypatch.setattr(src.api.books, "get_book_by_id", mock_get_book_by_id)
-    monkeypatch.setattr(src.api.books, "get_book_by_title", mock_get_book_by_title)
     monkeypatch.setattr(src.api.books, "update_book", mock_update_book)
     client = test_app.test_client()
     resp = client.put(
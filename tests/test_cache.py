@@ -0,0 +1,166 @@
+# src/tests/test_cache.py
+
+import json
+from datetime import datetime
+
+import src.api.books
+from src.api.cache import ResponseCache, invalidate
+from src.models.models import BookStat
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_cache_hit_and_miss():
+    cache = ResponseCache(ttl=10, max_bytes=100)
+    assert cache.get(("books", None, "/api/books?")) is None
+    cache.set(("books", None, "/api/books?"), b"[]", [])
+    assert cache.get(("books", None, "/api/books?")) == (b"[]", [])
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_cache_expires_entries():
+    clock = FakeClock()
+    cache = ResponseCache(ttl=10, max_bytes=100, clock=clock)
+    cache.set(("books", None, "/"), b"[]", [])
+    clock.now = 10
+    assert cache.get(("books", None, "/")) is None
+    assert cache.stats()["bytes"] == 0
+
+
+def test_cache_evicts_least_recently_used():
+    cache = ResponseCache(ttl=10, max_bytes=10)
+    cache.set(("books", None, "/a"), b"aaaa", [])
+    cache.set(("books", None, "/b"), b"bbbb", [])
+    cache.get(("books", None, "/a"))
+    cache.set(("books", None, "/c"), b"cccc", [])
+    assert cache.get(("books", None, "/b")) is None
+    assert cache.get(("books", None, "/a")) is not None
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["bytes"] == 8
+
+    cache.set(("books", None, "/huge"), b"x" * 11, [])
+    assert cache.get(("books", None, "/huge")) is None
+
+
+def test_cache_invalidate_item():
+    cache = ResponseCache(ttl=10, max_bytes=100)
+    cache.set(("books", None, "/api/books?"), b"[]", [])
+    cache.set(("books", "1", "/api/books/1?"), b"{}", [])
+    cache.set(("books", "2", "/api/books/2?"), b"{}", [])
+    cache.set(("users", None, "/api/users?"), b"[]", [])
+    cache.invalidate("books", "1")
+    assert cache.get(("books", None, "/api/books?")) is None
+    assert cache.get(("books", "1", "/api/books/1?")) is None
+    assert cache.get(("books", "2", "/api/books/2?")) is not None
+    assert cache.get(("users", None, "/api/users?")) is not None
+
+
+def test_cached_endpoint(test_app, monkeypatch):
+    calls = []
+
+    def mock_get_book_row(book_id, columns):
+        calls.append(book_id)
+        book = {"title": "Cached", "author": "Cache Author"}
+        return (*[book.get(column) for column in columns], datetime(2024, 5, 1))
+
+    def mock_get_book_by_id(book_id):
+        return src.api.books.Book(title="Cached", author="Cache Author")
+
+    def mock_update_book(book, title, author):
+        invalidate("books", "0787133b-cb55-4a31-9480-1e04b7b72898")
+        return book
+
+    monkeypatch.setattr(src.api.books, "get_book_row", mock_get_book_row)
+    monkeypatch.setattr(src.api.books, "get_book_by_id", mock_get_book_by_id)
+    monkeypatch.setattr(src.api.books, "update_book", mock_update_book)
+    monkeypatch.setitem(test_app.config, "RESPONSE_CACHE_ENABLED", True)
+    test_app.extensions["response_cache"].clear()
+    client = test_app.test_client()
+
+    url = "/api/books/0787133B-CB55-4A31-9480-1E04B7B72898"
+    first = client.get(url)
+    second = client.get(url)
+    assert first.status_code == second.status_code == 200
+    assert first.data == second.data
+    assert second.headers["ETag"] == first.headers["ETag"]
+    assert len(calls) == 1
+
+    resp = client.get(url, headers={"If-None-Match": first.headers["ETag"]})
+    assert resp.status_code == 304
+    assert len(calls) == 1
+
+    client.put(
+        url,
+        data=json.dumps({"title": "Cached", "author": "New Author"}),
+        content_type="application/json",
+    )
+    client.get(url)
+    assert len(calls) == 2
+
+    resp = client.get("/api/cache")
+    data = json.loads(resp.data.decode())
+    assert data["enabled"]
+    assert data["hits"] >= 2
+    assert data["invalidations"] >= 1
+
+
+def test_cached_search(test_app, monkeypatch):
+    calls = []
+
+    def mock_search_books(text, limit, after):
+        calls.append(text)
+        book = src.api.books.Book(title="Dune", author="Frank Herbert")
+        return [(book, 0.5, "<mark>Dune</mark>")], False
+
+    monkeypatch.setattr(src.api.books, "search_books", mock_search_books)
+    monkeypatch.setitem(test_app.config, "RESPONSE_CACHE_ENABLED", True)
+    test_app.extensions["response_cache"].clear()
+    client = test_app.test_client()
+
+    first = client.get("/api/books/search?q=dune")
+    second = client.get("/api/books/search?q=dune")
+    assert first.status_code == second.status_code == 200
+    assert first.mimetype == "application/json"
+    assert first.json[0]["book"]["title"] == "Dune"
+    assert first.json[0]["rank"] == 0.5
+    assert second.data == first.data
+    assert len(calls) == 1
+
+
+def test_cached_stats(test_app, monkeypatch):
+    calls = []
+
+    def mock_get_book_stats():
+        calls.append(1)
+        return {
+            "total": [BookStat(dimension="total", key="", books=2, rating_sum=8,
+                               rating_count=2)],
+            "status": [BookStat(dimension="status", key="READ", books=2,
+                                rating_sum=8, rating_count=2)],
+            "genre": [],
+            "type_read": [],
+            "month_read": [],
+        }  # fmt: skip
+
+    monkeypatch.setattr(src.api.books, "get_book_stats", mock_get_book_stats)
+    monkeypatch.setitem(test_app.config, "RESPONSE_CACHE_ENABLED", True)
+    test_app.extensions["response_cache"].clear()
+    client = test_app.test_client()
+
+    first = client.get("/api/books/stats")
+    second = client.get("/api/books/stats")
+    assert first.status_code == second.status_code == 200
+    assert first.json["books"] == 2
+    assert first.json["average_rating"] == 4
+    assert first.json["by_status"] == [
+        {"key": "read", "books": 2, "rated": 2, "average_rating": 4}
+    ]
+    assert second.data == first.data
+    assert len(calls) == 1
@@ -0,0 +1,67 @@
+# src/tests/test_compression.py
+
+import gzip
+
+import brotli
+from flask import Response
+
+from src.compression import compress_response
+
+
+def add_books(add_book, prefix):
+    for i in range(30):
+        add_book(f"{prefix} Compressed Book {i}", "A Rather Repetitive Author")
+
+
+def test_gzip_list(test_app, test_database, add_book):
+    add_books(add_book, "gzip")
+    client = test_app.test_client()
+    plain = client.get("/api/books")
+    resp = client.get("/api/books", headers={"Accept-Encoding": "gzip"})
+    assert resp.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in resp.headers["Vary"]
+    assert len(resp.data) < len(plain.data) / 4
+    assert gzip.decompress(resp.data) == plain.data
+
+    # compressed bytes get a weak ETag, which still validates
+    assert resp.headers["ETag"] == "W/" + plain.headers["ETag"]
+    resp = client.get(
+        "/api/books",
+        headers={"Accept-Encoding": "gzip", "If-None-Match": resp.headers["ETag"]},
+    )
+    assert resp.status_code == 304
+
+
+def test_brotli_preferred(test_app, test_database, add_book):
+    add_books(add_book, "br")
+    client = test_app.test_client()
+    plain = client.get("/api/books")
+    resp = client.get("/api/books", headers={"Accept-Encoding": "gzip, br"})
+    assert resp.headers["Content-Encoding"] == "br"
+    assert brotli.decompress(resp.data) == plain.data
+
+    resp = client.get("/api/books", headers={"Accept-Encoding": "br;q=0, gzip"})
+    assert resp.headers["Content-Encoding"] == "gzip"
+
+
+def test_not_compressed(test_app, test_database):
+    client = test_app.test_client()
+    resp = client.get("/ping", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in resp.headers
+
+    resp = client.get("/api/books", headers={"Accept-Encoding": "identity"})
+    assert "Content-Encoding" not in resp.headers
+
+    with test_app.test_request_context(headers={"Accept-Encoding": "gzip"}):
+        image = compress_response(Response(b"\x89PNG" * 1000, mimetype="image/png"))
+        assert "Content-Encoding" not in image.headers
+
+
+def test_streamed_export(test_app, test_database):
+    client = test_app.test_client()
+    # read each stream before the next request; the tests share one app context
+    plain = client.get("/api/books/export").data
+    resp = client.get("/api/books/export", headers={"Accept-Encoding": "gzip"})
+    assert resp.headers["Content-Encoding"] == "gzip"
+    assert "Content-Length" not in resp.headers
+    assert gzip.decompress(resp.data) == plain
@@ -0,0 +1,46 @@
+# src/tests/test_concurrency.py
+
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+def test_sessions_are_scoped_per_app_context(test_app, test_database):
+    barrier = threading.Barrier(4)
+    sessions = []
+
+    def open_session():
+        with test_app.app_context():
+            session = test_database.session()
+            # all four contexts are alive at once here
+            barrier.wait(timeout=5)
+            sessions.append(session)
+
+    threads = [threading.Thread(target=open_session) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len({id(session) for session in sessions}) == 4
+    assert test_database.session() not in sessions
+
+
+def test_concurrent_requests(test_app, test_database, add_book):
+    ids = [str(add_book(f"Concurrent {i}", "Author").id) for i in range(8)]
+    test_database.session.remove()
+
+    def roundtrip(i):
+        client = test_app.test_client()
+        client.put(
+            f"/api/books/{ids[i]}",
+            data=json.dumps({"title": f"Concurrent {i}", "author": f"Author {i}"}),
+            content_type="application/json",
+        )
+        resp = client.get(f"/api/books/{ids[i]}")
+        return json.loads(resp.data.decode())["author"]
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        authors = list(executor.map(roundtrip, range(8)))
+
+    assert authors == [f"Author {i}" for i in range(8)]
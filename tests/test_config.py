@@ -3,6 +3,8 @@
 
 import os
 
+from sqlalchemy.pool import NullPool
+
 
 def test_development_config(test_app):
     test_app.config.from_object("src.config.DevelopmentConfig")
@@ -25,3 +27,20 @@ def test_production_config(test_app):
     assert test_app.config["SECRET_KEY"] == os.getenv("SECRET_KEY", "my_precious")
     assert not test_app.config["TESTING"]
     assert test_app.config["SQLALCHEMY_DATABASE_URI"] == os.environ.get("DATABASE_URL")
+
+
+def test_pool_options(test_app, monkeypatch):
+    from src.config import pool_options
+
+    test_app.config.from_object("src.config.ProductionConfig")
+    assert test_app.config["SQLALCHEMY_ENGINE_OPTIONS"]["pool_pre_ping"]
+    assert test_app.config["SQLALCHEMY_ENGINE_OPTIONS"]["pool_recycle"] > 0
+
+    monkeypatch.setenv("DB_POOL_SIZE", "7")
+    monkeypatch.setenv("DB_POOL_PRE_PING", "false")
+    options = pool_options(size=2)
+    assert options["pool_size"] == 7
+    assert not options["pool_pre_ping"]
+
+    monkeypatch.setenv("DB_POOL_PROFILE", "pgbouncer")
+    assert pool_options() == {"poolclass": NullPool}
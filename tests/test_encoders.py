@@ -0,0 +1,48 @@
+# src/tests/test_encoders.py
+
+from datetime import datetime
+
+from flask_restx import marshal
+from flask_restx.representations import output_json
+
+from src.api.books import book, book_encoder
+from src.api.users import user, user_encoder
+from src.models.models import Book, BookType, PriorityLevel, ReadingStatus
+
+
+def test_book_encoder_matches_marshal(test_app, test_database, add_book):
+    found = add_book("Encoded Book", "Encoded Author")
+    found.genre = "Food"
+    found.priority = PriorityLevel.HIGH
+    found.status = ReadingStatus.READ
+    found.type_read = BookType.EBOOK
+    found.rating = 4
+    found.date_read = datetime(2024, 5, 1, 12, 30, 15, 250)
+    test_database.session.commit()
+
+    client = test_app.test_client()
+    resp = client.get(f"/api/books/{found.id}")
+    expected = output_json(
+        marshal(test_database.session.get(Book, found.id), book), 200
+    )
+    assert resp.data == expected.get_data()
+
+    resp = client.get("/api/books?fields=status,title,rating,id&limit=1000")
+    assert b'"status": "ReadingStatus.READ"' in resp.data
+
+
+def test_encoder_handles_missing_values(test_app):
+    encode = book_encoder.get(["title", "rating", "date_read"])
+    assert encode(("Untitled", None, None)) == marshal(
+        {"title": "Untitled"},
+        {name: book[name] for name in ["title", "rating", "date_read"]},
+    )
+
+
+def test_user_encoder_matches_marshal(test_app, test_database, add_user):
+    found = add_user("encoded", "encoded@notreal.com")
+    client = test_app.test_client()
+    resp = client.get(f"/api/users/{found.id}")
+    expected = output_json(marshal(found, user), 200)
+    assert resp.data == expected.get_data()
+    assert list(user_encoder.get()((1, "u", "e", None))) == list(user)
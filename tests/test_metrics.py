@@ -0,0 +1,52 @@
+# src/tests/test_metrics.py
+
+from prometheus_client import REGISTRY
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+def test_metrics_record_requests(test_app, test_database, add_book):
+    add_book("Measured Book", "Measured Author")
+    labels = {"endpoint": "books_book_list", "method": "GET"}
+    requests = sample(
+        "booker_http_request_duration_seconds_count", status="200", **labels
+    )
+    statements = sample("booker_db_statements_per_request_sum", **labels)
+
+    client = test_app.test_client()
+    resp = client.get("/api/books")
+    assert resp.status_code == 200
+
+    assert (
+        sample("booker_http_request_duration_seconds_count", status="200", **labels)
+        == requests + 1
+    )
+    # the page query, which also versions the page
+    assert sample("booker_db_statements_per_request_sum", **labels) == statements + 1
+    assert sample("booker_http_requests_in_progress", method="GET") == 0
+
+
+def test_metrics_endpoint(test_app, test_database):
+    client = test_app.test_client()
+    client.get("/ping")
+    client.get("/no-such-page")
+    resp = client.get("/metrics")
+    assert resp.status_code == 200
+    assert resp.mimetype == "text/plain"
+    body = resp.data.decode()
+    assert 'booker_http_request_duration_seconds_count{endpoint="ping_ping"' in body
+    assert 'endpoint="unmatched",method="GET",status="404"' in body
+    assert "booker_db_pool_checkout_wait_seconds_bucket" in body
+
+
+def test_metrics_pool_telemetry(test_app, test_database):
+    test_app.test_client().get("/api/books")
+    # the tests share one app context, so its session still holds a connection
+    primary = {"engine": "primary"}
+    assert sample("booker_db_pool_checked_out_connections", **primary) == 1
+    test_database.session.remove()
+    assert sample("booker_db_pool_checked_out_connections", **primary) == 0
+    assert sample("booker_db_pool_size", **primary) == 2
+    assert sample("booker_db_pool_connection_events_total", event="connect") >= 1
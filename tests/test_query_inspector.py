@@ -0,0 +1,44 @@
+# src/tests/test_query_inspector.py
+
+from src.query_inspector import QueryInspector, statement_shape
+
+
+def test_statement_shape():
+    assert statement_shape(
+        "SELECT books.id FROM books\n WHERE books.id IN (%(id_1_1)s, %(id_1_2)s)"
+        " AND rating > 3 AND title = 'It''s'"
+    ) == (
+        "SELECT books.id FROM books WHERE books.id IN (?) AND rating > ? AND title = ?"
+    )
+    assert statement_shape("SELECT 1 LIMIT %(param_1)s") == statement_shape(
+        "SELECT 1 LIMIT %(param_2)s"
+    )
+
+
+def test_inspector_records_findings(test_app, test_database, add_book):
+    add_book("Inspected Book", "Inspected Author")
+    inspector = QueryInspector(
+        slow_ms=0, repeat_threshold=0, explain_rate=1, sample=lambda: 0.0
+    )
+    inspector.install(test_app, test_database.engine)
+    try:
+        resp = test_app.test_client().get("/api/books")
+        assert resp.status_code == 200
+    finally:
+        inspector.uninstall(test_app, test_database.engine)
+
+    findings = inspector.findings()
+    slow = [f for f in findings if f["type"] == "slow_statement"]
+    repeated = [f for f in findings if f["type"] == "repeated_statement"]
+    assert slow and repeated
+    assert all(f["endpoint"] == "books_book_list" for f in findings)
+    assert "Plan" in slow[0]["plan"][0]
+    assert repeated[0]["count"] == 1
+
+    inspector.clear()
+    assert inspector.findings() == []
+
+
+def test_inspector_endpoint_is_dev_only(test_app):
+    resp = test_app.test_client().get("/debug/queries")
+    assert resp.status_code == 404
@@ -0,0 +1,147 @@
+# src/tests/test_replica.py
+
+import json
+import os
+
+import pytest
+from prometheus_client import REGISTRY
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+from src import create_app, db
+from src.config import TestingConfig
+from src.replica import STICKY_COOKIE
+
+
+@pytest.fixture(scope="function")
+def replica_app(test_app, test_database, monkeypatch):
+    def _replica_app(url):
+        monkeypatch.setenv("APP_SETTINGS", "src.config.TestingConfig")
+        monkeypatch.setattr(
+            TestingConfig, "SQLALCHEMY_BINDS", {"replica": url}, raising=False
+        )
+        return create_app()
+
+    yield _replica_app
+    # init_app registered a metadata for the bind on the shared db object
+    db.metadatas.pop("replica", None)
+
+
+def count_statements(app):
+    with app.app_context():
+        engine = db.engines["replica"]
+    statements = []
+    event.listen(
+        engine, "after_cursor_execute", lambda *args: statements.append(args[2])
+    )
+    return statements
+
+
+def test_reads_use_replica_until_a_write(replica_app):
+    app = replica_app(os.environ.get("DATABASE_TEST_URL"))
+    statements = count_statements(app)
+    client = app.test_client()
+
+    assert client.get("/api/books").status_code == 200
+    assert statements
+
+    statements.clear()
+    resp = client.post(
+        "/api/books",
+        data=json.dumps({"title": "Replicated", "author": "Replica Author"}),
+        content_type="application/json",
+    )
+    assert resp.status_code == 201
+    assert STICKY_COOKIE in resp.headers["Set-Cookie"]
+    assert not statements
+
+    # the client reads its own write from the primary
+    resp = client.get("/api/books")
+    assert b"Replicated" in resp.data
+    assert not statements
+
+    client.delete_cookie(STICKY_COOKIE)
+    client.get("/api/books")
+    assert statements
+
+
+def test_failed_replica_falls_back_to_primary(replica_app):
+    url = make_url(os.environ.get("DATABASE_TEST_URL"))
+    url = url.set(database="no_such_replica")
+    app = replica_app(url.render_as_string(hide_password=False))
+    client = app.test_client()
+
+    resp = client.get("/api/users")
+    assert resp.status_code == 200
+    # and the replica is left alone for a while
+    with app.test_request_context():
+        assert not app.extensions["replica_router"].use_replica()
+
+
+def test_replica_pool_metrics_are_labelled(replica_app):
+    app = replica_app(os.environ.get("DATABASE_TEST_URL"))
+    with app.app_context():
+        replica_pool = db.engines["replica"].pool
+        primary_pool = db.engine.pool
+    assert replica_pool.engine == "replica"
+    assert primary_pool.engine == "primary"
+
+    app.test_client().get("/api/books")
+    size = REGISTRY.get_sample_value("booker_db_pool_size", {"engine": "replica"})
+    assert size == replica_pool.size()
+    waits = REGISTRY.get_sample_value(
+        "booker_db_pool_checkout_wait_seconds_count", {"engine": "replica"}
+    )
+    assert waits >= 1
+
+
+def test_cache_is_filled_from_primary_reads_only(replica_app, monkeypatch):
+    monkeypatch.setattr(TestingConfig, "RESPONSE_CACHE_ENABLED", True)
+    app = replica_app(os.environ.get("DATABASE_TEST_URL"))
+    statements = count_statements(app)
+    cache = app.extensions["response_cache"]
+    client = app.test_client()
+
+    # a lagging replica's answer is not cached
+    assert client.get("/api/books").status_code == 200
+    assert statements
+    assert cache.stats()["entries"] == 0
+
+    resp = client.post(
+        "/api/books",
+        data=json.dumps({"title": "Cached Nowhere", "author": "Replica Author"}),
+        content_type="application/json",
+    )
+    assert resp.status_code == 201
+
+    # nor, while the cookie is set, is the cache read or filled
+    stats = cache.stats()
+    resp = client.get("/api/books")
+    assert b"Cached Nowhere" in resp.data
+    assert cache.stats() == stats
+
+    # once the replica is skipped, primary reads fill it as usual
+    client.delete_cookie(STICKY_COOKIE)
+    app.extensions["replica_router"].mark_down()
+    statements.clear()
+    client.get("/api/books")
+    assert cache.stats()["entries"] == 1
+    assert b"Cached Nowhere" in client.get("/api/books").data
+    assert cache.stats()["hits"] == stats["hits"] + 1
+    assert not statements
+
+
+def test_timeline_reads_use_replica(replica_app):
+    app = replica_app(os.environ.get("DATABASE_TEST_URL"))
+    statements = count_statements(app)
+    cache = app.extensions["timeline_cache"]
+    cache.clear()
+    client = app.test_client()
+
+    assert client.get("/api/books/timeline?year=2020").status_code == 200
+    assert statements
+    assert cache.stats()["entries"] == 0
+
+    app.extensions["replica_router"].mark_down()
+    client.get("/api/books/timeline?year=2020")
+    assert cache.stats()["entries"] == 1
@@ -0,0 +1,34 @@
+# src/tests/test_spec.py
+
+import json
+
+from src.api.spec import init_spec, write_spec
+
+
+def test_spec_etag(test_app):
+    client = test_app.test_client()
+    resp = client.get("/swagger.json")
+    assert resp.status_code == 200
+    assert "/api/books" in resp.json["paths"]
+    resp = client.get("/swagger.json", headers={"If-None-Match": resp.headers["ETag"]})
+    assert resp.status_code == 304
+
+
+def test_prebuilt_spec(test_app, tmp_path):
+    path = tmp_path / "swagger.json"
+    write_spec(test_app, path)
+    spec = json.loads(path.read_text())
+    assert spec["info"]["title"] == "My API"
+
+    # a prebuilt file is served as it is
+    spec["info"]["title"] = "Prebuilt"
+    path.write_text(json.dumps(spec))
+    test_app.config["SWAGGER_SPEC_FILE"] = str(path)
+    extensions = test_app.extensions.copy()
+    try:
+        init_spec(test_app)
+        resp = test_app.test_client().get("/swagger.json")
+        assert resp.json["info"]["title"] == "Prebuilt"
+    finally:
+        test_app.config["SWAGGER_SPEC_FILE"] = None
+        test_app.extensions = extensions
@@ -0,0 +1,67 @@
+# src/tests/test_startup.py
+
+import json
+import os
+import subprocess  # nosec B404
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+# what a worker may spend importing and creating the app; generous for a
+# busy CI runner, so a failure means startup really got slower
+BUDGET_SECONDS = float(os.getenv("STARTUP_BUDGET_SECONDS", "3"))
+# only needed by the asset build and by gunicorn's gevent workers
+BUILD_ONLY = {"rcssmin", "rjsmin", "gevent", "psycogreen"}
+
+CHILD = """
+import json, sys, time
+start = time.perf_counter()
+from src import create_app
+create_app()
+seconds = time.perf_counter() - start
+print(json.dumps({"seconds": seconds, "modules": sorted(sys.modules)}))
+"""
+
+
+def start_app():
+    """Creates the app in a fresh interpreter, as a new worker does."""
+    result = subprocess.run(  # nosec B603
+        [sys.executable, "-X", "importtime", "-c", CHILD],
+        cwd=ROOT,
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    imports = []
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, cumulative, name = line.split("|")
+            if cumulative.strip().isdigit():
+                imports.append((int(cumulative) / 1e6, name.rstrip()))
+    return json.loads(result.stdout.splitlines()[-1]), imports
+
+
+def test_startup_budget():
+    started, imports = start_app()
+    slowest = sorted(imports, reverse=True)[:10]
+    report = "\n".join(f"{seconds:8.3f}s {name}" for seconds, name in slowest)
+    assert started["seconds"] < BUDGET_SECONDS, f"slowest imports:\n{report}"
+    assert not BUILD_ONLY & set(started["modules"])
+
+
+def test_build_commands_need_no_database(tmp_path):
+    # as in the image build: production settings, no DATABASE_URL
+    env = {
+        key: value
+        for key, value in os.environ.items()
+        if not key.startswith("DATABASE")
+    }
+    env["APP_SETTINGS"] = "src.config.ProductionConfig"
+    env["SWAGGER_SPEC_FILE"] = str(tmp_path / "swagger.json")
+    env["TEMPLATE_CACHE_DIR"] = str(tmp_path / "templates")
+    for command in ("precompile_templates", "build_spec"):
+        subprocess.run(  # nosec B603
+            [sys.executable, "manage.py", command], cwd=ROOT, env=env, check=True
+        )
+    assert json.loads((tmp_path / "swagger.json").read_text())["paths"]
+    assert any((tmp_path / "templates").iterdir())
@@ -0,0 +1,157 @@
+# src/tests/test_stats.py
+
+import json
+import threading
+
+from sqlalchemy import delete
+
+from src import db
+from src.api.crud import delete_book, get_book_by_id, set_book_status
+from src.api.stats import ensure_book_stats, rebuild_book_stats
+from src.models.models import Book, BookStat, ReadingStatus
+
+
+def get_stats(client):
+    resp = client.get("/api/books/stats")
+    assert resp.status_code == 200
+    return resp.json
+
+
+def assert_matches_rebuild(client):
+    """The incrementally maintained stats equal stats rebuilt from scratch."""
+    stats = get_stats(client)
+    rebuild_book_stats()
+    assert get_stats(client) == stats
+    return stats
+
+
+def test_stats(test_app, test_database):
+    rebuild_book_stats()
+    client = test_app.test_client()
+    assert get_stats(client)["books"] == 0
+
+    books = [
+        {"title": "Stats Dune", "genre": "scifi", "status": "read", "rating": 5,
+         "date_read": "2024-01-10T00:00:00", "type_read": "ebook"},
+        {"title": "Stats Hyperion", "genre": "scifi", "status": "read", "rating": 3,
+         "date_read": "2024-01-20T00:00:00"},
+        {"title": "Stats Emma", "genre": "classic", "status": "reading"},
+        {"title": "Stats Untitled"},
+    ]  # fmt: skip
+    resp = client.post(
+        "/api/books/bulk", data=json.dumps(books), content_type="application/json"
+    )
+    ids = {r["title"]: r["id"] for r in resp.json["results"]}
+    client.post("/api/books", json={"title": "Stats Single", "author": "Someone"})
+
+    stats = assert_matches_rebuild(client)
+    assert stats["books"] == 5
+    assert stats["rated"] == 2
+    assert stats["average_rating"] == 4
+    by_genre = {s["key"]: s["books"] for s in stats["by_genre"]}
+    assert by_genre == {None: 2, "classic": 1, "scifi": 2}
+    by_status = {s["key"]: s["books"] for s in stats["by_status"]}
+    assert by_status == {"read": 2, "reading": 1, "to_read": 2}
+    by_type = {s["key"]: s["books"] for s in stats["by_type_read"]}
+    assert by_type == {"audiobook": 4, "ebook": 1}
+    assert stats["finished_by_month"] == [
+        {"key": "2024-01", "books": 2, "rated": 2, "average_rating": 4}
+    ]
+
+    set_book_status(get_book_by_id(ids["Stats Emma"]), ReadingStatus.READ)
+    client.put(f"/api/books/{ids['Stats Untitled']}", json={"title": "Stats Titled"})
+    client.delete(f"/api/books/{ids['Stats Dune']}")
+    client.patch(f"/api/books/{ids['Stats Hyperion']}", json={"rating": 1})
+
+    stats = assert_matches_rebuild(client)
+    assert stats["books"] == 4
+    assert stats["average_rating"] == 1
+    by_status = {s["key"]: s["books"] for s in stats["by_status"]}
+    assert by_status == {"read": 2, "to_read": 2}
+    assert stats["finished_by_month"][0]["books"] == 1
+
+
+def test_failed_update_leaves_stats(test_app, test_database, add_book):
+    client = test_app.test_client()
+    client.post("/api/books", json={"title": "Stats Taken", "author": "A"})
+    book = add_book("Stats Free", "B")
+    rebuild_book_stats()
+    before = get_stats(client)
+
+    resp = client.put(f"/api/books/{book.id}", json={"title": "Stats Taken"})
+    assert resp.status_code == 409
+    db.session.rollback()
+    assert get_stats(client) == before
+
+
+def test_bulk_writes_keep_stats(test_app, test_database):
+    client = test_app.test_client()
+    books = [
+        {"title": f"Stats Series {index}", "genre": "stats-series"}
+        for index in range(4)
+    ]
+    client.post("/api/books/bulk", json=books)
+    rebuild_book_stats()
+
+    resp = client.patch(
+        "/api/books?genre=stats-series",
+        json={"status": "read", "rating": 2, "date_read": "2023-05-01T00:00:00"},
+    )
+    assert resp.json["count"] == 4
+    stats = assert_matches_rebuild(client)
+    assert {"key": "2023-05", "books": 4, "rated": 4, "average_rating": 2} in stats[
+        "finished_by_month"
+    ]
+
+    resp = client.delete("/api/books?genre=stats-series&status=read")
+    assert resp.json["count"] == 4
+    stats = assert_matches_rebuild(client)
+    assert "stats-series" not in {s["key"] for s in stats["by_genre"]}
+
+
+def test_concurrent_writes_keep_stats(test_app, test_database):
+    client = test_app.test_client()
+    resp = client.post("/api/books/bulk", json=[{"title": "Stats Raced"}])
+    book_id = resp.json["results"][0]["id"]
+    rebuild_book_stats()
+    test_database.session.remove()
+
+    def race(write, *args):
+        # every thread loads the book before any of them writes it
+        barrier = threading.Barrier(len(args))
+
+        def run(arg):
+            with test_app.app_context():
+                book = get_book_by_id(book_id)
+                barrier.wait(timeout=5)
+                write(book, arg)
+                db.session.remove()
+
+        threads = [threading.Thread(target=run, args=(arg,)) for arg in args]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    race(set_book_status, ReadingStatus.READ, ReadingStatus.READING)
+    stats = assert_matches_rebuild(client)
+    assert sum(s["books"] for s in stats["by_status"]) == stats["books"]
+
+    race(lambda book, _: delete_book(book), 1, 2)
+    stats = assert_matches_rebuild(client)
+    assert get_book_by_id(book_id) is None
+
+
+def test_missing_stats_are_rebuilt(test_app, test_database, add_book):
+    # as in a database whose books predate the rollups
+    db.session.execute(delete(BookStat))
+    db.session.commit()
+    add_book("Unrolled", "Someone")
+    client = test_app.test_client()
+    resp = client.get("/api/books/stats")
+    assert resp.status_code == 503
+    assert "rebuild_stats" in resp.json["message"]
+
+    assert ensure_book_stats()
+    assert get_stats(client)["books"] == db.session.query(Book).count()
+    assert not ensure_book_stats()
@@ -0,0 +1,35 @@
+# src/tests/test_templating.py
+
+from pathlib import Path
+
+from flask import Flask, render_template
+
+import src
+from src.templating import init_template_cache, precompile_templates
+
+
+def make_app(cache_dir):
+    app = Flask("src", root_path=str(Path(src.__file__).parent))
+    app.config["TEMPLATE_CACHE_DIR"] = str(cache_dir)
+    init_template_cache(app)
+    return app
+
+
+def test_precompiled_templates_are_not_compiled_again(tmp_path, monkeypatch):
+    names = precompile_templates(make_app(tmp_path))
+    assert "shared/_base.html" in names
+    assert len(list(tmp_path.iterdir())) == len(names)
+
+    # a new process with the same cache directory renders without compiling
+    app = make_app(tmp_path)
+
+    def compile(*args, **kwargs):
+        raise AssertionError("template compiled despite the bytecode cache")
+
+    monkeypatch.setattr(app.jinja_env, "compile", compile)
+    with app.test_request_context():
+        assert "Booker" in render_template("home/about.html", page_name="About")
+
+
+def test_no_cache_in_tests(test_app):
+    assert test_app.jinja_env.bytecode_cache is None
@@ -0,0 +1,115 @@
+# src/tests/test_timeline.py
+
+import json
+
+from src import db
+from src.api.crud import get_book_by_id, set_book_status
+from src.api.stats import book_state, record_book_changes
+from src.models.models import ReadingStatus
+
+
+def add_books(client, books):
+    resp = client.post(
+        "/api/books/bulk", data=json.dumps(books), content_type="application/json"
+    )
+    return {r["title"]: r["id"] for r in resp.json["results"]}
+
+
+def read_on(title, date):
+    return {
+        "title": title,
+        "status": "read",
+        "date_read": date,
+        "date_added": "2020-12-15T00:00:00",
+    }
+
+
+def test_timeline_by_month(test_app, test_database):
+    client = test_app.test_client()
+    add_books(
+        client,
+        [
+            read_on("Timeline Jan", "2021-01-05T10:00:00"),
+            read_on("Timeline Feb", "2021-02-05T10:00:00"),
+            read_on("Timeline Feb 2", "2021-02-25T10:00:00"),
+            read_on("Timeline Apr", "2021-04-01T00:00:00"),
+            read_on("Timeline 2022", "2022-01-01T00:00:00"),
+            {"title": "Timeline Added", "date_added": "2021-03-03T00:00:00"},
+        ],
+    )
+
+    resp = client.get("/api/books/timeline?year=2021&goal=12")
+    assert resp.status_code == 200
+    timeline = resp.json
+    assert timeline["read"] == 4
+    assert timeline["added"] == 1
+    assert timeline["longest_streak"] == 2
+    assert timeline["current_streak"] == 0
+
+    periods = timeline["periods"]
+    assert len(periods) == 12
+    assert [p["read"] for p in periods[:5]] == [1, 2, 0, 1, 0]
+    assert [p["streak"] for p in periods[:5]] == [1, 2, 0, 1, 0]
+    assert periods[3]["read_to_date"] == 4
+    # a book a month keeps pace with a goal of 12
+    assert round(periods[0]["goal_to_date"], 2) == round(12 * 31 / 365, 2)
+    assert round(periods[-1]["goal_to_date"]) == 12
+    assert round(periods[3]["ahead_of_goal"], 2) == round(4 - 12 * 120 / 365, 2)
+
+
+def test_timeline_granularity(test_app, test_database):
+    client = test_app.test_client()
+    add_books(
+        client,
+        [
+            read_on("Timeline Day 1", "2019-03-01T08:00:00"),
+            read_on("Timeline Day 2", "2019-03-02T23:00:00"),
+            read_on("Timeline Day 3", "2019-03-03T01:00:00"),
+        ],
+    )
+    days = client.get("/api/books/timeline?year=2019&granularity=day").json
+    assert len(days["periods"]) == 365
+    assert days["longest_streak"] == 3
+    assert days["periods"][0]["goal_to_date"] is None
+
+    weeks = client.get("/api/books/timeline?year=2019&granularity=week").json
+    # 2019-03-01 to 03 is a Friday to Sunday
+    assert [p["read"] for p in weeks["periods"] if p["read"]] == [3]
+    assert weeks["periods"][0]["period"].startswith("2018-12-31")
+
+    resp = client.get("/api/books/timeline?granularity=year")
+    assert resp.status_code == 400
+    assert client.get("/api/books/timeline?goal=0").status_code == 400
+
+
+def test_past_years_cached(test_app, test_database):
+    client = test_app.test_client()
+    ids = add_books(
+        client,
+        [
+            read_on("Timeline Cached", "2018-06-01T00:00:00"),
+            read_on("Timeline Later", "2018-07-01T00:00:00"),
+        ],
+    )
+    cache = test_app.extensions["timeline_cache"]
+    assert client.get("/api/books/timeline?year=2018").json["read"] == 2
+    hits = cache.stats()["hits"]
+    assert client.get("/api/books/timeline?year=2018").json["read"] == 2
+    assert cache.stats()["hits"] == hits + 1
+
+    # a write to a book of a past year clears the cache once it commits
+    set_book_status(get_book_by_id(ids["Timeline Later"]), ReadingStatus.READING)
+    assert client.get("/api/books/timeline?year=2018").json["read"] == 1
+
+    # but not before, nor if it is rolled back
+    later = book_state(get_book_by_id(ids["Timeline Later"]))
+    record_book_changes([(later, later | {"status": ReadingStatus.READ})])
+    assert cache.stats()["entries"] == 1
+    db.session.rollback()
+    db.session.commit()
+    assert cache.stats()["entries"] == 1
+
+    # the current year is never cached
+    client.get("/api/books/timeline")
+    client.get("/api/books/timeline")
+    assert cache.stats()["entries"] == 1
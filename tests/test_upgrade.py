@@ -0,0 +1,103 @@
+# src/tests/test_upgrade.py
+
+from pathlib import Path
+
+import pytest
+from sqlalchemy import inspect, text
+
+from src.models.models import Book, BookStat, User
+
+UPGRADE = Path(__file__).parents[1] / "src" / "db" / "upgrade.sql"
+SCHEMA = "upgrade_test"
+
+# the tables as the original models created them
+ORIGINAL = """
+CREATE TYPE prioritylevel AS ENUM ('HIGH', 'MEDIUM', 'LOW');
+CREATE TYPE readingstatus AS ENUM ('TO_READ', 'READING', 'READ');
+CREATE TYPE booktype AS ENUM ('PHYSICAL', 'EBOOK', 'AUDIOBOOK');
+CREATE TABLE users (
+    id SERIAL PRIMARY KEY,
+    username VARCHAR(128) NOT NULL,
+    email VARCHAR(128) NOT NULL,
+    active BOOLEAN NOT NULL,
+    created_date TIMESTAMP NOT NULL
+);
+CREATE TABLE books (
+    id UUID PRIMARY KEY,
+    title TEXT,
+    author TEXT,
+    genre TEXT,
+    date_added TIMESTAMP,
+    priority prioritylevel NOT NULL,
+    referred_by TEXT,
+    status readingstatus NOT NULL,
+    category TEXT,
+    notes TEXT,
+    type_read booktype NOT NULL,
+    rating INTEGER CHECK (rating >= 1 AND rating <= 5),
+    date_read TIMESTAMP,
+    CONSTRAINT rating_range CHECK (rating >= 1 AND rating <= 5)
+);
+INSERT INTO users (username, email, active, created_date) VALUES
+    ('first', 'Same@example.com', true, now()),
+    ('second', 'same@EXAMPLE.com', true, now());
+INSERT INTO books (id, title, date_added, priority, status, type_read, notes) VALUES
+    (gen_random_uuid(), 'Twice', '2020-01-01', 'LOW', 'READ', 'EBOOK', 'turnips'),
+    (gen_random_uuid(), 'Twice', '2021-01-01', 'LOW', 'READ', 'EBOOK', NULL),
+    (gen_random_uuid(), 'Undated', NULL, 'LOW', 'TO_READ', 'EBOOK', NULL);
+"""
+
+
+def statements(sql):
+    lines = [line for line in sql.splitlines() if not line.startswith("--")]
+    return [s for s in "\n".join(lines).split(";") if s.strip()]
+
+
+def run(connection, sql):
+    for statement in statements(sql):
+        connection.execute(text(statement))
+
+
+@pytest.fixture(scope="function")
+def original_schema(test_app, test_database):
+    engine = test_database.engine.execution_options(isolation_level="AUTOCOMMIT")
+    with engine.connect() as connection:
+        connection.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        connection.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+        connection.execute(text(f"SET search_path TO {SCHEMA}"))
+        run(connection, ORIGINAL)
+        yield connection
+        connection.execute(text(f"DROP SCHEMA {SCHEMA} CASCADE"))
+
+
+def test_upgrade(original_schema):
+    # twice, as it may be run again
+    run(original_schema, UPGRADE.read_text())
+    run(original_schema, UPGRADE.read_text())
+
+    inspector = inspect(original_schema)
+    for model in (User, Book, BookStat):
+        table = model.__table__
+        columns = inspector.get_columns(table.name, schema=SCHEMA)
+        assert {c["name"]: c["nullable"] for c in columns} == {
+            c.name: c.nullable for c in table.columns
+        }
+        indexes = inspector.get_indexes(table.name, schema=SCHEMA)
+        assert {i["name"] for i in indexes} == {i.name for i in table.indexes}
+
+    emails = original_schema.execute(text("SELECT email FROM users ORDER BY id"))
+    emails = emails.scalars().all()
+    assert emails[0] == "Same@example.com"
+    assert emails[1].startswith("duplicate-2-")
+
+    books = original_schema.execute(
+        text("SELECT title, date_added FROM books ORDER BY date_added, title")
+    ).all()
+    assert books[0].title == "Twice"
+    assert books[1].title.startswith("Twice (duplicate ")
+    assert all(book.date_added is not None for book in books)
+
+    found = original_schema.execute(
+        text("SELECT title FROM books WHERE search_vector @@ to_tsquery('turnip')")
+    )
+    assert found.scalars().all() == ["Twice"]
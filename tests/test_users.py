@@ -62,6 +62,13 @@ def test_add_user_duplicate_email(test_app: Flask, test_database: SQLAlchemy):
     assert resp.status_code == 400
     assert "Sorry. That email already exists." in data["message"]
 
+    resp = client.post(
+        "/api/users",
+        data=json.dumps({"username": "michael", "email": "Michael@TestDriven.io"}),
+        content_type="application/json",
+    )
+    assert resp.status_code == 400
+
 
 def test_single_user(test_app, test_database, add_user):
     user = add_user(username="jeffrey", email="jeffrey@testdriven.io")
@@ -69,6 +76,7 @@ def test_single_user(test_app, test_database, add_user):
     resp = client.get(f"/api/users/{user.id}")
     data = json.loads(resp.data.decode())
     assert resp.status_code == 200
+    assert resp.mimetype == "application/json"
     assert "jeffrey" in data["username"]
     assert "jeffrey@testdriven.io" in data["email"]
 
@@ -89,6 +97,7 @@ def test_all_users(test_app, test_database, add_user):
     resp = client.get("/api/users")
     data = json.loads(resp.data.decode())
     assert resp.status_code == 200
+    assert resp.mimetype == "application/json"
     assert len(data) == 2
     assert "michael" in data[0]["username"]
     assert "michael@mherman.org" in data[0]["email"]
@@ -96,6 +105,50 @@ def test_all_users(test_app, test_database, add_user):
     assert "fletcher@notreal.com" in data[1]["email"]
 
 
+def test_all_users_paginated(test_app, test_database, add_user):
+    test_database.session.query(User).delete()
+    add_user("michael", "michael@mherman.org")
+    add_user("fletcher", "fletcher@notreal.com")
+    client = test_app.test_client()
+    resp_one = client.get("/api/users?limit=1")
+    data = json.loads(resp_one.data.decode())
+    assert resp_one.status_code == 200
+    assert [user["username"] for user in data] == ["michael"]
+
+    cursor = resp_one.headers["X-Next-Cursor"]
+    resp_two = client.get(f"/api/users?limit=1&cursor={cursor}")
+    data = json.loads(resp_two.data.decode())
+    assert resp_two.status_code == 200
+    assert [user["username"] for user in data] == ["fletcher"]
+    assert "X-Next-Cursor" not in resp_two.headers
+
+
+def test_single_user_sparse_fields(test_app, test_database, add_user):
+    user = add_user("sparse", "sparse@notreal.com")
+    client = test_app.test_client()
+    resp = client.get(f"/api/users/{user.id}?fields=email")
+    data = json.loads(resp.data.decode())
+    assert resp.status_code == 200
+    assert data == {"email": "sparse@notreal.com"}
+
+    resp = client.get(f"/api/users/{user.id}?fields=password")
+    data = json.loads(resp.data.decode())
+    assert resp.status_code == 400
+    assert "Unknown fields: password" in data["message"]
+
+
+def test_single_user_conditional_get(test_app, test_database, add_user):
+    user = add_user("etag", "etag@notreal.com")
+    client = test_app.test_client()
+    resp = client.get(f"/api/users/{user.id}")
+    assert resp.status_code == 200
+
+    resp = client.get(
+        f"/api/users/{user.id}", headers={"If-None-Match": resp.headers["ETag"]}
+    )
+    assert resp.status_code == 304
+
+
 def test_remove_user(test_app, test_database, add_user):
     test_database.session.query(User).delete()
     user = add_user("user-to-be-removed", "remove-me@testdriven.io")
@@ -177,9 +230,58 @@ def test_update_user_duplicate_email(test_app, test_database, add_user):
     client = test_app.test_client()
     resp = client.put(
         f"/api/users/{user.id}",
-        data=json.dumps({"username": "rob", "email": "rob@notreal.com"}),
+        data=json.dumps({"username": "rob", "email": "ROB@hajek.org"}),
         content_type="application/json",
     )
     data = json.loads(resp.data.decode())
     assert resp.status_code == 400
     assert "Sorry. That email already exists." in data["message"]
+
+
+def test_update_user_same_email(test_app, test_database, add_user):
+    user = add_user("same", "same@notreal.com")
+
+    client = test_app.test_client()
+    resp = client.put(
+        f"/api/users/{user.id}",
+        data=json.dumps({"username": "renamed", "email": "same@notreal.com"}),
+        content_type="application/json",
+    )
+    data = json.loads(resp.data.decode())
+    assert resp.status_code == 200
+    assert f"{user.id} was updated!" in data["message"]
+
+
+def test_patch_user(test_app, test_database, add_user):
+    user = add_user("patchme", "patchme@notreal.com")
+
+    client = test_app.test_client()
+    resp = client.patch(f"/api/users/{user.id}", json={"username": "patched"})
+    assert resp.status_code == 200
+    assert resp.mimetype == "application/json"
+    assert resp.json["username"] == "patched"
+    assert resp.json["email"] == "patchme@notreal.com"
+    assert client.get(f"/api/users/{user.id}").json == resp.json
+
+
+@pytest.mark.parametrize(
+    "user_id, payload, status_code, message",
+    [
+        [None, {}, 400, "Nothing to update"],
+        [None, {"email": None}, 400, "not-null constraint"],
+        [None, {"username": "x" * 129}, 400, "too long"],
+        [None, {"email": "PATCH@taken.org"}, 400, "Sorry. That email already exists."],
+        [999, {"username": "nobody"}, 404, "User 999 does not exist"],
+    ],
+)
+def test_patch_user_invalid(
+    test_app, test_database, add_user, user_id, payload, status_code, message
+):
+    if not User.query.filter_by(email="patch@taken.org").first():
+        add_user("taken", "patch@taken.org")
+    user = add_user("unpatched", f"unpatched{User.query.count()}@notreal.com")
+
+    client = test_app.test_client()
+    resp = client.patch(f"/api/users/{user_id or user.id}", json=payload)
+    assert resp.status_code == status_code
+    assert message in resp.json["message"]
@@ -10,13 +10,9 @@ import src.api.users
 
 
 def test_add_user(test_app, monkeypatch):
-    def mock_get_user_by_email(email):
-        return None
-
     def mock_add_user(username, email):
         return True
 
-    monkeypatch.setattr(src.api.users, "get_user_by_email", mock_get_user_by_email)
     monkeypatch.setattr(src.api.users, "add_user", mock_add_user)
 
     client = test_app.test_client()
@@ -55,13 +51,9 @@ def test_add_user_invalid_json_keys(test_app, monkeypatch):
 
 
 def test_add_user_duplicate_email(test_app, monkeypatch):
-    def mock_get_user_by_email(email):
-        return True
-
     def mock_add_user(username, email):
-        return True
+        return None
 
-    monkeypatch.setattr(src.api.users, "get_user_by_email", mock_get_user_by_email)
     monkeypatch.setattr(src.api.users, "add_user", mock_add_user)
     client = test_app.test_client()
     resp = client.post(
@@ -75,15 +67,17 @@ def test_add_user_duplicate_email(test_app, monkeypatch):
 
 
 def test_single_user(test_app, monkeypatch):
-    def mock_get_user_by_id(user_id):
-        return {
+    def mock_get_user_row(user_id, columns):
+        user = {
             "id": 1,
             "username": "jeffrey",
             "email": "jeffrey@testdriven.io",
             "created_date": datetime.now(),
+            "updated_at": datetime.now(),
         }
+        return tuple(user[column] for column in [*columns, "updated_at"])
 
-    monkeypatch.setattr(src.api.users, "get_user_by_id", mock_get_user_by_id)
+    monkeypatch.setattr(src.api.users, "get_user_row", mock_get_user_row)
     client = test_app.test_client()
     resp = client.get("/api/users/1")
     data = json.loads(resp.data.decode())
@@ -93,10 +87,10 @@ def test_single_user(test_app, monkeypatch):
 
 
 def test_single_user_incorrect_id(test_app, monkeypatch):
-    def mock_get_user_by_id(user_id):
+    def mock_get_user_row(user_id, columns):
         return None
 
-    monkeypatch.setattr(src.api.users, "get_user_by_id", mock_get_user_by_id)
+    monkeypatch.setattr(src.api.users, "get_user_row", mock_get_user_row)
     client = test_app.test_client()
     resp = client.get("/api/users/999")
     data = json.loads(resp.data.decode())
@@ -105,8 +99,8 @@ def test_single_user_incorrect_id(test_app, monkeypatch):
 
 
 def test_all_users(test_app, monkeypatch):
-    def mock_get_all_users():
-        return [
+    def mock_get_users_page(limit, after_id, columns):
+        users = [
             {
                 "id": 1,
                 "username": "michael",
@@ -120,8 +114,13 @@ def test_all_users(test_app, monkeypatch):
                 "created_date": datetime.now(),
             },
         ]
+        # rows end with the user's updated_at and id
+        return [
+            (*[user[column] for column in columns], datetime.now(), user["id"])
+            for user in users
+        ], False
 
-    monkeypatch.setattr(src.api.users, "get_all_users", mock_get_all_users)
+    monkeypatch.setattr(src.api.users, "get_users_page", mock_get_users_page)
     client = test_app.test_client()
     resp = client.get("/api/users")
     data = json.loads(resp.data.decode())
@@ -131,6 +130,15 @@ def test_all_users(test_app, monkeypatch):
     assert "michael@mherman.org" in data[0]["email"]
     assert "fletcher" in data[1]["username"]
     assert "fletcher@notreal.com" in data[1]["email"]
+    assert "X-Next-Cursor" not in resp.headers
+
+
+def test_all_users_invalid_cursor(test_app):
+    client = test_app.test_client()
+    resp = client.get("/api/users?cursor=not-a-cursor")
+    data = json.loads(resp.data.decode())
+    assert resp.status_code == 400
+    assert "invalid cursor" in data["message"]
 
 
 def test_remove_user(test_app, monkeypatch):
@@ -182,17 +190,26 @@ def test_update_user(test_app, monkeypatch):
 
     def mock_get_user_by_id(user_id):
         d = AttrDict()
-        d.update({"id": 1, "username": "me", "email": "me@testdriven.io"})
+        d.update(
+            {
+                "id": 1,
+                "username": "me",
+                "email": "me@testdriven.io",
+                "created_date": datetime.now(),
+                "updated_at": datetime.now(),
+            }
+        )
         return d
 
     def mock_update_user(user, username, email):
         return True
 
-    def mock_get_user_by_email(email):
-        return None
+    def mock_get_user_row(user_id, columns):
+        user = mock_get_user_by_id(user_id)
+        return tuple(user[column] for column in [*columns, "updated_at"])
 
     monkeypatch.setattr(src.api.users, "get_user_by_id", mock_get_user_by_id)
-    monkeypatch.setattr(src.api.users, "get_user_by_email", mock_get_user_by_email)
+    monkeypatch.setattr(src.api.users, "get_user_row", mock_get_user_row)
     monkeypatch.setattr(src.api.users, "update_user", mock_update_user)
     client = test_app.test_client()
     resp_one = client.put(
@@ -249,17 +266,20 @@ def test_update_user_duplicate_email(test_app, monkeypatch):
 
     def mock_get_user_by_id(user_id):
         d = AttrDict()
-        d.update({"id": 1, "username": "me", "email": "me@testdriven.io"})
+        d.update(
+            {
+                "id": 1,
+                "username": "me",
+                "email": "me@testdriven.io",
+                "updated_at": datetime.now(),
+            }
+        )
         return d
 
     def mock_update_user(user, username, email):
-        return True
-
-    def mock_get_user_by_email(email):
-        return True
+        return None
 
     monkeypatch.setattr(src.api.users, "get_user_by_id", mock_get_user_by_id)
-    monkeypatch.setattr(src.api.users, "get_user_by_email", mock_get_user_by_email)
     monkeypatch.setattr(src.api.users, "update_user", mock_update_user)
     client = test_app.test_client()
     resp = client.put(